@@ -134,6 +134,15 @@ async function processAnswer(user, questionIndex, isCorrect, responseTime, mlMod
  * @returns {Object} Prediction with interval
  */
 async function predictMLInterval(question, mlModel) {
+  const precomputed = precomputedInterval(question, mlModel);
+  if (precomputed !== null) {
+    return {
+      interval: precomputed,
+      confidence: null,
+      precomputed: true
+    };
+  }
+
   const { createFeatureVector } = require('../utils/question-helpers');
 
   // Create feature vector from question
@@ -148,6 +157,34 @@ async function predictMLInterval(question, mlModel) {
   };
 }
 
+/**
+ * Interval from the nightly batch score, if it is still valid
+ *
+ * Valid while the card has not been reviewed since it was scored and the
+ * score came from the loaded model (scripts/score-all-cards.py).
+ *
+ * @param {Object} question - Question to look up
+ * @param {Object} mlModel - Loaded ML model instance
+ * @returns {number|null} Precomputed interval in days, or null
+ */
+function precomputedInterval(question, mlModel) {
+  const precomputed = question.mlPrecomputed;
+  if (!precomputed || !precomputed.interval || !precomputed.scoredAt) {
+    return null;
+  }
+
+  if (!mlModel.version || precomputed.modelVersion !== mlModel.version) {
+    return null;
+  }
+
+  const scoredAt = new Date(precomputed.scoredAt).getTime();
+  if (question.lastReviewed && new Date(question.lastReviewed).getTime() > scoredAt) {
+    return null;
+  }
+
+  return precomputed.interval;
+}
+
 /**
  * Update user-level statistics
  *
@@ -309,6 +346,7 @@ function checkMLReadiness(user) {
 module.exports = {
   processAnswer,
   predictMLInterval,
+  precomputedInterval,
   updateUserStats,
   calculateNextReviewDate,
   getAlgorithmComparison,
@@ -128,7 +128,8 @@ function encodeCyclicalTime(timeOfDay) {
 /**
  * Calculate moving average features
  * MUST MATCH Python training script exactly!
- * Simplified version - no history required
+ * Uses the card's history inputs (ml/card-history.js) when baseFeatures has
+ * them; without them falls back to the current values
  */
 function calculateMovingAverageFeatures(baseFeatures) {
   const {
@@ -136,16 +137,34 @@ function calculateMovingAverageFeatures(baseFeatures) {
     averageResponseTime,
     successRate,
     timeSinceLastReview,
-    totalReviews
+    totalReviews,
+    historyReviews = 0,
+    emaRecall,
+    emaResponseTime,
+    emaDifficulty,
+    emaInterval,
+    historySpan
   } = baseFeatures;
 
-  // Simplified moving averages (no history in clean data)
+  if (historyReviews <= 0) {
+    return {
+      maDifficulty: difficultyRating,
+      maResponseTime: averageResponseTime / 1000, // Convert to seconds
+      maSuccessRate: successRate,
+      maInterval: timeSinceLastReview,
+      reviewFrequency: totalReviews / Math.max(timeSinceLastReview, 1)
+    };
+  }
+
+  const clip01 = value => Math.min(Math.max(value, 0), 1);
   return {
-    maDifficulty: difficultyRating,
-    maResponseTime: averageResponseTime / 1000, // Convert to seconds
-    maSuccessRate: successRate,
-    maInterval: timeSinceLastReview,
-    reviewFrequency: totalReviews / Math.max(timeSinceLastReview, 1)
+    maDifficulty: clip01(emaDifficulty),
+    maResponseTime: Math.max(emaResponseTime / 1000, 0.1), // Convert to seconds
+    maSuccessRate: clip01(emaRecall),
+    maInterval: historyReviews > 1 ? Math.max(emaInterval, 0) : timeSinceLastReview,
+    reviewFrequency: historyReviews > 1
+      ? historyReviews / Math.max(historySpan, 1)
+      : totalReviews / Math.max(timeSinceLastReview, 1)
   };
 }
 
@@ -158,12 +177,17 @@ function calculateMomentumFeatures(baseFeatures) {
     memoryStrength,
     successRate,
     consecutiveCorrect,
-    totalReviews
+    totalReviews,
+    historyReviews = 0,
+    recentSuccessRate,
+    recentDifficultySlope
   } = baseFeatures;
 
   const learningVelocity = consecutiveCorrect / Math.max(totalReviews, 1);
-  const difficultyTrend = 0; // Would calculate from history
-  const performanceAcceleration = successRate - 0.5; // Baseline at 0.5
+  // Difficulty change per review over the last few reviews
+  const difficultyTrend = historyReviews > 1 ? recentDifficultySlope : 0;
+  // Recent success rate against the overall one (baseline 0.5 without history)
+  const performanceAcceleration = historyReviews > 0 ? recentSuccessRate - successRate : successRate - 0.5;
   const masteryMomentum = learningVelocity * memoryStrength;
 
   return {
@@ -205,7 +229,8 @@ function calculateRetentionFeatures(baseFeatures, forgettingCurveFeatures) {
 /**
  * Master function to create all advanced features
  * MUST MATCH Python training script exactly!
- * Expands 8 base features to 51 total features
+ * Expands 8 base features (plus the optional history inputs from
+ * ml/card-history.js) to 51 total features
  */
 function createAdvancedFeatureVector(baseFeatures, reviewHistory = null, currentIndex = null) {
   // 1. Forgetting curve features (5 features)
@@ -224,7 +249,7 @@ function createAdvancedFeatureVector(baseFeatures, reviewHistory = null, current
   // 4. Cyclical time encoding (5 features)
   const timeFeatures = encodeCyclicalTime(baseFeatures.timeOfDay);
 
-  // 5. Moving average features (5 features) - simplified, no history needed
+  // 5. Moving average features (5 features) - from the history inputs, if any
   const movingAvgFeatures = calculateMovingAverageFeatures(baseFeatures);
 
   // 6. Momentum features (4 features)
@@ -0,0 +1,154 @@
+'use strict';
+
+/**
+ * Per-card review history state for the history-aware features
+ *
+ * Node side of scripts/card_history.py. question.historyState is folded
+ * forward once per review (O(1): counts, exponential moving averages and
+ * ring buffers of the last few reviews), and historyInputs() turns it into
+ * the raw inputs the moving average and momentum features read, so a
+ * prediction never rescans reviewHistory.
+ * MUST MATCH Python training script exactly!
+ */
+
+const featureSpec = require('./feature-spec.json');
+
+const HISTORY_INPUTS = featureSpec.historyInputs;
+const HISTORY_ALPHA = featureSpec.history.alpha;
+const HISTORY_WINDOW = featureSpec.history.window;
+const HISTORY_SPEC_VERSION = featureSpec.history.specVersion;
+const MS_PER_DAY = 24 * 60 * 60 * 1000;
+
+/**
+ * Empty state (a card without reviews)
+ */
+function createHistoryState() {
+  return {
+    count: 0,
+    correct: 0,
+    firstTimestamp: 0,
+    lastTimestamp: 0,
+    emaRecall: 0,
+    emaResponseTime: 0,
+    emaDifficulty: 0,
+    emaInterval: 0,
+    recentRecalled: new Array(HISTORY_WINDOW).fill(0),
+    recentDifficulty: new Array(HISTORY_WINDOW).fill(0)
+  };
+}
+
+function ema(average, value) {
+  return average + HISTORY_ALPHA * (value - average);
+}
+
+/**
+ * Fold one review into a state
+ * Returns a new state object, so a Mongoose subdocument is replaced rather
+ * than mutated in place
+ */
+function updateHistoryState(state, recalled, responseTime, timestamp) {
+  const previous = state && state.count ? state : createHistoryState();
+  const ms = timestamp instanceof Date ? timestamp.getTime() : timestamp;
+  const outcome = recalled ? 1 : 0;
+  const time = responseTime || 0;
+
+  const count = previous.count + 1;
+  const correct = previous.correct + outcome;
+  const difficulty = 1 - correct / count;
+  const next = {
+    count,
+    correct,
+    firstTimestamp: previous.firstTimestamp,
+    lastTimestamp: ms,
+    emaRecall: ema(previous.emaRecall, outcome),
+    emaResponseTime: ema(previous.emaResponseTime, time),
+    emaDifficulty: ema(previous.emaDifficulty, difficulty),
+    emaInterval: previous.emaInterval,
+    recentRecalled: Array.from(previous.recentRecalled),
+    recentDifficulty: Array.from(previous.recentDifficulty)
+  };
+
+  if (count === 1) {
+    next.firstTimestamp = ms;
+    next.emaRecall = outcome;
+    next.emaResponseTime = time;
+    next.emaDifficulty = difficulty;
+  } else {
+    const gap = (ms - previous.lastTimestamp) / MS_PER_DAY;
+    next.emaInterval = count === 2 ? gap : ema(previous.emaInterval, gap);
+  }
+
+  const slot = (count - 1) % HISTORY_WINDOW;
+  next.recentRecalled[slot] = outcome;
+  next.recentDifficulty[slot] = difficulty;
+  return next;
+}
+
+/**
+ * State of a card from its stored reviews (one pass; for cards saved
+ * before historyState existed)
+ */
+function historyStateFromReviews(reviewHistory) {
+  return (reviewHistory || []).reduce(
+    (state, review) => updateHistoryState(state, review.recalled, review.responseTime, new Date(review.timestamp)),
+    createHistoryState()
+  );
+}
+
+/**
+ * Raw history inputs of a state (all 0 for a card without reviews)
+ */
+function historyInputs(state) {
+  const inputs = {};
+  if (!state || !state.count) {
+    HISTORY_INPUTS.forEach(name => { inputs[name] = 0; });
+    return inputs;
+  }
+
+  const { count } = state;
+  const window = Math.min(count, HISTORY_WINDOW);
+  let recentDifficultySlope = 0;
+  if (window > 1) {
+    const newest = state.recentDifficulty[(count - 1) % HISTORY_WINDOW];
+    const oldest = state.recentDifficulty[(count - window) % HISTORY_WINDOW];
+    recentDifficultySlope = (newest - oldest) / (window - 1);
+  }
+
+  return {
+    historyReviews: count,
+    emaRecall: state.emaRecall,
+    emaResponseTime: state.emaResponseTime,
+    emaDifficulty: state.emaDifficulty,
+    emaInterval: state.emaInterval,
+    historySpan: (state.lastTimestamp - state.firstTimestamp) / MS_PER_DAY,
+    recentSuccessRate: Array.from(state.recentRecalled).reduce((sum, value) => sum + value, 0) / window,
+    recentDifficultySlope
+  };
+}
+
+/**
+ * Whether a model trained on the given feature spec version reads history
+ * inputs (models from before it were trained without them)
+ */
+function usesHistoryInputs(featureSpecVersion) {
+  if (!featureSpecVersion) {
+    return false;
+  }
+  const parts = version => version.split('.').map(Number);
+  const [have, need] = [parts(featureSpecVersion), parts(HISTORY_SPEC_VERSION)];
+  for (let i = 0; i < need.length; i++) {
+    if ((have[i] || 0) !== need[i]) {
+      return (have[i] || 0) > need[i];
+    }
+  }
+  return true;
+}
+
+module.exports = {
+  HISTORY_INPUTS,
+  createHistoryState,
+  updateHistoryState,
+  historyStateFromReviews,
+  historyInputs,
+  usesHistoryInputs
+};
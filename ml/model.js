@@ -33,11 +33,13 @@ const {
   getFeatureArray,
   getFeatureNames
 } = require('./advanced-features');
+const { HISTORY_INPUTS, usesHistoryInputs } = require('./card-history');
 
 class IntervalPredictionModel {
   constructor() {
     this.model = null;
     this.isLoaded = false;
+    this.usesHistory = false; // Set from metadata.json featureSpecVersion on load
 
     // Feature normalization parameters (will be calculated from training data)
     this.featureStats = {
@@ -239,6 +241,13 @@ class IntervalPredictionModel {
       timeOfDay: questionFeatures.timeOfDay
     };
 
+    // History inputs only for models trained with them (feature spec 1.1.0+)
+    if (this.usesHistory) {
+      HISTORY_INPUTS.forEach(name => {
+        baseFeatures[name] = questionFeatures[name] || 0;
+      });
+    }
+
     // Generate advanced features
     const advancedFeatures = createAdvancedFeatureVector(baseFeatures, reviewHistory);
     const featureArray = getFeatureArray(advancedFeatures);
@@ -337,6 +346,14 @@ class IntervalPredictionModel {
     const clampedStd = stats.std.map(s => Math.max(Math.abs(s), MIN_STD));
     this.featureStats.std = tf.tensor1d(clampedStd);
 
+    // '<modelVersion>@<trainedDate>', as scripts/prediction_cache.py tags it
+    const metadataPath = path.join(loadPath, 'metadata.json');
+    if (fs.existsSync(metadataPath)) {
+      const metadata = JSON.parse(fs.readFileSync(metadataPath, 'utf8'));
+      this.version = `${metadata.modelVersion || 'unknown'}@${metadata.trainedDate || ''}`;
+      this.usesHistory = usesHistoryInputs(metadata.featureSpecVersion);
+    }
+
     this.isLoaded = true;
     console.log(`✓ Model loaded from ${loadPath}`);
   }
@@ -460,6 +477,13 @@ class IntervalPredictionModel {
       timeOfDay: questionFeatures.timeOfDay
     };
 
+    // History inputs only for models trained with them (feature spec 1.1.0+)
+    if (this.usesHistory) {
+      HISTORY_INPUTS.forEach(name => {
+        baseFeatures[name] = questionFeatures[name] || 0;
+      });
+    }
+
     // Generate advanced features
     const advancedFeatures = createAdvancedFeatureVector(baseFeatures, reviewHistory);
     const featureArray = getFeatureArray(advancedFeatures);
@@ -117,6 +117,30 @@ const questionSchema = new Schema({
   predictedRetention: {
     type: Number, // 0-1 probability
     default: null
+  },
+
+  // Rolling review-history state (ml/card-history.js), folded forward once
+  // per review so history-aware features never rescan reviewHistory
+  historyState: {
+    count: { type: Number, default: 0 },
+    correct: { type: Number, default: 0 },
+    firstTimestamp: { type: Number, default: 0 }, // ms since epoch
+    lastTimestamp: { type: Number, default: 0 },
+    emaRecall: { type: Number, default: 0 },
+    emaResponseTime: { type: Number, default: 0 }, // milliseconds
+    emaDifficulty: { type: Number, default: 0 },
+    emaInterval: { type: Number, default: 0 }, // days
+    recentRecalled: [Number],
+    recentDifficulty: [Number]
+  },
+
+  // Nightly batch score (scripts/score-all-cards.py), used instead of
+  // running the model while the card has not been reviewed since scoredAt
+  mlPrecomputed: {
+    interval: { type: Number, default: null },
+    dueDate: { type: Date, default: null },
+    scoredAt: { type: Date, default: null },
+    modelVersion: { type: String, default: null }
   }
 }, { _id: false });
 
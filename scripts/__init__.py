@@ -0,0 +1,6 @@
+"""
+Python helpers for the ML training and simulation scripts
+
+Hyphenated files in this directory are runnable entry points; the
+snake_case modules are shared and importable as ``scripts.<module>``.
+"""
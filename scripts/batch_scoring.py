@@ -0,0 +1,279 @@
+"""
+Nightly batch scoring: precompute the ML interval of every card
+
+Streams every user (in _id order) through an aggregation that reduces each
+question to the inputs of createFeatureVector() in utils/question-helpers.js
+(review count, correct count and response-time sum are summed server-side,
+so review histories never cross the wire; history inputs come from the
+stored historyState, for models that read them). Features for a chunk of users are
+built in one matrix, scored in large batches, and written back as one
+targeted $set per user:
+
+    questions.<i>.mlPrecomputed = {interval, dueDate, scoredAt, modelVersion}
+
+The update's filter pins every questions.<i> to the question it was scored
+for (its _id, or its text for questions without one), so a user whose
+questions array changed during the run is left alone (counted as stale)
+rather than written to the wrong cards; the next run scores them.
+
+dueDate is lastReviewed + interval (scoredAt + interval for unreviewed
+cards). The request path (algorithms/algorithm-manager.js) uses the stored
+interval instead of running the model while the card has not been reviewed
+since scoredAt and modelVersion matches the loaded model.
+
+Progress is checkpointed to a JSON file after every bulk write: the last
+user _id written, the run's reference time (asOf) and the model version. An
+interrupted run resumes after that _id with the same asOf; a finished one
+(or a different model) starts over.
+
+Usage:
+    from scripts.batch_scoring import score_all_cards
+
+    totals = score_all_cards(db['users'], checkpoint_path='ml/batch-scoring-checkpoint.json')
+    totals = score_all_cards(mongomock_collection, checkpoint_path, max_users=1000)  # then resume
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from scripts.card_history import CardHistory, model_uses_history
+from scripts.feature_engine import build_feature_matrix
+from scripts.feature_spec import BASE_FEATURES, HISTORY_INPUTS
+from scripts.instrumentation import RunReport
+from scripts.ml_simulation import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CURSOR_BATCH, iter_user_chunks, load_model_and_stats, predict_intervals
+)
+from scripts.prediction_cache import model_version
+
+FORMAT_VERSION = 1
+DEFAULT_CHECKPOINT_PATH = 'ml/batch-scoring-checkpoint.json'
+DEFAULT_CHUNK_USERS = 1000
+MS_PER_DAY = 24 * 60 * 60 * 1000
+PRECOMPUTED_FIELD = 'mlPrecomputed'
+
+
+def card_inputs_pipeline(after=None):
+    """
+    Aggregation over users in _id order (after the given _id): per question,
+    the fields createFeatureVector() reads plus review/correct counts and
+    the response-time sum of its history, and its historyState
+    """
+    history = {'$ifNull': ['$$question.reviewHistory', []]}
+    pipeline = [] if after is None else [{'$match': {'_id': {'$gt': after}}}]
+    pipeline += [
+        {'$sort': {'_id': 1}},
+        {'$project': {'questions': {'$map': {
+            'input': {'$ifNull': ['$questions', []]}, 'as': 'question', 'in': {
+                '_id': '$$question._id',
+                'question': '$$question.question',
+                'memoryStrength': '$$question.memoryStrength',
+                'difficultyRating': '$$question.difficultyRating',
+                'consecutiveCorrect': '$$question.consecutiveCorrect',
+                'lastReviewed': '$$question.lastReviewed',
+                'reviews': {'$size': history},
+                'correct': {'$size': {'$filter': {'input': history, 'as': 'review', 'cond': '$$review.recalled'}}},
+                'responseTime': {'$sum': '$$question.reviewHistory.responseTime'},
+                'historyState': '$$question.historyState'
+            }
+        }}}}
+    ]
+    return pipeline
+
+
+def local_hour(as_of):
+    """Local hour of a naive UTC datetime, as Date.getHours() gives it on the Node side"""
+    return as_of.replace(tzinfo=timezone.utc).astimezone().hour
+
+
+def utc_ms(value):
+    """Milliseconds since epoch of a datetime from pymongo (naive means UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp() * 1000
+
+
+def card_base_features(cards, as_of):
+    """
+    (n, 8) base-feature matrix for projected questions, as createFeatureVector()
+    would build it at time as_of (a naive UTC datetime; timeOfDay uses the
+    local hour, like the server)
+    """
+    base = np.zeros((len(cards), len(BASE_FEATURES)), dtype=np.float32)
+    now_ms = utc_ms(as_of)
+
+    for row, card in enumerate(cards):
+        reviews = card.get('reviews') or 0
+        last_reviewed = card.get('lastReviewed')
+        since_last = (now_ms - utc_ms(last_reviewed)) / MS_PER_DAY if reviews and last_reviewed else 0
+        base[row] = [
+            card.get('memoryStrength') or 1,
+            card.get('difficultyRating') or 0.5,
+            since_last,
+            card.get('correct', 0) / reviews if reviews else 0,
+            (card.get('responseTime') or 0) / reviews if reviews else 0,
+            reviews,
+            card.get('consecutiveCorrect') or 0,
+            local_hour(as_of) / 24
+        ]
+    return base
+
+
+def card_history_inputs(cards):
+    """
+    dict of history input columns from projected questions' historyState
+    (all 0 for questions saved without one; createFeatureVector() rebuilds
+    those from reviewHistory, which is not projected here)
+    """
+    inputs = [CardHistory.from_dict(card.get('historyState')).inputs() for card in cards]
+    return {name: np.array([row[name] for row in inputs]) for name in HISTORY_INPUTS}
+
+
+def question_filter(user, questions):
+    """Update filter matching the user only while each questions.<i> is still the question scored"""
+    match = {'_id': user['_id']}
+    for index, question in enumerate(questions):
+        if question.get('_id') is not None:
+            match[f'questions.{index}._id'] = question['_id']
+        else:
+            match[f'questions.{index}.question'] = question.get('question')
+    return match
+
+
+def precomputed_updates(users, intervals, as_of, version):
+    """One UpdateOne per user with a $set of every question's mlPrecomputed"""
+    updates = []
+    offset = 0
+    for user in users:
+        questions = user.get('questions') or []
+        fields = {}
+        for index, (question, interval) in enumerate(zip(questions, intervals[offset:offset + len(questions)])):
+            reviewed = question.get('lastReviewed') if question.get('reviews') else None
+            fields[f'questions.{index}.{PRECOMPUTED_FIELD}'] = {
+                'interval': int(interval),
+                'dueDate': (reviewed or as_of) + timedelta(days=int(interval)),
+                'scoredAt': as_of,
+                'modelVersion': version
+            }
+        offset += len(questions)
+        if fields:
+            updates.append(UpdateOne(question_filter(user, questions), {'$set': fields}))
+    return updates
+
+
+def load_checkpoint(path):
+    """The checkpoint dict, or None if there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    return checkpoint if checkpoint.get('formatVersion') == FORMAT_VERSION else None
+
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    checkpoint['updatedDate'] = datetime.now().isoformat()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def user_id_value(value):
+    """A checkpointed user _id back as the type MongoDB stores"""
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+
+def score_all_cards(users_collection, checkpoint_path=DEFAULT_CHECKPOINT_PATH, model_path='ml/saved-model',
+                    runtime='numpy', batch_size=DEFAULT_BATCH_SIZE, chunk_users=DEFAULT_CHUNK_USERS,
+                    cursor_batch=DEFAULT_CURSOR_BATCH, max_users=None, restart=False, report=None):
+    """
+    Score every card and write its mlPrecomputed interval, resuming from the checkpoint
+
+    users_collection can be a pymongo or mongomock collection. max_users
+    stops after that many users in this run (the checkpoint stays open for
+    the next one); restart=True ignores an open checkpoint. report, a
+    scripts.instrumentation.RunReport, gets db_read, featurize, predict and
+    db_write stages.
+
+    Returns the checkpoint dict: users, cards, writes and stale (updates
+    skipped because the user's questions changed since they were read) so
+    far, asOf, modelVersion, lastUserId, complete and resumed.
+    """
+    report = report or RunReport('batch_scoring')
+    with report.stage('load_model'):
+        model, mean, std = load_model_and_stats(model_path, runtime, verbose=False)
+    version = model_version(model_path)
+    history = model_uses_history(model_path)
+
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    resumed = bool(checkpoint and not checkpoint['complete'] and checkpoint['modelVersion'] == version)
+    if not resumed:
+        checkpoint = {
+            'formatVersion': FORMAT_VERSION,
+            'modelVersion': version,
+            'asOf': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+            'startedDate': datetime.now().isoformat(),
+            'lastUserId': None,
+            'users': 0,
+            'cards': 0,
+            'writes': 0,
+            'stale': 0,
+            'complete': False
+        }
+    as_of = datetime.fromisoformat(checkpoint['asOf'])
+    after = None if checkpoint['lastUserId'] is None else user_id_value(checkpoint['lastUserId'])
+
+    scored_users = 0
+    complete = True
+    chunks = ()
+    if max_users is not None and max_users <= 0:
+        complete = False  # No budget: leave the checkpoint open without reading
+    else:
+        cursor = users_collection.aggregate(card_inputs_pipeline(after), batchSize=cursor_batch)
+        chunks = report.iter_stage('db_read', iter_user_chunks(cursor, chunk_users))
+
+    for users in chunks:
+        if max_users is not None:
+            users = users[:max_users - scored_users]
+        if not users:
+            continue
+
+        with report.stage('featurize'):
+            cards = [question for user in users for question in user.get('questions') or []]
+            features = None
+            if cards:
+                columns = dict(zip(BASE_FEATURES, card_base_features(cards, as_of).T))
+                if history:
+                    columns.update(card_history_inputs(cards))
+                features = build_feature_matrix(columns)
+
+        with report.stage('predict'):
+            intervals = predict_intervals(model, mean, std, features, batch_size) if cards else []
+
+        updates = precomputed_updates(users, intervals, as_of, version)
+        stale = 0
+        if updates:
+            with report.stage('db_write'):
+                stale = len(updates) - users_collection.bulk_write(updates, ordered=False).matched_count
+
+        scored_users += len(users)
+        checkpoint['users'] += len(users)
+        checkpoint['cards'] += len(cards)
+        checkpoint['writes'] += len(updates) - stale
+        checkpoint['stale'] = checkpoint.get('stale', 0) + stale
+        checkpoint['lastUserId'] = str(users[-1]['_id'])
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        if max_users is not None and scored_users >= max_users:
+            complete = False
+            break
+
+    checkpoint['complete'] = complete
+    save_checkpoint(checkpoint_path, checkpoint)
+    return {**checkpoint, 'resumed': resumed}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite for the Python ML pipeline
+
+Times feature generation, JSON and columnar loading, normalization,
+training steps/sec, single-row and batched inference and simulator
+throughput on generated data, then writes a JSON report. With --baseline,
+compares against an earlier report and exits 1 if any benchmark got more
+than --threshold slower. See scripts/pipeline_benchmarks.py.
+
+Usage:
+    python scripts/benchmark-python-pipeline.py
+    python scripts/benchmark-python-pipeline.py --scales=1k,100k,10m
+    python scripts/benchmark-python-pipeline.py --benchmarks=features,batch_inference --repeat=5
+    python scripts/benchmark-python-pipeline.py --baseline=ml/benchmarks/python-<commit>.json --threshold=0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pipeline_benchmarks import (
+    BENCHMARKS, DEFAULT_OUTPUT_DIR, DEFAULT_REPEAT, DEFAULT_SCALES, DEFAULT_THRESHOLD, SCALES,
+    compare_results, regressions, run_benchmarks
+)
+
+
+def comma_list(choices):
+    def parse(text):
+        values = [value.strip() for value in text.split(',') if value.strip()]
+        unknown = [value for value in values if value not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown {unknown}, expected some of {list(choices)}")
+        return values
+    return parse
+
+
+def print_result(result):
+    label = f"{result['benchmark']}@{result['scale']}"
+    if 'skipped' in result:
+        print(f"  {label:<28} skipped: {result['skipped']}")
+        return
+    print(f"  {label:<28} {result['rows']:>10,} rows {result['seconds'] * 1000:>12.3f} ms "
+          f"{result['rowsPerSecond']:>14,.0f} rows/s")
+
+
+def default_output_path(report):
+    name = (report['commit'] or 'local')[:12] + ('-dirty' if report['dirty'] else '')
+    return os.path.join(DEFAULT_OUTPUT_DIR, f'python-{name}.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Python ML pipeline')
+    parser.add_argument('--scales', type=comma_list(SCALES), default=list(DEFAULT_SCALES),
+                        help=f"Comma-separated scales from {list(SCALES)}")
+    parser.add_argument('--benchmarks', type=comma_list(BENCHMARKS), default=list(BENCHMARKS),
+                        help='Comma-separated benchmarks (default: all)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Runs per measurement (best is kept)')
+    parser.add_argument('--model', default='ml/saved-model', help='Model for the inference benchmarks')
+    parser.add_argument('--output', help=f'Report path (default: {DEFAULT_OUTPUT_DIR}/python-<commit>.json)')
+    parser.add_argument('--baseline', help='Earlier report to check for regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown vs the baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("Python ML Pipeline Benchmarks")
+    print("="*70)
+    print(f"Scales: {', '.join(args.scales)}   Repeat: {args.repeat}\n")
+
+    report = run_benchmarks(args.scales, args.benchmarks, args.repeat, args.model, on_result=print_result)
+
+    output = args.output or default_output_path(report)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report written to {output}")
+
+    if not args.baseline:
+        print("="*70 + "\n")
+        return
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+
+    comparisons = compare_results(report, baseline)
+    slower = regressions(comparisons, args.threshold)
+
+    print(f"\nvs {args.baseline} (commit {str(baseline.get('commit'))[:12]}):")
+    for key, before, after, change in comparisons:
+        flag = '  ❌ REGRESSION' if change > args.threshold else ''
+        print(f"  {key:<28} {before * 1000:>12.3f} ms -> {after * 1000:>12.3f} ms {change:>+8.1%}{flag}")
+    print("="*70 + "\n")
+
+    if slower:
+        print(f"❌ {len(slower)} benchmark(s) more than {args.threshold:.0%} slower than the baseline")
+        sys.exit(1)
+    print(f"✓ No benchmark more than {args.threshold:.0%} slower than the baseline")
+
+
+if __name__ == '__main__':
+    main()
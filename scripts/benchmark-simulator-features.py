@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-review feature building in the ML simulator
+
+Compares the old approach (review_history.index() plus a rescan of every
+earlier review) with the single-pass running aggregates in
+scripts/review_features.py, on synthetic histories of growing length.
+The old cost grows quadratically per card, the new one linearly.
+
+Usage:
+    python scripts/benchmark-simulator-features.py
+    python scripts/benchmark-simulator-features.py --lengths=100,1000,5000 --repeat=3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.review_features import iter_baseline_review_features
+
+
+def make_history(length, seed=42):
+    """Synthetic review history with every review still on the baseline algorithm"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+
+    return [{
+        'timestamp': start + timedelta(hours=12 * i + rng.randint(0, 11)),
+        'recalled': rng.random() < 0.75,
+        'responseTime': rng.randint(800, 8000),
+        'intervalUsed': rng.randint(1, 30),
+        'algorithmUsed': 'baseline',
+        'baselineInterval': 1
+    } for i in range(length)]
+
+
+def legacy_review_features(review_history, limit):
+    """The simulator's previous per-review logic: index() lookup plus prefix rescan"""
+    baseline_reviews = [r for r in review_history if r.get('algorithmUsed') == 'baseline']
+    rows = []
+
+    for review in baseline_reviews[:limit]:
+        reviews_before = review_history[:review_history.index(review)]
+
+        correct_count = sum(1 for r in reviews_before if r.get('recalled', False))
+        success_rate = correct_count / len(reviews_before) if reviews_before else 0
+
+        rows.append((success_rate, len(reviews_before)))
+
+    return rows
+
+
+def single_pass_review_features(review_history, limit):
+    return [
+        (features['successRate'], features['totalReviews'])
+        for _, _, features in iter_baseline_review_features(review_history, limit)
+    ]
+
+
+def time_call(fn, history, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(history, len(history))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark simulator feature building')
+    parser.add_argument('--lengths', default='50,100,200,400,800,1600,3200',
+                        help='Comma-separated history lengths')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    args = parser.parse_args()
+
+    lengths = [int(value) for value in args.lengths.split(',')]
+
+    print("\n" + "="*64)
+    print("Simulator Feature Building: legacy vs single pass")
+    print("="*64)
+    print(f"{'reviews':>8} {'legacy (ms)':>14} {'single pass (ms)':>18} {'speedup':>10}")
+
+    for length in lengths:
+        history = make_history(length)
+
+        legacy = time_call(legacy_review_features, history, args.repeat)
+        single = time_call(single_pass_review_features, history, args.repeat)
+
+        print(f"{length:>8} {legacy * 1000:>14.2f} {single * 1000:>18.2f} {legacy / single:>9.1f}x")
+
+    print("="*64 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+O(1) per-card review-history state behind the history-aware features
+
+maDifficulty, maResponseTime, maSuccessRate, maInterval, reviewFrequency,
+difficultyTrend and performanceAcceleration describe a card's recent
+reviews. Rescanning reviewHistory for every prediction costs O(history), so
+each card keeps a small rolling state instead, updated once per review:
+
+    count, correct      reviews and correct answers
+    first, last         first and last review timestamps (ms)
+    ema*                exponential moving averages (HISTORY_ALPHA) of recalled,
+                        response time (ms), difficulty (1 - success rate after
+                        the review) and the days since the previous review
+    recentRecalled      ring buffers of the last HISTORY_WINDOW outcomes
+    recentDifficulty    and difficulties
+
+and reduces it to the raw HISTORY_INPUTS the feature spec reads. The state
+comes in two shapes with the same update:
+
+    CardHistory         one card, for single-card scoring; to_dict() matches
+                        question.historyState in models/user.js, which
+                        ml/card-history.js updates on the request path
+    CardHistoryArrays   one row per card, updated for many cards per step, for
+                        vectorized featurization (history_columns() over a
+                        training set, the ML schedule replay)
+
+Models trained before feature spec 1.1.0 never saw history inputs;
+uses_history() / model_uses_history() tell the scoring paths whether to
+pass them.
+
+Usage:
+    from scripts.card_history import CardHistory, history_columns
+
+    history = CardHistory()
+    for review in question['reviewHistory']:
+        history.update_review(review)
+    inputs = history.inputs()
+
+    columns = history_columns(data.base, data.user, data.question)
+"""
+
+import json
+import os
+
+import numpy as np
+
+from scripts.feature_spec import BASE_FEATURES, HISTORY_INPUTS
+from scripts.training_store import review_ms
+
+HISTORY_ALPHA = 0.3  # EMA weight of the newest review
+HISTORY_WINDOW = 5   # Reviews in the recent success rate / difficulty slope window
+HISTORY_SPEC_VERSION = '1.1.0'  # First feature spec with history inputs
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+# Columns of CardHistoryArrays.ema
+EMA_FIELDS = ('emaRecall', 'emaResponseTime', 'emaDifficulty', 'emaInterval')
+
+
+def _ema(average, value):
+    return average + HISTORY_ALPHA * (value - average)
+
+
+class CardHistory:
+    """Rolling review-history state of one card, updated in O(1) per review"""
+
+    __slots__ = ('count', 'correct', 'first', 'last', 'ema_recall', 'ema_response_time',
+                 'ema_difficulty', 'ema_interval', 'recent_recalled', 'recent_difficulty')
+
+    # historyState field -> attribute
+    FIELDS = {
+        'count': 'count',
+        'correct': 'correct',
+        'firstTimestamp': 'first',
+        'lastTimestamp': 'last',
+        'emaRecall': 'ema_recall',
+        'emaResponseTime': 'ema_response_time',
+        'emaDifficulty': 'ema_difficulty',
+        'emaInterval': 'ema_interval',
+        'recentRecalled': 'recent_recalled',
+        'recentDifficulty': 'recent_difficulty'
+    }
+
+    def __init__(self):
+        self.count = 0
+        self.correct = 0
+        self.first = 0.0
+        self.last = 0.0
+        self.ema_recall = 0.0
+        self.ema_response_time = 0.0
+        self.ema_difficulty = 0.0
+        self.ema_interval = 0.0
+        self.recent_recalled = [0.0] * HISTORY_WINDOW
+        self.recent_difficulty = [0.0] * HISTORY_WINDOW
+
+    @classmethod
+    def from_dict(cls, state):
+        """CardHistory from a historyState document (None or {} is an empty state)"""
+        history = cls()
+        for field, attribute in cls.FIELDS.items():
+            if state and state.get(field) is not None:
+                value = state[field]
+                setattr(history, attribute, list(value) if isinstance(value, list) else value)
+        return history
+
+    def to_dict(self):
+        return {field: getattr(self, attribute) for field, attribute in self.FIELDS.items()}
+
+    def update(self, recalled, response_time, ms):
+        """Fold one review (recalled, response time in ms, timestamp in ms)"""
+        recalled = float(recalled)
+        response_time = response_time or 0
+
+        self.count += 1
+        self.correct += recalled
+        difficulty = 1 - self.correct / self.count
+
+        if self.count == 1:
+            self.first = ms
+            self.ema_recall = recalled
+            self.ema_response_time = response_time
+            self.ema_difficulty = difficulty
+        else:
+            gap = (ms - self.last) / MS_PER_DAY
+            self.ema_interval = gap if self.count == 2 else _ema(self.ema_interval, gap)
+            self.ema_recall = _ema(self.ema_recall, recalled)
+            self.ema_response_time = _ema(self.ema_response_time, response_time)
+            self.ema_difficulty = _ema(self.ema_difficulty, difficulty)
+
+        self.last = ms
+        slot = (self.count - 1) % HISTORY_WINDOW
+        self.recent_recalled[slot] = recalled
+        self.recent_difficulty[slot] = difficulty
+
+    def update_review(self, review):
+        """Fold one reviewHistory entry"""
+        self.update(bool(review.get('recalled', False)), review.get('responseTime', 0),
+                    review_ms(review.get('timestamp')))
+
+    def inputs(self):
+        """dict of HISTORY_INPUTS (all 0 for a card without reviews)"""
+        if not self.count:
+            return dict.fromkeys(HISTORY_INPUTS, 0.0)
+
+        window = min(self.count, HISTORY_WINDOW)
+        slope = 0.0
+        if window > 1:
+            newest = self.recent_difficulty[(self.count - 1) % HISTORY_WINDOW]
+            oldest = self.recent_difficulty[(self.count - window) % HISTORY_WINDOW]
+            slope = (newest - oldest) / (window - 1)
+
+        return {
+            'historyReviews': float(self.count),
+            'emaRecall': float(self.ema_recall),
+            'emaResponseTime': float(self.ema_response_time),
+            'emaDifficulty': float(self.ema_difficulty),
+            'emaInterval': float(self.ema_interval),
+            'historySpan': (self.last - self.first) / MS_PER_DAY,
+            'recentSuccessRate': sum(self.recent_recalled) / window,
+            'recentDifficultySlope': slope
+        }
+
+
+class CardHistoryArrays:
+    """CardHistory for n cards as arrays; update() folds one review into each of a set of cards"""
+
+    def __init__(self, n):
+        self.count = np.zeros(n)
+        self.correct = np.zeros(n)
+        self.first = np.zeros(n)
+        self.last = np.zeros(n)
+        self.ema = np.zeros((n, len(EMA_FIELDS)))
+        self.recent_recalled = np.zeros((n, HISTORY_WINDOW))
+        self.recent_difficulty = np.zeros((n, HISTORY_WINDOW))
+
+    def update(self, cards, recalled, response_time, ms):
+        """Fold one review into each card in cards (distinct indices); values are per card"""
+        recalled = np.asarray(recalled, dtype=np.float64)
+        ms = np.asarray(ms, dtype=np.float64)
+        count = self.count[cards] + 1
+        correct = self.correct[cards] + recalled
+        difficulty = 1 - correct / count
+        first_review = count == 1
+
+        values = np.column_stack([recalled, np.asarray(response_time, dtype=np.float64), difficulty,
+                                  np.where(first_review, 0, (ms - self.last[cards]) / MS_PER_DAY)])
+        restart = np.column_stack([first_review, first_review, first_review, count <= 2])
+        ema = self.ema[cards]
+        self.ema[cards] = np.where(restart, values, ema + HISTORY_ALPHA * (values - ema))
+
+        self.first[cards] = np.where(first_review, ms, self.first[cards])
+        self.last[cards] = ms
+        self.count[cards] = count
+        self.correct[cards] = correct
+
+        slot = ((count - 1) % HISTORY_WINDOW).astype(np.intp)
+        self.recent_recalled[cards, slot] = recalled
+        self.recent_difficulty[cards, slot] = difficulty
+
+    def inputs(self, cards):
+        """dict of HISTORY_INPUTS columns for the given cards"""
+        count = self.count[cards]
+        window = np.minimum(count, HISTORY_WINDOW)
+        newest = self.recent_difficulty[cards, ((count - 1) % HISTORY_WINDOW).astype(np.intp)]
+        oldest = self.recent_difficulty[cards, ((count - window) % HISTORY_WINDOW).astype(np.intp)]
+
+        columns = {
+            'historyReviews': count,
+            'historySpan': (self.last[cards] - self.first[cards]) / MS_PER_DAY,
+            'recentSuccessRate': self.recent_recalled[cards].sum(axis=1) / np.maximum(window, 1),
+            'recentDifficultySlope': np.where(window > 1, (newest - oldest) / np.maximum(window - 1, 1), 0)
+        }
+        columns.update((name, self.ema[cards, i]) for i, name in enumerate(EMA_FIELDS))
+        return columns
+
+
+def history_columns(base, user, question):
+    """
+    HISTORY_INPUTS for every training sample, as CardHistory gives them after its review
+
+    Samples are grouped into cards by (user, question) and ordered by
+    totalReviews. Each sample's review is recovered from the change in the
+    cumulative base features since the card's previous sample (successRate x
+    totalReviews counts correct answers, averageResponseTime x totalReviews
+    sums response times, timeSinceLastReview is the gap), then folded into a
+    CardHistoryArrays one review index at a time across all cards. A card
+    whose first sample is not its first review starts from that sample's
+    cumulative values. Returns a dict of float64 columns in the input row order.
+    """
+    rows = len(base)
+    columns = {name: np.zeros(rows) for name in HISTORY_INPUTS}
+    if not rows:
+        return columns
+
+    index = {name: i for i, name in enumerate(BASE_FEATURES)}
+    total = np.asarray(base[:, index['totalReviews']], dtype=np.float64)
+    order = np.lexsort((total, np.asarray(question), np.asarray(user)))
+    total = total[order]
+    user, question = np.asarray(user)[order], np.asarray(question)[order]
+
+    start = np.ones(rows, dtype=bool)
+    start[1:] = (user[1:] != user[:-1]) | (question[1:] != question[:-1]) | (total[1:] <= total[:-1])
+    card = np.cumsum(start) - 1
+    first = np.flatnonzero(start)
+    position = np.arange(rows) - first[card]
+
+    def since_previous(values):
+        """Change since the card's previous sample (the value itself on its first)"""
+        return values - np.where(start, 0, np.roll(values, 1))
+
+    correct = np.rint(np.asarray(base[:, index['successRate']], dtype=np.float64)[order] * total)
+    response_sum = np.asarray(base[:, index['averageResponseTime']], dtype=np.float64)[order] * total
+    step = since_previous(total)
+    recalled = since_previous(correct) / step
+    response_time = since_previous(response_sum) / step
+
+    gap_ms = np.where(start, 0, np.asarray(base[:, index['timeSinceLastReview']], dtype=np.float64)[order]) * MS_PER_DAY
+    elapsed = np.cumsum(gap_ms)
+    elapsed -= elapsed[first][card]
+
+    states = CardHistoryArrays(len(first))
+    by_position = np.argsort(position, kind='stable')
+    bounds = np.searchsorted(position[by_position], np.arange(position.max() + 2))
+    for k in range(len(bounds) - 1):
+        at = by_position[bounds[k]:bounds[k + 1]]
+        states.update(card[at], recalled[at], response_time[at], elapsed[at])
+        for name, values in states.inputs(card[at]).items():
+            columns[name][order[at]] = values
+
+    return columns
+
+
+def uses_history(metadata):
+    """Whether a model was trained with history inputs, from its metadata.json (featureSpecVersion)"""
+    version = metadata.get('featureSpecVersion')
+
+    def parts(text):
+        return tuple(int(part) for part in text.split('.'))
+
+    return version is not None and parts(version) >= parts(HISTORY_SPEC_VERSION)
+
+
+def model_uses_history(model_path='ml/saved-model'):
+    """uses_history() of a model directory (False without metadata.json)"""
+    metadata_path = os.path.join(model_path, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        return False
+
+    with open(metadata_path, 'r') as f:
+        return uses_history(json.load(f))
@@ -12,8 +12,13 @@
  * Options:
  *   --simulate     Generate new simulated data
  *   --extract      Extract training data
+ *   --extract-incremental
+ *                  Append only reviews newer than the last extraction to the
+ *                  columnar store (python scripts/extract-training-data-incremental.py)
  *   --evaluate     Evaluate current model performance
  *   --report       Generate performance report
+ *   --retrain      Warm-start retrain the deployed model on the new reviews
+ *                  (python scripts/train-interval-model.py --incremental)
  */
 
 const fs = require('fs');
@@ -75,6 +80,55 @@ async function extractTrainingData() {
   }
 }
 
+/**
+ * Append samples for reviews newer than the store's watermark
+ *
+ * Cost scales with the new reviews; the first run extracts everything.
+ */
+async function extractIncremental(storePath = 'training-data-clean.columns') {
+  console.log('\n📦 Extracting new reviews...');
+
+  const python = process.env.PYTHON || 'python3';
+
+  try {
+    execSync(
+      `${python} scripts/extract-training-data-incremental.py ${storePath}`,
+      { stdio: 'inherit' }
+    );
+
+    console.log(`✓ New training samples appended to ${storePath}`);
+    return storePath;
+  } catch (error) {
+    console.error('❌ Failed to extract data:', error.message);
+    return null;
+  }
+}
+
+/**
+ * Fine-tune the deployed model on reviews newer than its training data
+ *
+ * Falls back to full training inside the trainer if test MAE regresses.
+ */
+async function retrainIncremental(dataPath) {
+  console.log('\n🧠 Retraining (warm start from ml/saved-model)...');
+
+  const python = process.env.PYTHON || 'python3';
+  const dataArg = dataPath ? ` ${dataPath}` : '';
+
+  try {
+    execSync(
+      `${python} scripts/train-interval-model.py${dataArg} --incremental`,
+      { stdio: 'inherit' }
+    );
+
+    console.log('✓ Model retrained');
+    return true;
+  } catch (error) {
+    console.error('❌ Failed to retrain:', error.message);
+    return false;
+  }
+}
+
 /**
  * Get current model metadata
  */
@@ -208,6 +262,7 @@ async function runPipeline(options = {}) {
   const {
     generateData = true,
     extract = true,
+    retrain = false,
     report = true
   } = options;
 
@@ -238,12 +293,19 @@ async function runPipeline(options = {}) {
         return;
       }
 
-      console.log('\n📤 Next steps:');
-      console.log(`  1. Upload ${filename} to Google Colab`);
-      console.log('  2. Run training notebook');
-      console.log('  3. Download trained model');
-      console.log('  4. Deploy to ml/saved-model/');
-      console.log('  5. Commit and push to production');
+      if (retrain) {
+        if (!await retrainIncremental(filename)) {
+          console.error('❌ Pipeline failed at retraining');
+          return;
+        }
+      } else {
+        console.log('\n📤 Next steps:');
+        console.log(`  1. Upload ${filename} to Google Colab`);
+        console.log('  2. Run training notebook');
+        console.log('  3. Download trained model');
+        console.log('  4. Deploy to ml/saved-model/');
+        console.log('  5. Commit and push to production');
+      }
     }
 
     // Step 3: Generate report
@@ -269,6 +331,8 @@ async function main() {
   const options = {
     generateData: args.includes('--simulate'),
     extract: args.includes('--extract'),
+    extractIncremental: args.includes('--extract-incremental'),
+    retrain: args.includes('--retrain'),
     report: args.includes('--report'),
     fullPipeline: args.length === 0 // Run full pipeline if no args
   };
@@ -286,8 +350,15 @@ async function main() {
       await generateNewData();
     }
 
-    if (options.extract) {
-      await extractTrainingData();
+    let filename = null;
+    if (options.extractIncremental) {
+      filename = await extractIncremental();
+    } else if (options.extract) {
+      filename = await extractTrainingData();
+    }
+
+    if (options.retrain) {
+      await retrainIncremental(filename);
     }
 
     if (options.report) {
@@ -305,6 +376,8 @@ if (require.main === module) {
 module.exports = {
   generateNewData,
   extractTrainingData,
+  extractIncremental,
+  retrainIncremental,
   generateReport,
   runPipeline
 };
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Convert a JSON training export to the columnar training store
+
+One-time conversion of the output of extract-training-data.js (for example
+training-data-clean.json) into memory-mapped float32 columns that the Python
+trainers load without parsing JSON. The export is streamed in chunks, so
+exports larger than memory convert fine. See scripts/training_store.py for
+the format.
+
+Usage:
+    python scripts/convert-training-data.py training-data-clean.json
+    python scripts/convert-training-data.py export.json --output=export.columns
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.json_stream import iter_sample_chunks
+from scripts.training_store import TrainingStoreWriter, load_store
+
+CHUNK_SIZE = 50000
+
+
+def default_output_path(input_path):
+    root, _ = os.path.splitext(input_path)
+    return root + '.columns'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert JSON training data to the columnar store')
+    parser.add_argument('input', help='JSON export from extract-training-data.js')
+    parser.add_argument('--output', help='Store directory (default: <input>.columns)')
+    args = parser.parse_args()
+
+    output = args.output or default_output_path(args.input)
+
+    print(f"Streaming {args.input} into columnar store {output}...")
+    start = time.perf_counter()
+    with TrainingStoreWriter(output) as writer:
+        for chunk in iter_sample_chunks(args.input, CHUNK_SIZE):
+            writer.append_samples(chunk)
+    print(f"✓ Converted in {time.perf_counter() - start:.2f}s")
+
+    store = load_store(output)
+    json_size = os.path.getsize(args.input)
+    store_size = sum(
+        os.path.getsize(os.path.join(output, name)) for name in os.listdir(output)
+    )
+
+    print(f"✓ Wrote {len(store)} rows, {len(store.users)} users, {len(store.questions)} questions")
+    print(f"  JSON: {json_size / 1e6:.1f} MB → columnar: {store_size / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
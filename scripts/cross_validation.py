@@ -0,0 +1,154 @@
+"""
+Grouped k-fold cross-validation for the interval model
+
+Samples are assigned to folds by user (metadata.userId), so one user's
+reviews never land on both sides of a split. The unnormalized feature
+matrix is saved once and memory-mapped by a trainer pool (scripts/sweep.py);
+folds train concurrently, and each fold computes its normalization from its
+own training slice only.
+
+Usage:
+    from scripts.cross_validation import group_kfold, run_cross_validation
+
+    fold_of = group_kfold(groups, 5)
+    summary = run_cross_validation(X, y, fold_of, architecture='large', workers=5)
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from scripts.sweep import save_shared_data, shared_data, trainer_pool
+from scripts.trainer import (
+    DEFAULT_BATCH_SIZE, DEFAULT_EPOCHS, DEFAULT_LEARNING_RATE, DEFAULT_PIPELINE,
+    DEFAULT_SEED, DEFAULT_VALIDATION_SPLIT, normalization_stats, split_validation
+)
+
+
+def group_kfold(groups, folds):
+    """
+    Fold index (0..folds-1) for every sample, keeping each group in one fold
+
+    Groups are placed largest first into the fold with the fewest samples so
+    far, which keeps fold sizes close even when users have very different
+    review counts.
+    """
+    unique, inverse, counts = np.unique(groups, return_inverse=True, return_counts=True)
+    if len(unique) < folds:
+        raise ValueError(f"Cannot make {folds} grouped folds from {len(unique)} users")
+
+    fold_sizes = np.zeros(folds, dtype=np.int64)
+    group_fold = np.empty(len(unique), dtype=np.int32)
+    for group in np.argsort(-counts, kind='stable'):
+        fold = int(np.argmin(fold_sizes))
+        group_fold[group] = fold
+        fold_sizes[fold] += counts[group]
+
+    return group_fold[inverse]
+
+
+def fold_sizes(fold_of, groups, folds):
+    """(samples, users) per fold"""
+    return [(int(np.sum(fold_of == fold)), len(np.unique(groups[fold_of == fold]))) for fold in range(folds)]
+
+
+def _train_fold(fold, config):
+    """Train on every other fold and evaluate on this one, in a pool worker"""
+    from scripts.trainer import build_model, evaluate, import_keras, training_callbacks
+    from scripts.training_pipeline import fit_inputs
+
+    _, keras = import_keras()
+    keras.utils.set_random_seed(config['seed'])
+
+    start = time.perf_counter()
+    data = shared_data()
+    in_test = np.asarray(data['fold_of']) == fold
+
+    X_train, y_train = data['X'][~in_test], data['y'][~in_test]
+    X_test, y_test = data['X'][in_test], data['y'][in_test]
+
+    # Normalization from this fold's training slice only
+    mean, std = normalization_stats(data['X'], np.flatnonzero(~in_test))
+    X_fit, y_fit, X_val, y_val = split_validation(
+        (X_train - mean) / std, y_train, config['validationSplit'], config['seed']
+    )
+    prepare_seconds = time.perf_counter() - start
+
+    model = build_model(X_train.shape[1], config['architecture'], config['learningRate'], config['dropout'])
+    history = model.fit(
+        **fit_inputs(config['pipeline'], X_fit, y_fit, X_val, y_val, config['batchSize']),
+        epochs=config['epochs'],
+        callbacks=training_callbacks(),
+        verbose=0
+    )
+    fit_seconds = time.perf_counter() - start - prepare_seconds
+
+    performance = evaluate(model, X_test, (X_test - mean) / std, y_test)
+
+    return {
+        'fold': fold,
+        'trainSize': int(len(X_train)),
+        'testSize': int(len(X_test)),
+        **performance,
+        'epochsRun': len(history.history['loss']),
+        'prepareSeconds': prepare_seconds,
+        'fitSeconds': fit_seconds,
+        'wallSeconds': time.perf_counter() - start
+    }
+
+
+def run_cross_validation(X, y, fold_of, architecture, learning_rate=DEFAULT_LEARNING_RATE,
+                         dropout=None, batch_size=DEFAULT_BATCH_SIZE, epochs=DEFAULT_EPOCHS,
+                         pipeline=DEFAULT_PIPELINE, validation_split=DEFAULT_VALIDATION_SPLIT,
+                         seed=DEFAULT_SEED, workers=None, threads=None, on_result=None):
+    """
+    Train one model per fold concurrently; returns the crossValidation summary
+
+    The summary has mean/std test MAE across folds, every fold's metrics and
+    timings, and the overall wall time.
+    """
+    folds = int(fold_of.max()) + 1
+    cpus = os.cpu_count() or 1
+    workers = min(workers or folds, folds)
+    threads = threads or max(1, cpus // workers)
+
+    config = {
+        'architecture': architecture, 'learningRate': learning_rate, 'dropout': dropout,
+        'batchSize': batch_size, 'epochs': epochs, 'pipeline': pipeline,
+        'validationSplit': validation_split, 'seed': seed
+    }
+
+    start = time.perf_counter()
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='interval-cv-') as directory:
+        save_shared_data(directory, {'X': X, 'y': y, 'fold_of': fold_of})
+
+        with trainer_pool(directory, workers, threads) as executor:
+            futures = [executor.submit(_train_fold, fold, config) for fold in range(folds)]
+            for future in futures:
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+    wall_seconds = time.perf_counter() - start
+    maes = np.array([result['testMAE'] for result in results])
+    baseline_maes = np.array([result['baselineMAE'] for result in results])
+    serial_seconds = sum(result['wallSeconds'] for result in results)
+
+    return {
+        'folds': folds,
+        'groupedBy': 'userId',
+        'meanMAE': float(maes.mean()),
+        'stdMAE': float(maes.std()),
+        'meanBaselineMAE': float(baseline_maes.mean()),
+        'workers': workers,
+        'threadsPerWorker': threads,
+        'wallSeconds': wall_seconds,
+        'serialSeconds': serial_seconds,
+        'speedup': serial_seconds / wall_seconds if wall_seconds else 0.0,
+        'foldResults': results
+    }
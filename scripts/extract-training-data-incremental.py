@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Append training samples for new reviews to the columnar store
+
+Incremental counterpart of extract-training-data.js + convert-training-data.py:
+only users with reviews newer than the store's watermark are read (projected
+to the review fields the features need), and only their new samples are
+appended. The first run, or --full, extracts every review. See
+scripts/incremental_extract.py.
+
+Usage:
+    python scripts/extract-training-data-incremental.py                     # training-data-clean.columns
+    python scripts/extract-training-data-incremental.py nightly.columns --full
+    python scripts/train-interval-model.py --incremental
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pymongo import MongoClient
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.incremental_extract import DEFAULT_CHUNK_USERS, DEFAULT_CURSOR_BATCH, extract_new_samples
+from scripts.instrumentation import RunReport
+from scripts.training_store import DEFAULT_STORE_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally extract training data from MongoDB')
+    parser.add_argument('store', nargs='?', default=DEFAULT_STORE_PATH, help='Columnar store to append to')
+    parser.add_argument('--full', action='store_true', help='Rebuild the store from every review')
+    parser.add_argument('--cursor-batch', type=int, default=DEFAULT_CURSOR_BATCH,
+                        help='Users fetched per MongoDB cursor round trip')
+    parser.add_argument('--chunk-users', type=int, default=DEFAULT_CHUNK_USERS,
+                        help='Users whose samples are appended together')
+    args = parser.parse_args()
+
+    # Load .env file from parent directory
+    from dotenv import load_dotenv
+    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
+    load_dotenv(env_path)
+
+    mongodb_uri = os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        print("❌ MONGODB_URI environment variable not set")
+        print("   Checked .env file at:", env_path)
+        sys.exit(1)
+
+    print("\n" + "="*70)
+    print("Incremental Training Data Extraction")
+    print("="*70)
+
+    client = MongoClient(mongodb_uri)
+    report = RunReport('extraction')
+    start = time.perf_counter()
+    try:
+        totals = extract_new_samples(client.get_default_database()['users'], args.store, args.full,
+                                     args.cursor_batch, args.chunk_users, report)
+    except ValueError as error:
+        print(f"❌ {error}")
+        sys.exit(1)
+    finally:
+        client.close()
+    seconds = time.perf_counter() - start
+
+    print(f"Watermark: {totals['watermarkBefore'] or 'none (full extraction)'} -> {totals['watermark']}")
+    print(f"✓ {totals['newReviews']:,} new reviews from {totals['users']:,} users "
+          f"({totals['newCards']:,} new cards, {totals['cards']:,} tracked)")
+    if totals['skippedReviews']:
+        print(f"⚠️  Skipped {totals['skippedReviews']:,} reviews older than their card's last review")
+    print(f"✓ Appended {totals['samples']:,} samples to {args.store} ({totals['rows']:,} rows) in {seconds:.1f}s\n")
+    report.print_summary()
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Content-addressed on-disk cache of feature matrices
+
+An entry holds the (X, y, groups) arrays that scripts/trainer.py builds for
+one feature set from one training data file, as .npy files that are
+memory-mapped read-only on a hit, plus the normalization state of every
+train/test split trained on it. A hit never loads the training data or runs
+the feature builder.
+
+The key is a sha256 over the content of the data (the JSON export, or a
+store's index.json and column files), the feature set, FEATURE_SPEC_VERSION,
+the feature formulas, the card history constants and the source of the
+feature builder (the feature set's build function and the feature_spec,
+feature_engine and card_history modules), so editing the data, appending to
+a store or changing a feature or how it is computed all miss. Content hashes are remembered per file by
+(size, mtime), so an unchanged file is hashed once, not on every run.
+
+Entries are evicted least recently used first once the cache is larger than
+max_bytes.
+
+Usage:
+    from scripts.feature_cache import FeatureCache
+
+    cache = FeatureCache('ml/feature-cache', max_bytes=2 * 1024**3)
+    key = cache.key('training-data-clean.columns', 'advanced', advanced_feature_matrix)
+    entry = cache.get(key) or cache.put(key, X, y, groups, {'dataPath': ...})
+    entry.X                                # np.memmap, float32
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+
+from scripts import card_history, feature_engine, feature_spec
+from scripts.card_history import HISTORY_ALPHA, HISTORY_SPEC_VERSION, HISTORY_WINDOW
+from scripts.feature_spec import FEATURE_SPEC_VERSION, FEATURES
+from scripts.running_stats import RunningStats
+from scripts.training_store import INDEX_FILE, is_store
+
+FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = 'ml/feature-cache'
+DEFAULT_MAX_BYTES = 2 * 1024**3
+META_FILE = 'meta.json'
+FINGERPRINT_FILE = 'fingerprints.json'
+ARRAYS = ('X', 'y', 'groups')
+HASH_READ_SIZE = 8 << 20
+BUILDER_MODULES = (feature_spec, feature_engine, card_history)
+
+
+def _write_json(path, value):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(value, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def file_sha256(path):
+    """sha256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def data_files(data_path):
+    """The files whose content defines a training data path"""
+    if not is_store(data_path):
+        return [data_path]
+    with open(os.path.join(data_path, INDEX_FILE), 'r') as f:
+        index = json.load(f)
+    return [os.path.join(data_path, INDEX_FILE)] + [
+        os.path.join(data_path, spec['file']) for spec in index['columns'].values()
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def spec_digest(builder=None):
+    """
+    sha256 of what a cached feature matrix was computed with
+
+    Covers FEATURE_SPEC_VERSION, every feature's name, group and formula, the
+    card history constants and the source of BUILDER_MODULES and of builder
+    (a feature set's build function), so a change to the code that computes
+    the features invalidates the cache even when the spec is unchanged.
+    """
+    history = {'alpha': HISTORY_ALPHA, 'window': HISTORY_WINDOW, 'specVersion': HISTORY_SPEC_VERSION}
+    sources = [inspect.getsource(module) for module in BUILDER_MODULES]
+    if builder is not None:
+        sources.append(inspect.getsource(builder))
+    parts = [FEATURE_SPEC_VERSION, FEATURES, history, sources]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def split_name(test_size, seed):
+    """Name a train/test split's normalization state is stored under"""
+    return f'split-{test_size}-{seed}'
+
+
+class CacheEntry:
+    """One cached feature matrix: memory-mapped arrays, meta.json and normalization states"""
+
+    def __init__(self, path):
+        self.path = path
+        self.info = _read_json(os.path.join(path, META_FILE))
+        if self.info is None or self.info.get('formatVersion') != FORMAT_VERSION:
+            raise ValueError(f'Not a feature cache entry: {path}')
+        arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in ARRAYS}
+        self.X, self.y, self.groups = arrays['X'], arrays['y'], arrays['groups']
+
+    def load_state(self, name):
+        """A normalization RunningStats saved with save_state(), or None"""
+        state = _read_json(os.path.join(self.path, name + '.json'))
+        return RunningStats.from_dict(state) if state else None
+
+    def save_state(self, name, state):
+        _write_json(os.path.join(self.path, name + '.json'), state.to_dict())
+
+
+class FeatureCache:
+    """Directory of CacheEntry subdirectories named by key, bounded to max_bytes"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def data_digest(self, data_path):
+        """
+        sha256 over the content of a data path's files
+
+        Per-file digests are reused while a file's size and mtime are
+        unchanged (fingerprints.json), so only new or modified files are read.
+        """
+        fingerprints_path = os.path.join(self.directory, FINGERPRINT_FILE)
+        fingerprints = _read_json(fingerprints_path, {})
+        changed = False
+
+        digest = hashlib.sha256()
+        for path in data_files(data_path):
+            path = os.path.realpath(path)
+            stat = os.stat(path)
+            known = fingerprints.get(path)
+            if not known or known['size'] != stat.st_size or known['mtimeNs'] != stat.st_mtime_ns:
+                known = {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+                fingerprints[path] = known
+                changed = True
+            digest.update(known['sha256'].encode())
+
+        if changed:
+            _write_json(fingerprints_path, {path: value for path, value in fingerprints.items()
+                                            if os.path.exists(path)})
+        return digest.hexdigest()
+
+    def key(self, data_path, feature_set, builder=None):
+        """Cache key of a feature set built from a data path by builder (its build function)"""
+        parts = [FORMAT_VERSION, self.data_digest(data_path), feature_set, spec_digest(builder)]
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """The CacheEntry for a key (marked as just used), or None"""
+        path = self.entry_path(key)
+        try:
+            entry = CacheEntry(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        entry.info['lastUsed'] = time.time()
+        _write_json(os.path.join(path, META_FILE), entry.info)
+        self.hits += 1
+        return entry
+
+    def put(self, key, X, y, groups, info=None):
+        """
+        Add (X, y, groups) under a key and evict older entries to fit max_bytes
+
+        Returns the new CacheEntry, or None if the arrays alone are larger than
+        max_bytes (nothing is written then).
+        """
+        arrays = {
+            'X': np.asarray(X, dtype=np.float32),
+            'y': np.asarray(y, dtype=np.float32),
+            'groups': np.asarray(groups)
+        }
+        size = sum(values.nbytes for values in arrays.values())
+        if size > self.max_bytes:
+            print(f"⚠️  Feature matrix ({size / 1024**2:.0f} MB) is larger than the feature cache "
+                  f"({self.max_bytes / 1024**2:.0f} MB); not caching it")
+            return None
+
+        # Write into a scratch directory and rename it into place, so readers
+        # never see a partial entry
+        tmp_path = os.path.join(self.directory, f'.tmp-{key}-{os.getpid()}')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_path, name + '.npy'), np.ascontiguousarray(values))
+        now = time.time()
+        _write_json(os.path.join(tmp_path, META_FILE), {
+            'formatVersion': FORMAT_VERSION,
+            'key': key,
+            'featureSpecVersion': FEATURE_SPEC_VERSION,
+            'rows': len(arrays['X']),
+            'numFeatures': arrays['X'].shape[1],
+            'bytes': size,
+            'createdDate': datetime.now().isoformat(),
+            'lastUsed': now,
+            **(info or {})
+        })
+
+        path = self.entry_path(key)
+        shutil.rmtree(path, ignore_errors=True)
+        os.rename(tmp_path, path)
+
+        self.evict(keep=key)
+        return CacheEntry(path)
+
+    def entries(self):
+        """meta.json of every entry, least recently used first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            info = _read_json(os.path.join(self.directory, name, META_FILE))
+            if info and info.get('formatVersion') == FORMAT_VERSION:
+                entries.append(info)
+        return sorted(entries, key=lambda info: info['lastUsed'])
+
+    def size(self):
+        """Bytes held by all entries"""
+        return sum(info['bytes'] for info in self.entries())
+
+    def evict(self, keep=None):
+        """Remove least recently used entries (except keep) until the cache fits max_bytes"""
+        entries = self.entries()
+        total = sum(info['bytes'] for info in entries)
+        evicted = []
+        for info in entries:
+            if total <= self.max_bytes:
+                break
+            if info['key'] == keep:
+                continue
+            shutil.rmtree(self.entry_path(info['key']), ignore_errors=True)
+            total -= info['bytes']
+            evicted.append(info['key'])
+        return evicted
+
+    def clear(self):
+        """Remove every entry and the remembered file digests"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
@@ -0,0 +1,135 @@
+"""
+Columnar feature engine for the 51-feature interval model
+
+Compiles the declarative table in scripts/feature_spec.py into a vectorized
+NumPy function. Inputs are one array per base feature (keyed by the names
+used in ``sample['features']``), optionally plus one per history input
+(scripts/card_history.py); the output is a preallocated float32 matrix.
+
+Usage:
+    from scripts.feature_engine import columns_from_samples, build_feature_matrix
+
+    X = build_feature_matrix(columns_from_samples(training_data))
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from scripts.feature_spec import BASE_FEATURES, FEATURES, FEATURE_NAMES, FEATURE_SPEC_VERSION, HISTORY_INPUTS
+
+NUM_FEATURES = len(FEATURES)
+
+
+def _divide_or(numerator, denominator, fallback):
+    """numerator / denominator where denominator > 0, fallback elsewhere"""
+    positive = denominator > 0
+    return np.where(positive, numerator / np.where(positive, denominator, 1), fallback)
+
+
+# Everything a formula is allowed to call
+_FORMULA_GLOBALS = {
+    '__builtins__': {},
+    'pi': np.pi,
+    'exp': np.exp,
+    'log1p': np.log1p,
+    'sqrt': np.sqrt,
+    'sin': np.sin,
+    'cos': np.cos,
+    'arctan2': np.arctan2,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+    'clip': np.clip,
+    'where': np.where,
+    'zeros_like': np.zeros_like,
+    'divide_or': _divide_or
+}
+
+# Formulas compiled once at import time
+_COMPILED = {
+    name: compile(formula, f'<feature {name}>', 'eval')
+    for name, _, formula in FEATURES
+}
+
+
+class _FeatureColumns(dict):
+    """Evaluates features on first lookup so formulas can reference each other in any order"""
+
+    def __init__(self, raw):
+        super().__init__()
+        self.raw = raw
+        self._pending = set()
+
+    def __missing__(self, name):
+        if name == 'raw':
+            return self.raw
+        if name not in _COMPILED:
+            raise KeyError(name)  # Falls through to the formula globals
+        if name in self._pending:
+            raise ValueError(f"Circular reference to feature '{name}' in feature spec")
+
+        self._pending.add(name)
+        value = eval(_COMPILED[name], _FORMULA_GLOBALS, self)
+        self._pending.discard(name)
+
+        self[name] = value
+        return value
+
+
+def columns_from_samples(samples):
+    """
+    Collect base features from training samples into one array per feature,
+    plus the history inputs when the samples carry ``sample['history']``
+    """
+    with_history = bool(samples) and 'history' in samples[0]
+    names = BASE_FEATURES + HISTORY_INPUTS if with_history else BASE_FEATURES
+    columns = {name: np.empty(len(samples), dtype=np.float64) for name in names}
+
+    for i, sample in enumerate(samples):
+        features = sample['features']
+        for name in BASE_FEATURES:
+            columns[name][i] = features[name]
+        if with_history:
+            history = sample['history']
+            for name in HISTORY_INPUTS:
+                columns[name][i] = history[name]
+
+    return columns
+
+
+def build_feature_matrix(columns, out=None):
+    """
+    Create the 51 advanced features for every row in one vectorized pass
+
+    columns: dict of base feature name -> 1-D array (all the same length),
+             optionally with every history input too (without them each
+             row is treated as having no history state)
+    out: optional preallocated (n, 51) float32 matrix to fill
+    """
+    n = len(columns['memoryStrength'])
+
+    if out is None:
+        out = np.empty((n, NUM_FEATURES), dtype=np.float32)
+    elif out.shape != (n, NUM_FEATURES):
+        raise ValueError(f"Output matrix must have shape ({n}, {NUM_FEATURES}), got {out.shape}")
+
+    raw = SimpleNamespace(**{
+        name: np.asarray(columns[name], dtype=np.float64) for name in BASE_FEATURES
+    })
+    for name in HISTORY_INPUTS:
+        setattr(raw, name, np.asarray(columns[name], dtype=np.float64) if name in columns else np.zeros(n))
+    values = _FeatureColumns(raw)
+
+    for i, name in enumerate(FEATURE_NAMES):
+        out[:, i] = values[name]
+
+    return out
+
+
+def create_advanced_features(sample):
+    """Create 51 advanced features from a single training sample (and its ``history`` inputs, if any)"""
+    columns = {name: [sample['features'][name]] for name in BASE_FEATURES}
+    if sample.get('history'):
+        columns.update((name, [sample['history'][name]]) for name in HISTORY_INPUTS)
+    return build_feature_matrix(columns)[0].tolist()
+
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Declarative spec for the 51 advanced features
+
+This is the single source of truth for feature names, order and formulas.
+Training, simulation and evaluation compile it into a vectorized NumPy
+function (see scripts/feature_engine.py), and it is exported to
+ml/feature-spec.json so the Node test suite can check that
+ml/advanced-features.js produces the same layout.
+
+Formulas are NumPy expressions. ``raw.<name>`` is a raw input: a base
+feature as stored in ``sample['features']``, or one of the HISTORY_INPUTS
+derived from the card's rolling review-history state (scripts/card_history.py).
+Any other name refers to another feature in this table, in any order.
+
+History inputs are optional. Rows without them (historyReviews == 0) get
+the history-free fallback in each formula, which is exactly what spec
+1.0.0 computed, so models trained before 1.1.0 keep their inputs.
+
+Usage:
+    python scripts/feature_spec.py            # Re-export ml/feature-spec.json
+"""
+
+import json
+import os
+import sys
+
+# Bump whenever a name, order or formula changes
+FEATURE_SPEC_VERSION = '1.1.0'
+
+# Raw inputs, as produced by utils/question-helpers.js and extract-training-data.js
+BASE_FEATURES = [
+    'memoryStrength',
+    'difficultyRating',
+    'timeSinceLastReview',
+    'successRate',
+    'averageResponseTime',
+    'totalReviews',
+    'consecutiveCorrect',
+    'timeOfDay'
+]
+
+# Raw inputs from a card's O(1) review-history state (scripts/card_history.py,
+# ml/card-history.js); all 0 when the card has no state
+HISTORY_INPUTS = [
+    'historyReviews',          # Reviews folded into the state
+    'emaRecall',               # EMA of recalled (0/1)
+    'emaResponseTime',         # EMA of response time (ms)
+    'emaDifficulty',           # EMA of 1 - success rate after each review
+    'emaInterval',             # EMA of days between reviews
+    'historySpan',             # Days from the first to the last review
+    'recentSuccessRate',       # Success rate over the last HISTORY_WINDOW reviews
+    'recentDifficultySlope'    # Difficulty change per review over that window
+]
+
+# (name, group, formula) in model input order
+FEATURES = [
+    # Base (8) - clamped the same way the deployed model was trained
+    ('memoryStrength', 'base', 'maximum(raw.memoryStrength, 0)'),
+    ('difficultyRating', 'base', 'clip(raw.difficultyRating, 0, 1)'),
+    ('timeSinceLastReview', 'base', 'maximum(raw.timeSinceLastReview, 0.1)'),
+    ('successRate', 'base', 'clip(raw.successRate, 0, 1)'),
+    ('averageResponseTime', 'base', 'maximum(raw.averageResponseTime / 1000, 0.1)'),  # Seconds
+    ('totalReviews', 'base', 'maximum(raw.totalReviews, 0)'),
+    ('consecutiveCorrect', 'base', 'maximum(raw.consecutiveCorrect, 0)'),
+    ('timeOfDay', 'base', 'raw.timeOfDay'),
+
+    # Forgetting curve (5)
+    ('forgettingCurve', 'forgettingCurve', 'exp(-minimum(decayRate, 50))'),
+    ('adjustedDecay', 'forgettingCurve', 'exp(-minimum(decayRate / maximum(successRate * 2, 0.1), 50))'),
+    ('logTimeDecay', 'forgettingCurve', 'log1p(maximum(decayRate, 0))'),
+    ('logMemoryStrength', 'forgettingCurve', 'log1p(memoryStrength)'),
+    ('decayRate', 'forgettingCurve', 'timeSinceLastReview / maximum(memoryStrength, 0.1)'),
+
+    # Interactions (10)
+    ('difficultyTimeProduct', 'interaction', 'difficultyRating * timeSinceLastReview'),
+    ('difficultyMemoryProduct', 'interaction', 'difficultyRating * memoryStrength'),
+    ('successMemoryProduct', 'interaction', 'successRate * memoryStrength'),
+    ('successTimeProduct', 'interaction', 'successRate * timeSinceLastReview'),
+    ('responseTimeDifficultyProduct', 'interaction', 'averageResponseTime * difficultyRating'),
+    ('responseTimeMemoryProduct', 'interaction', 'averageResponseTime * memoryStrength'),
+    ('consecutiveMemoryProduct', 'interaction', 'consecutiveCorrect * memoryStrength'),
+    ('consecutiveDifficultyRatio', 'interaction',
+     'divide_or(consecutiveCorrect, difficultyRating, consecutiveCorrect)'),
+    ('experienceSuccessProduct', 'interaction', 'totalReviews * successRate'),
+    ('experienceDifficultyRatio', 'interaction',
+     'where(difficultyRating > 0, totalReviews / (difficultyRating + 1), totalReviews)'),
+
+    # Polynomial (9)
+    ('memoryStrengthSquared', 'polynomial', 'memoryStrength ** 2'),
+    ('difficultySquared', 'polynomial', 'difficultyRating ** 2'),
+    ('timeSquared', 'polynomial', 'timeSinceLastReview ** 2'),
+    ('successRateSquared', 'polynomial', 'successRate ** 2'),
+    ('memoryStrengthCubed', 'polynomial', 'memoryStrength ** 3'),
+    ('timeCubed', 'polynomial', 'timeSinceLastReview ** 3'),
+    ('sqrtMemoryStrength', 'polynomial', 'sqrt(memoryStrength)'),
+    ('sqrtTime', 'polynomial', 'sqrt(timeSinceLastReview)'),
+    ('sqrtTotalReviews', 'polynomial', 'sqrt(totalReviews)'),
+
+    # Cyclical time (5)
+    ('timeSin', 'cyclicalTime', 'sin(timeOfDay * 2 * pi)'),
+    ('timeCos', 'cyclicalTime', 'cos(timeOfDay * 2 * pi)'),
+    ('timeSin2', 'cyclicalTime', 'sin(2 * (timeOfDay * 2 * pi))'),
+    ('timeCos2', 'cyclicalTime', 'cos(2 * (timeOfDay * 2 * pi))'),
+    ('timePhase', 'cyclicalTime', 'arctan2(timeSin, timeCos)'),
+
+    # Moving averages (5) - from the history state, current values without one
+    ('maDifficulty', 'movingAverage',
+     'where(raw.historyReviews > 0, clip(raw.emaDifficulty, 0, 1), difficultyRating)'),
+    ('maResponseTime', 'movingAverage',
+     'where(raw.historyReviews > 0, maximum(raw.emaResponseTime / 1000, 0.1), averageResponseTime)'),
+    ('maSuccessRate', 'movingAverage', 'where(raw.historyReviews > 0, clip(raw.emaRecall, 0, 1), successRate)'),
+    ('maInterval', 'movingAverage',
+     'where(raw.historyReviews > 1, maximum(raw.emaInterval, 0), timeSinceLastReview)'),
+    ('reviewFrequency', 'movingAverage',
+     'where(raw.historyReviews > 1, raw.historyReviews / maximum(raw.historySpan, 1), '
+     'totalReviews / maximum(timeSinceLastReview, 1))'),
+
+    # Momentum (4)
+    ('learningVelocity', 'momentum', 'consecutiveCorrect / maximum(totalReviews, 1)'),
+    ('difficultyTrend', 'momentum', 'where(raw.historyReviews > 1, raw.recentDifficultySlope, 0)'),
+    ('performanceAcceleration', 'momentum',
+     'where(raw.historyReviews > 0, raw.recentSuccessRate - successRate, successRate - 0.5)'),  # Recent vs overall
+    ('masteryMomentum', 'momentum', 'learningVelocity * memoryStrength'),
+
+    # Retention (5)
+    ('predictedRetention', 'retention', 'forgettingCurve * successRate'),
+    ('confidenceScore', 'retention', 'successRate * (1 - difficultyRating)'),
+    ('stabilityIndex', 'retention', 'memoryStrength / maximum(timeSinceLastReview, 0.1)'),
+    ('learningEfficiency', 'retention', 'successRate / maximum(averageResponseTime, 0.1)'),
+    ('optimalIntervalEstimate', 'retention', 'memoryStrength * (1 + successRate)')
+]
+
+FEATURE_NAMES = [name for name, _, _ in FEATURES]
+
+# Example row exported with the table so other implementations can check values
+REFERENCE_INPUT = {
+    'memoryStrength': 3,
+    'difficultyRating': 0.4,
+    'timeSinceLastReview': 2.5,
+    'successRate': 0.75,
+    'averageResponseTime': 3500,
+    'totalReviews': 8,
+    'consecutiveCorrect': 3,
+    'timeOfDay': 0.58
+}
+
+# Example review sequence (more than HISTORY_WINDOW reviews, so the ring
+# buffers wrap); its history inputs are exported with REFERENCE_INPUT
+REFERENCE_REVIEWS = [
+    {'recalled': True, 'responseTime': 4200, 'timestamp': 1735725600000},
+    {'recalled': False, 'responseTime': 6100, 'timestamp': 1735812000000},
+    {'recalled': True, 'responseTime': 3900, 'timestamp': 1735898400000},
+    {'recalled': False, 'responseTime': 3300, 'timestamp': 1736160000000},
+    {'recalled': False, 'responseTime': 5200, 'timestamp': 1736514000000},
+    {'recalled': True, 'responseTime': 2800, 'timestamp': 1736600400000},
+    {'recalled': True, 'responseTime': 2500, 'timestamp': 1737205200000},
+    {'recalled': True, 'responseTime': 2400, 'timestamp': 1738069200000}
+]
+
+DEFAULT_EXPORT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ml', 'feature-spec.json'
+)
+
+
+def export_spec(path=DEFAULT_EXPORT_PATH):
+    """Write the feature table (plus reference rows without and with history) as JSON"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from scripts.card_history import HISTORY_ALPHA, HISTORY_SPEC_VERSION, HISTORY_WINDOW, CardHistory
+    from scripts.feature_engine import create_advanced_features
+
+    history = CardHistory()
+    for review in REFERENCE_REVIEWS:
+        history.update(review['recalled'], review['responseTime'], review['timestamp'])
+    history_inputs = history.inputs()
+
+    table = {
+        'version': FEATURE_SPEC_VERSION,
+        'numFeatures': len(FEATURES),
+        'baseFeatures': BASE_FEATURES,
+        'historyInputs': HISTORY_INPUTS,
+        'history': {
+            'specVersion': HISTORY_SPEC_VERSION,
+            'alpha': HISTORY_ALPHA,
+            'window': HISTORY_WINDOW,
+            'reference': {
+                'reviews': REFERENCE_REVIEWS,
+                'expected': {name: round(value, 9) for name, value in history_inputs.items()}
+            }
+        },
+        'features': [
+            {'index': i, 'name': name, 'group': group, 'formula': formula}
+            for i, (name, group, formula) in enumerate(FEATURES)
+        ],
+        'reference': {
+            'input': REFERENCE_INPUT,
+            'expected': [round(value, 6) for value in create_advanced_features({'features': REFERENCE_INPUT})]
+        },
+        'historyReference': {
+            'input': {**REFERENCE_INPUT, **history_inputs},
+            'expected': [round(value, 6) for value in create_advanced_features({
+                'features': REFERENCE_INPUT, 'history': history_inputs
+            })]
+        }
+    }
+
+    with open(path, 'w') as f:
+        json.dump(table, f, indent=2)
+        f.write('\n')
+
+    return table
+
+
+if __name__ == '__main__':
+    table = export_spec()
+    print(f"✓ Exported {table['numFeatures']} features (spec v{table['version']}) to {DEFAULT_EXPORT_PATH}")
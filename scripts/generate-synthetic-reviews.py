@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic training data at scale, without MongoDB
+
+Vectorized counterpart of simulate-realistic-reviews.js + extract-training-data.js:
+simulates review histories for many users (seeded per-user ability, per-card
+difficulty, forgetting-curve recall, SM-2 scheduling) and writes the training
+samples to a columnar store or a JSON export. See scripts/synthetic_reviews.py.
+
+Usage:
+    python scripts/generate-synthetic-reviews.py synthetic.columns --users=50000     # ~10M samples
+    python scripts/generate-synthetic-reviews.py synthetic.json --users=500
+    python scripts/train-interval-model.py synthetic.columns --dry-run
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.synthetic_reviews import (
+    DEFAULT_CARDS_PER_USER, DEFAULT_CHUNK_USERS, DEFAULT_REVIEWS_PER_CARD, write_json, write_store
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic review histories as training data')
+    parser.add_argument('output', help='Store directory, or a .json file for an extract-training-data.js export')
+    parser.add_argument('--users', type=int, default=1000, help='Simulated users')
+    parser.add_argument('--cards', type=int, default=DEFAULT_CARDS_PER_USER, help='Cards per user')
+    parser.add_argument('--reviews', type=int, default=DEFAULT_REVIEWS_PER_CARD,
+                        help='Max reviews per card (each card gets 2 to this many)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-users', type=int, default=DEFAULT_CHUNK_USERS, help='Users generated per chunk')
+    parser.add_argument('--append', action='store_true', help='Append to an existing store')
+    args = parser.parse_args()
+
+    as_json = args.output.endswith('.json')
+    if as_json and args.append:
+        parser.error('--append only works with a columnar store')
+
+    print("\n" + "="*70)
+    print("Synthetic Review Generator")
+    print("="*70)
+    print(f"Users: {args.users:,}   Cards/user: {args.cards}   Reviews/card: 2-{args.reviews}   Seed: {args.seed}\n")
+
+    start = time.perf_counter()
+    options = dict(cards_per_user=args.cards, reviews_per_card=args.reviews, seed=args.seed,
+                   chunk_users=args.chunk_users)
+    if as_json:
+        rows = write_json(args.output, args.users, **options)
+    else:
+        rows = write_store(args.output, args.users, append=args.append, **options)
+    seconds = time.perf_counter() - start
+
+    print(f"✓ Wrote {rows:,} training samples to {args.output} in {seconds:.1f}s "
+          f"({rows / max(seconds, 1e-9):,.0f} samples/s)")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
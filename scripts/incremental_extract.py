@@ -0,0 +1,304 @@
+"""
+Incremental training-data extraction from MongoDB into a columnar store
+
+extract-training-data.js rebuilds every sample from every review history on
+each run. This extractor keeps a watermark next to the store instead:
+
+    extraction-watermark.json   newest review timestamp processed, store rows
+    card-keys.npy               (user code << 32 | question code), sorted
+    card-state.npy              per card: last review timestamp, review count,
+                                correct count, response-time sum, current
+                                streak, whether any review failed, and the
+                                base features of the last review (its sample
+                                is written once the next review arrives)
+
+Each run aggregates only users with a review newer than the watermark, with
+a $filter/$map projection so only those reviews' four fields cross the
+wire. A card's new reviews are folded into its O(1) state, and only the new
+samples are appended to the store, so the cost of a run scales with the new
+reviews, not with the total history. Samples are identical to
+extract-training-data.js (same features, labels and consecutiveCorrect quirk).
+
+Reviews are assumed to be appended in timestamp order, as the server records
+them. A review that arrives with a timestamp older than its card's state is
+skipped and counted.
+
+Usage:
+    from scripts.incremental_extract import extract_new_samples
+
+    totals = extract_new_samples(db['users'], 'training-data-clean.columns')
+    totals = extract_new_samples(mongomock_collection, store_path, full=True)
+"""
+
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from scripts.feature_spec import BASE_FEATURES
+from scripts.instrumentation import RunReport
+from scripts.ml_simulation import iter_user_chunks
+from scripts.training_store import INDEX_FILE, LABELS, TrainingStoreWriter, is_store, review_ms
+
+FORMAT_VERSION = 1
+WATERMARK_FILE = 'extraction-watermark.json'
+KEYS_FILE = 'card-keys.npy'
+STATE_FILE = 'card-state.npy'
+DEFAULT_CURSOR_BATCH = 100
+DEFAULT_CHUNK_USERS = 500
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+# card-state.npy columns: the running aggregates, then the pending sample's base features
+STATE_FIELDS = ('timestamp', 'count', 'correct', 'responseTime', 'streak', 'failed')
+STATE_WIDTH = len(STATE_FIELDS) + len(BASE_FEATURES)
+REVIEW_FIELDS = ('timestamp', 'recalled', 'responseTime', 'intervalUsed')
+
+
+def ms_datetime(ms):
+    """Naive UTC datetime for a query, as pymongo and mongomock both store them"""
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).replace(tzinfo=None)
+
+
+def card_key(user_code, question_code):
+    return (user_code << 32) | question_code
+
+
+def new_reviews_pipeline(since=None):
+    """
+    Aggregation over users: each question's text plus its reviews newer than
+    since (milliseconds), projected to REVIEW_FIELDS. since=None returns every review.
+    """
+    reviews = '$$question.reviewHistory'
+    if since is not None:
+        reviews = {'$filter': {'input': reviews, 'as': 'review',
+                               'cond': {'$gt': ['$$review.timestamp', ms_datetime(since)]}}}
+
+    pipeline = [] if since is None else [
+        {'$match': {'questions.reviewHistory.timestamp': {'$gt': ms_datetime(since)}}}
+    ]
+    pipeline.append({'$project': {'questions': {'$map': {
+        'input': '$questions', 'as': 'question', 'in': {
+            'question': '$$question.question',
+            'reviewHistory': {'$map': {'input': reviews, 'as': 'review', 'in': {
+                field: f'$$review.{field}' for field in REVIEW_FIELDS
+            }}}
+        }
+    }}}})
+    return pipeline
+
+
+def fold_review(state, review, ms):
+    """
+    Fold one review into a card state (a STATE_WIDTH list), in place
+
+    Returns the sample of the card's previous review as (base, labels,
+    timestamp), now that this review labels it, or None for a first review.
+    Features follow extract-training-data.js: aggregates include the review
+    itself, consecutiveCorrect is 1 + the run of correct answers before it
+    (0 when there was no earlier failure), and timeOfDay is the local hour
+    (Date.getHours()) / 24.
+    """
+    last_ms, count, correct, response_time, streak, failed = state[:len(STATE_FIELDS)]
+    recalled = bool(review.get('recalled', False))
+
+    sample = None
+    if count:
+        days = (ms - last_ms) / MS_PER_DAY
+        optimal = math.ceil(days * 1.2) if recalled else max(1, math.floor(days * 0.7))
+        sample = (state[len(STATE_FIELDS):], (optimal, days, float(recalled)), last_ms)
+
+    count += 1
+    correct += recalled
+    response_time += review.get('responseTime', 0) or 0
+    success_rate = correct / count
+    interval_used = review.get('intervalUsed') or 1
+
+    base = [
+        max(1, min(90, interval_used * (1 + success_rate * 0.5) * min(2, 1 + math.log(count + 1) * 0.1))),
+        1 - success_rate,
+        (ms - last_ms) / MS_PER_DAY if count > 1 else 0,
+        success_rate,
+        response_time / count,
+        count,
+        (streak + 1 if failed else 0) if recalled else 0,
+        datetime.fromtimestamp(ms / 1000).hour / 24
+    ]
+    state[:] = [ms, count, correct, response_time, streak + 1 if recalled else 0, failed or not recalled] + base
+    return sample
+
+
+class CardStates:
+    """Sorted card keys and their states, plus cards first seen in this run"""
+
+    def __init__(self, keys=None, states=None):
+        self.keys = np.empty(0, dtype=np.int64) if keys is None else keys
+        self.states = np.empty((0, STATE_WIDTH)) if states is None else states
+        self.new = {}
+
+    @classmethod
+    def load(cls, store_path):
+        return cls(np.load(os.path.join(store_path, KEYS_FILE)), np.load(os.path.join(store_path, STATE_FILE)))
+
+    def lookup(self, keys):
+        """Row of each key in self.states, -1 for cards without a saved state"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(self.keys):
+            return np.full(len(keys), -1)
+        rows = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[rows] == keys, rows, -1)
+
+    def __len__(self):
+        return len(self.keys) + len(self.new)
+
+    def save(self, store_path, suffix=''):
+        """Write card-keys.npy/card-state.npy (with the new cards merged in) under suffix"""
+        keys, states = self.keys, self.states
+        if self.new:
+            keys = np.concatenate([keys, np.fromiter(self.new, dtype=np.int64, count=len(self.new))])
+            states = np.concatenate([states, np.array(list(self.new.values()), dtype=np.float64)])
+            order = np.argsort(keys, kind='stable')
+            keys, states = keys[order], states[order]
+        with open(os.path.join(store_path, KEYS_FILE + suffix), 'wb') as f:
+            np.save(f, keys)
+        with open(os.path.join(store_path, STATE_FILE + suffix), 'wb') as f:
+            np.save(f, states)
+
+
+def load_watermark(store_path):
+    """extraction-watermark.json of a store, or None"""
+    path = os.path.join(store_path, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        watermark = json.load(f)
+    if watermark['formatVersion'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported watermark format {watermark['formatVersion']} in {path}")
+    return watermark
+
+
+def store_rows(store_path):
+    if not is_store(store_path):
+        return 0
+    with open(os.path.join(store_path, INDEX_FILE), 'r') as f:
+        return json.load(f)['rows']
+
+
+def chunk_samples(users, writer, cards, totals):
+    """Fold a chunk of users' new reviews into the card states; returns store column arrays"""
+    entries = []
+    for user in users:
+        user_code = writer.user_code(user['_id'])
+        for question in user.get('questions') or []:
+            reviews = question.get('reviewHistory') or []
+            if reviews:
+                question_code = writer.question_code(question.get('question'))
+                entries.append((card_key(user_code, question_code), user_code, question_code, reviews))
+
+    rows = cards.lookup([key for key, _, _, _ in entries])
+    base, labels, timestamp, user_codes, question_codes = [], [], [], [], []
+
+    for (key, user_code, question_code, reviews), row in zip(entries, rows):
+        if row >= 0:
+            state = cards.states[row].tolist()
+        else:
+            state = cards.new.setdefault(key, [0.0] * STATE_WIDTH)
+            if not state[1]:
+                totals['newCards'] += 1
+
+        for review in reviews:
+            ms = review_ms(review.get('timestamp'))
+            if state[1] and not ms > state[0]:
+                totals['skippedReviews'] += 1
+                continue
+            totals['newReviews'] += 1
+            sample = fold_review(state, review, ms)
+            if sample:
+                base.append(sample[0])
+                labels.append(sample[1])
+                timestamp.append(sample[2])
+                user_codes.append(user_code)
+                question_codes.append(question_code)
+
+        if row >= 0:
+            cards.states[row] = state
+        totals['watermark'] = max(totals['watermark'] or 0, state[0])
+
+    n = len(base)
+    return (np.array(base, dtype=np.float32).reshape(n, len(BASE_FEATURES)),
+            np.array(labels, dtype=np.float32).reshape(n, len(LABELS)),
+            np.array(timestamp, dtype=np.float64), np.array(user_codes, dtype=np.int32),
+            np.array(question_codes, dtype=np.int32))
+
+
+def extract_new_samples(users_collection, store_path, full=False, cursor_batch=DEFAULT_CURSOR_BATCH,
+                        chunk_users=DEFAULT_CHUNK_USERS, report=None):
+    """
+    Append the samples of reviews newer than the store's watermark to the store
+
+    users_collection can be a pymongo or mongomock collection. full=True (or
+    a store without a watermark yet) rebuilds the store and the card states
+    from every review. report, a scripts.instrumentation.RunReport, gets
+    db_read, featurize and write stages.
+
+    Returns a dict with users, newReviews, newCards, skippedReviews, samples,
+    rows, cards and the watermark before/after (ISO timestamps).
+    """
+    report = report or RunReport('extraction')
+    watermark = None if full else load_watermark(store_path)
+    rows = store_rows(store_path)
+
+    if watermark is None and rows and not full:
+        raise ValueError(f"{store_path} has {rows} rows but no {WATERMARK_FILE}; "
+                         f"rebuild it with full=True (--full)")
+    if watermark is not None and watermark['rows'] != rows:
+        raise ValueError(f"{store_path} has {rows} rows but its watermark expects {watermark['rows']} "
+                         f"(interrupted run?); rebuild it with full=True (--full)")
+
+    since = watermark['watermark'] if watermark else None
+    cards = CardStates.load(store_path) if watermark else CardStates()
+    totals = {'users': 0, 'newReviews': 0, 'newCards': 0, 'skippedReviews': 0, 'samples': 0, 'watermark': since}
+
+    cursor = users_collection.aggregate(new_reviews_pipeline(since), batchSize=cursor_batch)
+    chunks = report.iter_stage('db_read', iter_user_chunks(cursor, chunk_users))
+
+    writer = TrainingStoreWriter(store_path, append=watermark is not None)
+    try:
+        for users in chunks:
+            with report.stage('featurize'):
+                columns = chunk_samples(users, writer, cards, totals)
+            with report.stage('write'):
+                writer.append_arrays(*columns)
+            totals['users'] += len(users)
+            totals['samples'] += len(columns[0])
+
+        # Stage the card states first, so the store and its watermark are
+        # only out of step between the two renames below
+        with report.stage('write'):
+            cards.save(store_path, '.tmp')
+    except BaseException:
+        writer.abort()  # The store keeps its previous index and rows
+        raise
+    writer.close()
+
+    with report.stage('write'):
+        for name in (KEYS_FILE, STATE_FILE):
+            os.replace(os.path.join(store_path, name + '.tmp'), os.path.join(store_path, name))
+        tmp_path = os.path.join(store_path, WATERMARK_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'formatVersion': FORMAT_VERSION,
+                'watermark': totals['watermark'],
+                'rows': writer.rows,
+                'cards': len(cards),
+                'updatedDate': datetime.now().isoformat()
+            }, f, indent=2)
+        os.replace(tmp_path, os.path.join(store_path, WATERMARK_FILE))
+
+    def iso(ms):
+        return None if ms is None else datetime.fromtimestamp(ms / 1000, timezone.utc).isoformat()
+
+    totals.update(rows=writer.rows, cards=len(cards), watermarkBefore=iso(since), watermark=iso(totals['watermark']))
+    return totals
+
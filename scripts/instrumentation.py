@@ -0,0 +1,193 @@
+"""
+Lightweight stage instrumentation and JSON run reports
+
+A RunReport times named stages (wall time, CPU time and the process's peak
+RSS when the stage ends). Stages entered more than once (e.g. one DB read
+per chunk) accumulate. One stage can be profiled on request with cProfile or
+tracemalloc; the top entries go into the report.
+
+Usage:
+    from scripts.instrumentation import RunReport
+
+    report = RunReport('training', profile_stage='featurize', profiler='cprofile')
+    with report.stage('load'):
+        data = load_training_data(path)
+    report.add('predict', seconds, cpu_seconds)   # measured elsewhere, e.g. in a pool worker
+    report.write('ml/saved-model/training-report.json')
+"""
+
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILERS = ('cprofile', 'tracemalloc')
+PROFILE_TOP = 20  # Entries kept from a profile
+
+_DONE = object()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class RunReport:
+    """Per-stage wall/CPU/peak-RSS timings plus free-form sections, saved as JSON"""
+
+    def __init__(self, name, profile_stage=None, profiler='cprofile'):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profiler}', expected one of {PROFILERS}")
+
+        self.name = name
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self.created_at = datetime.now().isoformat()
+        self.stages = {}  # name -> totals, in first-entered order
+        self.sections = {}
+        self.profile = None
+        self._cprofile = None
+
+    def _totals(self, name):
+        return self.stages.setdefault(name, {'calls': 0, 'wallSeconds': 0.0, 'cpuSeconds': 0.0})
+
+    def add(self, name, wall_seconds, cpu_seconds=None, calls=1):
+        """Fold in a duration measured elsewhere (e.g. returned by a pool worker)"""
+        totals = self._totals(name)
+        totals['calls'] += calls
+        totals['wallSeconds'] += wall_seconds
+        if cpu_seconds is not None:
+            totals['cpuSeconds'] += cpu_seconds
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one call of stage `name`"""
+        profiling = name == self.profile_stage
+        if profiling:
+            self._start_profile()
+
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - start
+            cpu_seconds = time.process_time() - start_cpu
+            if profiling:
+                self._stop_profile(name)
+
+            self.add(name, wall_seconds, cpu_seconds)
+            self.stages[name]['peakRssMB'] = peak_rss_mb()
+
+    def iter_stage(self, name, iterable):
+        """Yield from iterable, timing each next() call as stage `name` (e.g. cursor reads)"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+
+    def _start_profile(self):
+        if self.profiler == 'cprofile':
+            self._cprofile = self._cprofile or cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            tracemalloc.start()
+
+    def _stop_profile(self, name):
+        if self.profiler == 'cprofile':
+            # Calls accumulate across repeated entries of the stage; summarized in to_dict()
+            self._cprofile.disable()
+            return
+
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        # Keep the entry of the stage with the highest traced peak
+        if self.profile is None or peak > self.profile['peakTracedMB'] * 1024 * 1024:
+            self.profile = {
+                'stage': name,
+                'profiler': 'tracemalloc',
+                'peakTracedMB': peak / (1024 * 1024),
+                'top': [{'location': str(stat.traceback), 'sizeMB': stat.size / (1024 * 1024), 'count': stat.count}
+                        for stat in snapshot.statistics('lineno')[:PROFILE_TOP]]
+            }
+
+    def record(self, section, value):
+        """Attach a free-form section (e.g. per-epoch throughput) to the report"""
+        self.sections[section] = value
+
+    def to_dict(self):
+        total_seconds = time.perf_counter() - self.started
+        profile = self.profile
+        if self._cprofile is not None:
+            profile = {'stage': self.profile_stage, 'profiler': 'cprofile', 'top': cprofile_top(self._cprofile)}
+
+        return {
+            'run': self.name,
+            'createdAt': self.created_at,
+            'wallSeconds': total_seconds,
+            'cpuSeconds': time.process_time() - self.started_cpu,
+            'peakRssMB': peak_rss_mb(),
+            'python': platform.python_version(),
+            'stages': {
+                name: {**totals, 'share': totals['wallSeconds'] / total_seconds if total_seconds else 0.0}
+                for name, totals in self.stages.items()
+            },
+            **self.sections,
+            'profile': profile
+        }
+
+    def write(self, path):
+        """Write the report as JSON (atomically) and return the dict"""
+        report = self.to_dict()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_path, path)
+        return report
+
+    def print_summary(self):
+        report = self.to_dict()
+        print(f"{'stage':<14} {'calls':>7} {'wall (s)':>10} {'cpu (s)':>10} {'share':>7} {'peak RSS':>10}")
+        for name, totals in report['stages'].items():
+            rss = f"{totals['peakRssMB']:.0f} MB" if totals.get('peakRssMB') is not None else '-'
+            print(f"{name:<14} {totals['calls']:>7} {totals['wallSeconds']:>10.3f} {totals['cpuSeconds']:>10.3f} "
+                  f"{totals['share']:>7.1%} {rss:>10}")
+
+
+def cprofile_top(profile, limit=PROFILE_TOP):
+    """Top functions by cumulative time from a cProfile.Profile"""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.relpath(filename) if os.path.isabs(filename) else filename}:{line}({function})',
+            'calls': calls,
+            'totalSeconds': total,
+            'cumulativeSeconds': cumulative
+        })
+    rows.sort(key=lambda row: row['cumulativeSeconds'], reverse=True)
+    return rows[:limit]
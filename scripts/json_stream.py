@@ -0,0 +1,295 @@
+"""
+Streaming ingest for large JSON training exports
+
+Decodes the top-level array written by extract-training-data.js one sample at
+a time from a fixed-size read buffer. The per-sample ``metadata.reviewHistory``
+is skipped in the raw text (found by a regex search and bracket matching, then
+decoded as null), so it is never turned into Python objects, and the ingest
+keeps only the compact base/label/metadata columns. The feature engine then
+runs over fixed-size row chunks into a preallocated matrix, once each card's
+history inputs are known (they depend on the card's earlier samples, which
+can be anywhere in the export), so peak memory tracks the chunk size and the
+columns rather than the size of the export.
+
+Usage:
+    from scripts.json_stream import stream_training_data
+
+    data, X = stream_training_data('training-data.json', chunk_size=10000)
+    data, X = stream_training_data('training-data.json', stats=RunningStats(51))  # stats of every sample
+"""
+
+import json
+import re
+
+import numpy as np
+
+from scripts.feature_engine import NUM_FEATURES, build_feature_matrix
+from scripts.feature_spec import BASE_FEATURES
+from scripts.training_store import LABELS, TrainingData, samples_to_arrays
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_READ_SIZE = 1 << 20
+DEFAULT_DROP_KEYS = ('reviewHistory',)
+
+_NON_SPACE = re.compile(r'\S')
+# JSON text with no brackets outside strings; arrays/objects nested at most two deep
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_PLAIN = r'[^\[\]{}"]*'
+_FLAT = rf'{_PLAIN}(?:{_STRING}{_PLAIN})*'
+_NESTED = rf'{_PLAIN}(?:(?:{_STRING}|\[{_FLAT}\]|\{{{_FLAT}\}}){_PLAIN})*'
+_SHALLOW_VALUE = re.compile(rf'\[{_NESTED}\]|\{{{_NESTED}\}}')
+# A string (group 1: its closing quote) or a bracket
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[\[\]{}]')
+_DECODER = json.JSONDecoder()
+DECODE_WINDOW = 4096
+
+
+class _ArrayReader:
+    """
+    Decodes the elements of a top-level JSON array from a file, one at a time
+
+    Array or object values of drop_keys (at any depth) are skipped in the raw
+    text without being decoded, and come back as None.
+    """
+
+    def __init__(self, f, read_size, drop_keys=()):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ''
+        self.pos = 0
+        self._drop_key = None
+        if drop_keys:
+            names = '|'.join(re.escape(json.dumps(key)) for key in drop_keys)
+            self._drop_key = re.compile(rf'(?:{names})\s*:\s*')
+        self._next_key = None  # (search start, match or None) of the last drop-key search
+
+    def _read(self):
+        """Drop consumed text and append the next block of the file; False at EOF"""
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self._next_key = None
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ('' at EOF)"""
+        while True:
+            match = _NON_SPACE.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return match.group()
+            self.pos = len(self.buf)
+            if not self._read():
+                return ''
+
+    def __iter__(self):
+        if self._peek() != '[':
+            raise ValueError('Expected a top-level JSON array')
+        self.pos += 1
+
+        first = True
+        while True:
+            char = self._peek()
+            if char == ']':
+                return
+            if not first:
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' between array elements, got {char!r}")
+                self.pos += 1
+                char = self._peek()
+            if char not in ('{', '['):
+                raise ValueError(f"Expected an object or array element, got {char!r}")
+            first = False
+
+            if self._drop_key:
+                yield self._decode_dropping()
+                continue
+
+            # Elements are objects/arrays, so a decode can only succeed once the
+            # closing bracket is in the buffer; until then, read more and retry
+            while True:
+                try:
+                    element, self.pos = _DECODER.raw_decode(self.buf, self.pos)
+                    break
+                except json.JSONDecodeError:
+                    if not self._read():
+                        raise
+
+            yield element
+
+    def _find_drop_key(self, start):
+        """Next drop key at or after buf[start] (cached until the buffer changes); None if none is buffered"""
+        cached = self._next_key
+        if cached and cached[0] <= start and (cached[1] is None or cached[1].start() >= start):
+            return cached[1]
+
+        match = self._drop_key.search(self.buf, start)
+        while match:
+            # Outside strings there are no backslashes, so an odd run of them
+            # before the quote means it is an escaped quote inside a string
+            before = match.start()
+            while before > start and self.buf[before - 1] == '\\':
+                before -= 1
+            if (match.start() - before) % 2 == 0:
+                break
+            match = self._drop_key.search(self.buf, match.start() + 1)
+
+        self._next_key = (start, match)
+        return match
+
+    def _decode_dropping(self):
+        """
+        Decode the element at self.pos with the values of drop_keys replaced by null
+
+        The text between dropped values is decoded by json in growing windows
+        (an element can only decode once its closing bracket is included), so
+        only the dropped values are scanned in Python-visible steps. Offsets
+        are kept relative to the element start, which _read() moves to 0.
+        """
+        pieces = []  # Element text so far, dropped values replaced by 'null'
+        done = 0  # Relative offset of the first byte not in pieces
+
+        while True:
+            key = self._find_drop_key(self.pos + done)
+            limit = (key.start() if key else len(self.buf)) - self.pos
+
+            # Does the element end before the next drop key?
+            head = ''.join(pieces)
+            window = DECODE_WINDOW
+            while True:
+                end = min(done + window, limit)
+                text = head + self.buf[self.pos + done:self.pos + end]
+                try:
+                    element, length = _DECODER.raw_decode(text)
+                    self.pos += done + length - len(head)
+                    return element
+                except json.JSONDecodeError:
+                    if end >= limit:
+                        break
+                    window *= 2
+
+            if key is None or key.end() == len(self.buf):
+                if not self._read():
+                    _DECODER.raw_decode(''.join(pieces) + self.buf[self.pos + done:])  # Raises the decode error
+                    raise ValueError('Unterminated JSON array element')
+                continue
+
+            value_start = value_end = key.end() - self.pos
+            pieces.append(self.buf[self.pos + done:key.end()])
+            if self.buf[key.end()] in '[{':
+                shallow = _SHALLOW_VALUE.match(self.buf, key.end())
+                value_end = shallow.end() - self.pos if shallow else self._skip_value(value_start)
+                pieces.append('null')
+            done = value_end  # Scalars are kept: they are decoded with the text after them
+
+    def _skip_value(self, start):
+        """Relative end of the deeply nested (or not yet fully read) array/object at relative offset start"""
+        depth = 0
+        offset = start
+        while True:
+            match = _TOKEN.search(self.buf, self.pos + offset)
+            if match is None or (match.group()[0] == '"' and match.group(1) is None):
+                # The value, or an open string in it, continues in the next block
+                if not self._read():
+                    raise ValueError('Unterminated JSON array element')
+                continue
+
+            offset = match.end() - self.pos
+            token = match.group()
+            if token in '[{':
+                depth += 1
+            elif token in ']}':
+                depth -= 1
+                if depth == 0:
+                    return offset
+
+
+def iter_json_array(path, read_size=DEFAULT_READ_SIZE, drop_keys=()):
+    """Yield the elements of a top-level JSON array one at a time (drop_keys' values skipped)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _ArrayReader(f, read_size, drop_keys)
+
+
+def iter_sample_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, drop_keys=DEFAULT_DROP_KEYS):
+    """Yield lists of at most chunk_size samples, with drop_keys skipped and removed from their metadata"""
+    chunk = []
+    for sample in iter_json_array(path, drop_keys=drop_keys):
+        metadata = sample.get('metadata')
+        if metadata:
+            for key in drop_keys:
+                metadata.pop(key, None)
+
+        chunk.append(sample)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class GrowableArray:
+    """Append-only array that doubles its capacity as rows are added"""
+
+    def __init__(self, width=None, dtype=np.float32, capacity=1024):
+        self.width = width
+        self.rows = 0
+        self._data = np.empty(self._shape(capacity), dtype=dtype)
+
+    def _shape(self, rows):
+        return (rows, self.width) if self.width else (rows,)
+
+    def append(self, values):
+        needed = self.rows + len(values)
+        if needed > len(self._data):
+            grown = np.empty(self._shape(max(needed, 2 * len(self._data))), dtype=self._data.dtype)
+            grown[:self.rows] = self._data[:self.rows]
+            self._data = grown
+
+        self._data[self.rows:needed] = values
+        self.rows = needed
+
+    @property
+    def array(self):
+        return self._data[:self.rows]
+
+
+def stream_training_data(path, chunk_size=DEFAULT_CHUNK_SIZE, featurize=True, stats=None):
+    """
+    Stream a JSON export into columns, then build the 51 features chunk by chunk
+
+    Returns (data, X): a TrainingData with the base, label and metadata columns,
+    and the (n, 51) float32 feature matrix (None when featurize is False), the
+    same matrix the trainer's advanced feature set builds. stats, a
+    RunningStats, is updated with every featurized chunk as it is built.
+    """
+    columns = [
+        GrowableArray(len(BASE_FEATURES), np.float32),  # base
+        GrowableArray(len(LABELS), np.float32),  # labels
+        GrowableArray(None, np.float64),  # timestamp
+        GrowableArray(None, np.int32),  # user
+        GrowableArray(None, np.int32)  # question
+    ]
+    user_codes = {}
+    question_codes = {}
+
+    for chunk in iter_sample_chunks(path, chunk_size):
+        arrays = samples_to_arrays(chunk, user_codes, question_codes)
+        for column, values in zip(columns, arrays):
+            column.append(values)
+
+    data = TrainingData(*(column.array for column in columns), list(user_codes), list(question_codes))
+    if not featurize:
+        return data, None
+
+    # History inputs over every sample first, so no card's history restarts at a chunk boundary
+    feature_columns = data.feature_columns()
+    X = np.empty((len(data), NUM_FEATURES), dtype=np.float32)
+    for start in range(0, len(data), chunk_size):
+        rows = slice(start, start + chunk_size)
+        build_feature_matrix({name: column[rows] for name, column in feature_columns.items()}, out=X[rows])
+        if stats is not None:
+            stats.update(X[rows])
+
+    return data, X
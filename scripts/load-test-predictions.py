@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Load-test client for scripts/serve-predictions.py
+
+Opens --concurrency keep-alive connections and sends --requests predictions
+in total with random base features. Prints client-side throughput and
+latency percentiles, plus the server's own /stats (batch-size histogram).
+
+Usage:
+    python scripts/load-test-predictions.py --concurrency=64 --requests=20000
+    python scripts/load-test-predictions.py --unix-socket=/tmp/intervals.sock
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_spec import BASE_FEATURES
+from scripts.prediction_server import DEFAULT_HOST, DEFAULT_PORT, PredictionClient
+
+
+def random_instances(count, seed=42):
+    """Plausible base-feature dicts"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'memoryStrength': rng.integers(1, 60, count),
+        'difficultyRating': rng.random(count),
+        'timeSinceLastReview': rng.random(count) * 30,
+        'successRate': rng.random(count),
+        'averageResponseTime': rng.integers(800, 9000, count),
+        'totalReviews': rng.integers(1, 80, count),
+        'consecutiveCorrect': rng.integers(0, 12, count),
+        'timeOfDay': rng.random(count)
+    }
+    return [{name: float(columns[name][i]) for name in BASE_FEATURES} for i in range(count)]
+
+
+async def worker(client, instances, latencies):
+    for instance in instances:
+        start = time.perf_counter()
+        status, response = await client.request('POST', '/predict', {'features': instance})
+        if status != 200:
+            raise RuntimeError(f"Server returned {status}: {response}")
+        latencies.append(time.perf_counter() - start)
+    await client.close()
+
+
+async def run(args):
+    client_options = {'host': args.host, 'port': args.port, 'unix_socket': args.unix_socket}
+    instances = random_instances(args.requests)
+    latencies = []
+
+    clients = [PredictionClient(**client_options) for _ in range(args.concurrency)]
+    for client in clients:
+        await client.connect()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(client, instances[i::args.concurrency], latencies) for i, client in enumerate(clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stats_client = PredictionClient(**client_options)
+    _, stats = await stats_client.request('GET', '/stats')
+    await stats_client.close()
+
+    return latencies, elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the interval prediction server')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix-socket', help='Connect to a Unix socket instead of TCP')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--requests', type=int, default=10000, help='Total predictions to send')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("Prediction Server Load Test")
+    print("="*60)
+    print(f"Target: {args.unix_socket or f'{args.host}:{args.port}'}")
+    print(f"Requests: {args.requests} over {args.concurrency} connections\n")
+
+    latencies, elapsed, stats = asyncio.run(run(args))
+    latencies_ms = np.array(latencies) * 1000
+
+    print(f"✓ {len(latencies)} predictions in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"  Client latency: p50 {np.percentile(latencies_ms, 50):.2f} ms, "
+          f"p99 {np.percentile(latencies_ms, 99):.2f} ms, max {latencies_ms.max():.2f} ms")
+
+    print(f"\nServer stats (all requests since start):")
+    print(f"  Batches: {stats['batches']} (mean {stats['meanBatchSize']:.1f} rows)")
+    print(f"  Server latency: p50 {stats['latencyMs']['p50']:.2f} ms, p99 {stats['latencyMs']['p99']:.2f} ms")
+    print(f"  Batch sizes: {stats['batchSizeHistogram']}")
+    print("="*60 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Scoring core of the ML prediction simulator
+
+Streams simulated users from MongoDB, builds features for their baseline
+reviews, scores them in batches and writes targeted $set updates back.
+Lives in an importable module so pool workers can unpickle the functions
+and tests can drive run_simulation() with a mongomock collection.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pymongo import UpdateOne
+
+from scripts.card_history import CardHistory, model_uses_history
+from scripts.feature_engine import build_feature_matrix, columns_from_samples, create_advanced_features
+from scripts.instrumentation import RunReport
+from scripts.numpy_runtime import NumpyIntervalModel
+from scripts.review_features import iter_baseline_review_features
+
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_CHUNK_USERS = 50
+DEFAULT_WRITE_BATCH = 500
+DEFAULT_CURSOR_BATCH = 100
+
+
+def load_model_and_stats(model_path='ml/saved-model', runtime='numpy', verbose=True):
+    """Load the model and normalization stats"""
+    if verbose:
+        print(f"Loading ML model ({runtime} runtime)...")
+
+    if runtime == 'numpy':
+        # Reads model.json + weight shards directly, no TensorFlow import
+        model = NumpyIntervalModel.load(model_path)
+    else:
+        # This requires: pip install tensorflowjs
+        import tensorflowjs as tfjs
+        model = tfjs.converters.load_keras_model(os.path.join(model_path, 'model.json'))
+
+    # Load normalization stats
+    stats_path = os.path.join(model_path, 'normalization-stats.json')
+    with open(stats_path, 'r') as f:
+        stats = json.load(f)
+
+    mean = np.array(stats['mean'], dtype=np.float32)
+    std = np.array(stats['std'], dtype=np.float32)
+
+    if verbose:
+        print(f"✓ Model loaded: {model.count_params()} parameters")
+        print(f"✓ Normalization stats loaded: {len(mean)} features")
+
+    return model, mean, std
+
+
+def predict_interval(model, mean, std, base_features, review_history=None, history=None):
+    """Make a prediction using the ML model (history: the card's CardHistory inputs, if the model reads them)"""
+    # Generate 51 advanced features (shared spec, same layout the model was trained on)
+    features = np.array(create_advanced_features({'features': base_features, 'history': history}),
+                        dtype=np.float32)
+
+    # Normalize
+    features_normalized = (features - mean) / (std + 1e-8)
+
+    # Reshape for model input
+    features_batch = features_normalized.reshape(1, -1)
+
+    # Predict
+    prediction = model.predict(features_batch, verbose=0)[0][0]
+
+    # Round to nearest day, minimum 1
+    interval = max(1, round(float(prediction)))
+
+    return interval
+
+
+def predict_intervals(model, mean, std, features, batch_size=DEFAULT_BATCH_SIZE):
+    """Predict intervals for a whole (n, 51) feature matrix in batched forward passes"""
+    features_normalized = (features - mean) / (std + 1e-8)
+
+    predictions = model.predict(features_normalized, batch_size=batch_size, verbose=0).reshape(-1)
+
+    # Round to nearest day, minimum 1
+    return np.maximum(1, np.round(predictions)).astype(int)
+
+
+def collect_review_samples(user, reviews_per_user, with_history=False):
+    """
+    Phase 1: build base features for every review of a user that will be converted
+
+    Returns (samples, targets) where samples[i] holds the features for the review
+    at targets[i] = (question_index, review_index, baseline_interval). With
+    with_history, samples also hold the card's history inputs, from a
+    CardHistory folded forward in the same pass.
+    """
+    samples = []
+    targets = []
+
+    questions = user.get('questions', [])
+
+    # Spread the per-user budget across questions
+    per_question = reviews_per_user // max(len(questions), 1)
+
+    for question_index, question in enumerate(questions):
+        review_history = question.get('reviewHistory', [])
+
+        # Only process reviews that used baseline, walking each history once
+        history = CardHistory() if with_history else None
+        for review_index, review, base_features in iter_baseline_review_features(review_history, per_question,
+                                                                                 history):
+            sample = {'features': base_features}
+            if history is not None:
+                sample['history'] = history.inputs()
+            samples.append(sample)
+            targets.append((question_index, review_index, review['intervalUsed']))
+
+    return samples, targets
+
+
+def ml_review_updates(targets, intervals):
+    """$set document that switches the given reviews to their ML interval"""
+    updates = {}
+
+    for (question_index, review_index, baseline_interval), ml_interval in zip(targets, intervals):
+        prefix = f'questions.{question_index}.reviewHistory.{review_index}.'
+        updates[prefix + 'algorithmUsed'] = 'ml'
+        updates[prefix + 'mlInterval'] = int(ml_interval)
+        updates[prefix + 'baselineInterval'] = baseline_interval
+        updates[prefix + 'intervalUsed'] = int(ml_interval)
+
+    return updates
+
+
+# Model loaded once per process (the main process or each pool worker)
+_MODEL_STATE = {}
+
+
+CACHE_COUNTERS = ('hits', 'misses', 'evictions', 'expirations')
+
+
+def _init_model(model_path, runtime, cache_size=0):
+    """Pool initializer: load the model and normalization stats once per process"""
+    model, mean, std = load_model_and_stats(model_path, runtime, verbose=False)
+    history = model_uses_history(model_path)
+    _MODEL_STATE.update(model=model, mean=mean, std=std, cached=None, history=history)
+
+    if cache_size:
+        from scripts.prediction_cache import CachedIntervalPredictor, PredictionCache, model_version
+        _MODEL_STATE['cached'] = CachedIntervalPredictor(model, mean, std, model_version(model_path),
+                                                         PredictionCache(cache_size), history=history)
+
+
+def score_user_chunk(users, reviews_per_user, batch_size, report=None):
+    """
+    Build features and run one batched forward pass for a chunk of users
+
+    Runs inside a pool worker. Returns (results, timings, cache_counts) with
+    one (user_id, username, updates, ml_count) tuple per user; cache_counts
+    holds this chunk's prediction-cache hits/misses/evictions, or None.
+    The featurize and predict stages are timed on report when one is passed
+    (in-process runs, so they can be profiled); otherwise timings maps each
+    stage to its (wall, cpu) seconds.
+    """
+    chunk_report = report or RunReport('chunk')
+    cached = _MODEL_STATE.get('cached')
+    before = [getattr(cached.cache, name) for name in CACHE_COUNTERS] if cached else None
+
+    samples = []
+    owners = []
+    per_user_targets = []
+    columns = features = None
+
+    with chunk_report.stage('featurize'):
+        # Phase 1: collect feature rows for the whole chunk
+        for user_index, user in enumerate(users):
+            user_samples, user_targets = collect_review_samples(user, reviews_per_user, _MODEL_STATE['history'])
+            samples.extend(user_samples)
+            owners.extend([user_index] * len(user_samples))
+            per_user_targets.append(user_targets)
+
+        if samples:
+            columns = columns_from_samples(samples)
+            if not cached:
+                features = build_feature_matrix(columns)
+
+    # Phase 2: one batched forward pass
+    intervals = np.empty(0, dtype=int)
+    with chunk_report.stage('predict'):
+        if samples and cached:
+            # Only feature vectors not seen before (after quantization) reach the model
+            intervals = cached.predict_rows(np.column_stack([columns[name] for name in cached.inputs]))
+        elif samples:
+            intervals = predict_intervals(_MODEL_STATE['model'], _MODEL_STATE['mean'], _MODEL_STATE['std'],
+                                          features, batch_size)
+
+    timings = None
+    if report is None:
+        timings = {name: (totals['wallSeconds'], totals['cpuSeconds'])
+                   for name, totals in chunk_report.stages.items()}
+
+    cache_counts = None
+    if cached:
+        cache_counts = {name: getattr(cached.cache, name) - count for name, count in zip(CACHE_COUNTERS, before)}
+
+    results = []
+    offset = 0
+    for user, user_targets in zip(users, per_user_targets):
+        user_intervals = intervals[offset:offset + len(user_targets)]
+        offset += len(user_targets)
+
+        results.append((user['_id'], user.get('username'),
+                        ml_review_updates(user_targets, user_intervals), len(user_targets)))
+
+    return results, timings, cache_counts
+
+
+def iter_user_chunks(cursor, chunk_users):
+    """Group a streaming cursor into lists of at most chunk_users documents"""
+    chunk = []
+    for user in cursor:
+        chunk.append(user)
+        if len(chunk) >= chunk_users:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bounded_map(executor, fn, chunks, window, *args):
+    """executor.map that keeps at most `window` chunks in flight, so memory stays flat"""
+    in_flight = deque()
+
+    for chunk in chunks:
+        in_flight.append(executor.submit(fn, chunk, *args))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def run_simulation(users_collection, num_users=3, reviews_per_user=50,
+                   batch_size=DEFAULT_BATCH_SIZE, chunk_users=DEFAULT_CHUNK_USERS,
+                   workers=0, write_batch=DEFAULT_WRITE_BATCH, cursor_batch=DEFAULT_CURSOR_BATCH,
+                   model_path='ml/saved-model', runtime='numpy', cache_size=0, report=None):
+    """
+    Stream sim_ users from users_collection, score them and write back the ML intervals
+
+    users_collection can be a pymongo or mongomock collection. workers=0 scores
+    in this process; otherwise chunks of users are fanned out to a process pool.
+    Only the changed reviewHistory entries are written, with targeted $set
+    updates grouped into unordered bulk_write batches. cache_size > 0 puts a
+    PredictionCache (scripts/prediction_cache.py) in front of the model in
+    every process (keyed on history inputs too when the model reads them).
+
+    report, a scripts.instrumentation.RunReport, gets db_read, featurize,
+    predict and db_write stages (with workers, featurize/predict are summed
+    over the workers and cannot be profiled).
+
+    Returns a dict with users, predictions, writes and timing totals (plus
+    summed cache counters when the cache is on).
+    """
+    report = report or RunReport('simulation')
+
+    cursor = users_collection.find(
+        {'username': {'$regex': '^sim_'}},
+        projection={'username': 1, 'questions.reviewHistory': 1},
+        batch_size=cursor_batch
+    )
+    if num_users:
+        cursor = cursor.limit(num_users)
+
+    chunks = report.iter_stage('db_read', iter_user_chunks(cursor, chunk_users))
+
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_model,
+                                       initargs=(model_path, runtime, cache_size))
+        results = _bounded_map(executor, score_user_chunk, chunks, workers * 2,
+                               reviews_per_user, batch_size)
+    else:
+        _init_model(model_path, runtime, cache_size)
+        results = (score_user_chunk(chunk, reviews_per_user, batch_size, report) for chunk in chunks)
+
+    totals = {'users': 0, 'predictions': 0, 'writes': 0, 'predictSeconds': 0.0}
+    if cache_size:
+        totals['cache'] = dict.fromkeys(CACHE_COUNTERS, 0)
+    pending = []
+
+    def flush():
+        if pending:
+            with report.stage('db_write'):
+                users_collection.bulk_write(pending, ordered=False)
+            totals['writes'] += len(pending)
+            pending.clear()
+
+    try:
+        for chunk_results, timings, cache_counts in results:
+            for stage, (wall_seconds, cpu_seconds) in (timings or {}).items():
+                report.add(stage, wall_seconds, cpu_seconds)
+            for name, count in (cache_counts or {}).items():
+                totals['cache'][name] += count
+
+            for user_id, username, updates, ml_count in chunk_results:
+                if updates:
+                    pending.append(UpdateOne({'_id': user_id}, {'$set': updates}))
+
+                print(f"📊 {username}: generated {ml_count} ML predictions")
+                totals['users'] += 1
+                totals['predictions'] += ml_count
+
+            if len(pending) >= write_batch:
+                flush()
+
+        flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    totals['predictSeconds'] = report.stages.get('predict', {}).get('wallSeconds', 0.0)
+    return totals
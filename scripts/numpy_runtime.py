@@ -0,0 +1,175 @@
+"""
+Pure-NumPy inference runtime for the TF.js layers model
+
+Loads ml/saved-model/model.json and its weight shards directly, without
+TensorFlow or tensorflowjs. Weight shards are memory-mapped, BatchNormalization
+is folded into the next Dense layer and Dropout is dropped, so inference is a
+short stack of matmuls.
+
+Usage:
+    from scripts.numpy_runtime import NumpyIntervalModel
+
+    model = NumpyIntervalModel.load('ml/saved-model')
+    intervals = model.predict(features_normalized)   # (n, 1) float32
+"""
+
+import json
+import os
+
+import numpy as np
+
+from scripts.tfjs_export import dequantize
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'softplus': lambda x: np.logaddexp(0, x),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh
+}
+
+# Layers that are identity at inference time
+PASSTHROUGH_LAYERS = {'InputLayer', 'Dropout', 'GaussianDropout', 'GaussianNoise', 'AlphaDropout'}
+
+
+def load_weights(model_path, manifest):
+    """
+    Map every weight in the manifest to a NumPy array, memory-mapping the shards
+
+    Quantized weights (float16, uint8/uint16 affine) are dequantized to float32.
+    """
+    weights = {}
+
+    for group in manifest:
+        shard_paths = [os.path.join(model_path, path) for path in group['paths']]
+
+        if len(shard_paths) == 1:
+            buffer = np.memmap(shard_paths[0], dtype=np.uint8, mode='r')
+        else:
+            # Weights may straddle shard boundaries, so join the group first
+            buffer = np.concatenate([np.fromfile(path, dtype=np.uint8) for path in shard_paths])
+
+        offset = 0
+        for spec in group['weights']:
+            quantization = spec.get('quantization')
+            dtype = np.dtype(quantization['dtype'] if quantization else spec['dtype'])
+            size = int(np.prod(spec['shape'], dtype=np.int64))
+            nbytes = size * dtype.itemsize
+
+            values = buffer[offset:offset + nbytes].view(dtype).reshape(spec['shape'])
+            if quantization:
+                values = dequantize(values, quantization)
+
+            weights[spec['name']] = values
+            offset += nbytes
+
+    return weights
+
+
+def layer_configs(topology):
+    """Return the Sequential layer list from a Keras 2 or Keras 3 topology"""
+    model_config = topology.get('model_config', topology)
+    config = model_config['config']
+    return config['layers'] if isinstance(config, dict) else config
+
+
+def _weight(weights, layer_name, weight_name):
+    return weights.get(f'{layer_name}/{weight_name}')
+
+
+class NumpyIntervalModel:
+    """Dense/BatchNorm/Dropout Sequential model evaluated with NumPy"""
+
+    def __init__(self, layers):
+        # Each layer is (kernel, bias, activation_name)
+        self.layers = layers
+
+    @classmethod
+    def load(cls, model_path='ml/saved-model'):
+        """Parse model.json and weights and build the folded layer stack"""
+        with open(os.path.join(model_path, 'model.json'), 'r') as f:
+            model_data = json.load(f)
+
+        weights = load_weights(model_path, model_data['weightsManifest'])
+
+        layers = []
+        pending_scale = None  # BatchNorm affine waiting to be folded into the next Dense
+        pending_shift = None
+
+        for layer in layer_configs(model_data['modelTopology']):
+            class_name = layer['class_name']
+            config = layer['config']
+            name = config['name']
+
+            if class_name in PASSTHROUGH_LAYERS:
+                continue
+
+            if class_name == 'Dense':
+                kernel = np.asarray(_weight(weights, name, 'kernel'), dtype=np.float32)
+                bias = _weight(weights, name, 'bias')
+                bias = np.zeros(kernel.shape[1], dtype=np.float32) if bias is None else np.asarray(bias, dtype=np.float32)
+
+                if pending_scale is not None:
+                    # (x * scale + shift) @ W + b == x @ (scale[:, None] * W) + (shift @ W + b)
+                    bias = pending_shift @ kernel + bias
+                    kernel = pending_scale[:, None] * kernel
+                    pending_scale = pending_shift = None
+
+                activation = config.get('activation', 'linear')
+                if activation not in ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation '{activation}' in layer {name}")
+
+                layers.append((kernel.astype(np.float32), bias.astype(np.float32), activation))
+
+            elif class_name == 'BatchNormalization':
+                mean = np.asarray(_weight(weights, name, 'moving_mean'), dtype=np.float32)
+                variance = np.asarray(_weight(weights, name, 'moving_variance'), dtype=np.float32)
+                gamma = _weight(weights, name, 'gamma')
+                beta = _weight(weights, name, 'beta')
+
+                gamma = np.ones_like(mean) if gamma is None else np.asarray(gamma, dtype=np.float32)
+                beta = np.zeros_like(mean) if beta is None else np.asarray(beta, dtype=np.float32)
+
+                scale = gamma / np.sqrt(variance + config.get('epsilon', 1e-3))
+                shift = beta - mean * scale
+
+                if pending_scale is not None:
+                    scale, shift = pending_scale * scale, pending_shift * scale + shift
+
+                pending_scale, pending_shift = scale, shift
+
+            else:
+                raise ValueError(f"Unsupported layer type '{class_name}' ({name})")
+
+        if pending_scale is not None:
+            # Trailing BatchNorm with no Dense after it: keep it as a diagonal layer
+            layers.append((np.diag(pending_scale).astype(np.float32), pending_shift.astype(np.float32), 'linear'))
+
+        return cls(layers)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        """Forward pass on a (n, num_features) matrix; returns (n, 1) like keras predict"""
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+
+        if batch_size is None or len(x) <= batch_size:
+            return self._forward(x)
+
+        return np.concatenate([
+            self._forward(x[start:start + batch_size])
+            for start in range(0, len(x), batch_size)
+        ])
+
+    def _forward(self, x):
+        for kernel, bias, activation in self.layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        return x
+
+    def count_params(self):
+        """Parameter count of the folded model"""
+        return sum(kernel.size + bias.size for kernel, bias, _ in self.layers)
+
+    @property
+    def input_dim(self):
+        return self.layers[0][0].shape[0]
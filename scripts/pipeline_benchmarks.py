@@ -0,0 +1,424 @@
+"""
+End-to-end benchmarks for the Python ML pipeline
+
+Times each hot path on generated data at several scales and writes one
+machine-readable JSON report per run, so runs can be compared across
+commits. Every result has a `seconds` value (lower is better) that
+compare_results() checks against a baseline report.
+
+Benchmarks (rows are capped per benchmark, see MAX_ROWS; `rows` in each
+result is what was actually measured):
+
+    features          advanced_feature_matrix (history inputs + 51 features, as the
+                      trainer builds them), in CHUNK_ROWS chunks
+    json_load         stream_training_data on an extract-schema JSON export
+    columnar_load     load_store + reading every column of a columnar store
+    normalization     normalization_stats + normalizing the feature matrix
+    training          Keras training steps/sec (needs TensorFlow)
+    single_inference  predict_interval latency per call (median)
+    batch_inference   predict_intervals rows/sec, in CHUNK_ROWS chunks
+    simulator         score_user_chunk (feature collection + scoring) reviews/sec
+
+Usage:
+    from scripts.pipeline_benchmarks import compare_results, regressions, run_benchmarks
+
+    report = run_benchmarks(scales=['1k', '100k'])
+    slower = regressions(compare_results(report, baseline_report), threshold=0.25)
+"""
+
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from scripts.feature_spec import BASE_FEATURES, FEATURE_SPEC_VERSION
+
+FORMAT_VERSION = 1
+SCALES = {'1k': 1000, '100k': 100000, '10m': 10000000}
+DEFAULT_SCALES = ('1k', '100k')
+BENCHMARKS = ('features', 'json_load', 'columnar_load', 'normalization', 'training',
+              'single_inference', 'batch_inference', 'simulator')
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25  # Fail when a benchmark gets more than 25% slower
+DEFAULT_OUTPUT_DIR = 'ml/benchmarks'
+
+CHUNK_ROWS = 1000000
+
+# Largest row count each benchmark runs at; bigger scales are capped, not skipped
+MAX_ROWS = {
+    'json_load': 1000000,  # ~300 MB of JSON
+    'normalization': 2000000,  # (rows, 51) float32 held in memory
+    'training': 100000,
+    'single_inference': 2000,
+    'simulator': 200000
+}
+
+TRAIN_EPOCHS = 3
+TRAIN_BATCH_SIZE = 32
+SIMULATOR_QUESTIONS = 20
+SIMULATOR_REVIEWS_PER_QUESTION = 25
+
+
+def synthetic_columns(n, seed=42):
+    """Generated base features, optimalInterval targets, user/question codes and timestamps"""
+    rng = np.random.default_rng(seed)
+
+    total_reviews = rng.integers(1, 60, n)
+    success_rate = rng.beta(4, 1.5, n)
+    columns = {
+        'memoryStrength': rng.integers(0, 10, n).astype(np.float64),
+        'difficultyRating': np.clip(1 - success_rate + rng.normal(0, 0.1, n), 0, 1),
+        'timeSinceLastReview': rng.exponential(4, n),
+        'successRate': success_rate,
+        'averageResponseTime': rng.lognormal(8, 0.5, n),  # ms, median ~3 s
+        'totalReviews': total_reviews.astype(np.float64),
+        'consecutiveCorrect': rng.integers(0, total_reviews + 1).astype(np.float64),
+        'timeOfDay': rng.integers(0, 24, n) / 24
+    }
+
+    optimal = 1 + columns['memoryStrength'] * success_rate * 3 + rng.normal(0, 1, n)
+    return {
+        'columns': columns,
+        'y': np.clip(np.round(optimal), 1, 180).astype(np.float32),
+        'user': rng.integers(0, max(1, n // 200), n).astype(np.int32),
+        'timestamp': 1.7e12 + rng.uniform(0, 365 * 86400000, n),
+        'question': rng.integers(0, SIMULATOR_QUESTIONS, n).astype(np.int32)
+    }
+
+
+def iter_synthetic_chunks(n, chunk_rows=CHUNK_ROWS, seed=42):
+    """synthetic_columns() for n rows in chunks of at most chunk_rows"""
+    for index, start in enumerate(range(0, n, chunk_rows)):
+        yield synthetic_columns(min(chunk_rows, n - start), seed + index)
+
+
+def base_matrix(columns):
+    return np.column_stack([columns[name] for name in BASE_FEATURES]).astype(np.float32)
+
+
+def feature_matrix(chunk):
+    """(n, 51) matrix of a synthetic chunk, built like the trainer's advanced feature set"""
+    from scripts.trainer import advanced_feature_matrix
+    from scripts.training_store import TrainingData
+
+    labels = np.column_stack([chunk['y'], chunk['y'], np.ones(len(chunk['y']))])
+    return advanced_feature_matrix(TrainingData(base_matrix(chunk['columns']), labels, chunk['timestamp'],
+                                                chunk['user'], chunk['question'], [], []))
+
+
+def write_json_export(path, n, seed=42):
+    """extract-training-data.js style JSON export with n samples"""
+    with open(path, 'w') as f:
+        f.write('[')
+        first = True
+        for chunk in iter_synthetic_chunks(n, 100000, seed):
+            base = base_matrix(chunk['columns']).tolist()
+            for row, y, user, timestamp in zip(base, chunk['y'].tolist(), chunk['user'].tolist(),
+                                               chunk['timestamp'].tolist()):
+                sample = {
+                    'features': dict(zip(BASE_FEATURES, row)),
+                    'label': {'optimalInterval': y, 'actualInterval': y, 'recalled': True},
+                    'metadata': {'userId': f'user{user}', 'question': 'q', 'timestamp': timestamp}
+                }
+                f.write(('' if first else ',') + json.dumps(sample))
+                first = False
+        f.write(']')
+
+
+def write_store(path, n, seed=42):
+    """Columnar training store (scripts/training_store.py) with n samples"""
+    from scripts.training_store import TrainingStoreWriter
+
+    with TrainingStoreWriter(path) as writer:
+        for chunk in iter_synthetic_chunks(n, seed=seed):
+            rows = len(chunk['y'])
+            labels = np.column_stack([chunk['y'], chunk['y'], np.ones(rows)])
+            writer.append_arrays(base_matrix(chunk['columns']), labels, chunk['timestamp'],
+                                 chunk['user'], np.zeros(rows, dtype=np.int32))
+
+
+def synthetic_users(num_reviews, seed=42):
+    """Simulator user documents with num_reviews baseline reviews in total"""
+    rng = np.random.default_rng(seed)
+    per_user = SIMULATOR_QUESTIONS * SIMULATOR_REVIEWS_PER_QUESTION
+    start = datetime(2025, 1, 1)
+    users = []
+
+    for user_index in range(max(1, num_reviews // per_user)):
+        recalled = (rng.random(per_user) < 0.75).tolist()
+        response_times = rng.integers(800, 8000, per_user).tolist()
+        intervals = rng.integers(1, 30, per_user).tolist()
+        hours = rng.integers(0, 12, per_user).tolist()
+
+        questions = []
+        for q in range(SIMULATOR_QUESTIONS):
+            offset = q * SIMULATOR_REVIEWS_PER_QUESTION
+            questions.append({'reviewHistory': [{
+                'timestamp': start + timedelta(hours=12 * i + hours[offset + i]),
+                'recalled': recalled[offset + i],
+                'responseTime': response_times[offset + i],
+                'intervalUsed': intervals[offset + i],
+                'algorithmUsed': 'baseline'
+            } for i in range(SIMULATOR_REVIEWS_PER_QUESTION)]})
+
+        users.append({'_id': user_index, 'username': f'sim_{user_index}', 'questions': questions})
+
+    return users
+
+
+def best_of(fn, repeat):
+    """(best seconds, last return value) over repeat calls"""
+    best, value = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def _result(rows, seconds, **extra):
+    return {'rows': rows, 'seconds': seconds, 'rowsPerSecond': rows / seconds if seconds else 0.0, **extra}
+
+
+def bench_features(n, repeat, context):
+    # Timed chunk by chunk, so only one chunk's matrices are in memory at 10M rows
+    seconds = 0.0
+    for chunk in iter_synthetic_chunks(n):
+        chunk_seconds, _ = best_of(lambda: feature_matrix(chunk), repeat)
+        seconds += chunk_seconds
+    return _result(n, seconds)
+
+
+def bench_json_load(n, repeat, context):
+    from scripts.json_stream import stream_training_data
+
+    path = os.path.join(context['workdir'], f'export-{n}.json')
+    write_json_export(path, n)
+    seconds, _ = best_of(lambda: stream_training_data(path), repeat)
+    return _result(n, seconds, fileBytes=os.path.getsize(path))
+
+
+def bench_columnar_load(n, repeat, context):
+    from scripts.training_store import load_store
+
+    path = os.path.join(context['workdir'], f'store-{n}.columns')
+    write_store(path, n)
+
+    def load():
+        data = load_store(path)
+        return sum(float(np.asarray(column).sum()) for column in (data.base, data.labels, data.timestamp))
+
+    seconds, _ = best_of(load, repeat)
+    return _result(n, seconds)
+
+
+def bench_normalization(n, repeat, context):
+    from scripts.trainer import normalization_stats
+
+    X = np.concatenate([feature_matrix(chunk) for chunk in iter_synthetic_chunks(n)])
+
+    def normalize():
+        mean, std = normalization_stats(X)
+        return (X - mean) / std
+
+    seconds, _ = best_of(normalize, repeat)
+    return _result(n, seconds)
+
+
+def bench_training(n, repeat, context):
+    """Steps/sec of the 'large' architecture; seconds is the time per training step"""
+    try:
+        from scripts.trainer import build_model, import_keras
+        _, keras = import_keras()
+        from scripts.training_pipeline import StepsPerSecond
+    except ImportError as error:
+        return {'skipped': f'TensorFlow not available ({error})'}
+
+    data = synthetic_columns(n)
+    X = feature_matrix(data)
+    X = (X - X.mean(axis=0)) / (X.std(axis=0) + 1e-8)
+    keras.utils.set_random_seed(42)
+
+    model = build_model(X.shape[1], 'large')
+    throughput = StepsPerSecond(TRAIN_BATCH_SIZE)
+    model.fit(X, data['y'], batch_size=TRAIN_BATCH_SIZE, epochs=TRAIN_EPOCHS + 1,
+              callbacks=[throughput], verbose=0)
+    throughput.epochs = throughput.epochs[1:]  # Drop the first epoch (graph tracing)
+
+    summary = throughput.summary()
+    seconds = 1 / summary['stepsPerSecond'] if summary['stepsPerSecond'] else 0.0
+    return {'rows': n, 'seconds': seconds, 'rowsPerSecond': summary['samplesPerSecond'],
+            'stepsPerSecond': summary['stepsPerSecond'], 'batchSize': TRAIN_BATCH_SIZE}
+
+
+def bench_single_inference(n, repeat, context):
+    """Median predict_interval latency; seconds is per call"""
+    from scripts.ml_simulation import predict_interval
+
+    if context['model'] is None:
+        return {'skipped': context['model_error']}
+    model, mean, std = context['model']
+
+    base = base_matrix(synthetic_columns(n)['columns']).astype(np.float64)
+    rows = [dict(zip(BASE_FEATURES, row)) for row in base.tolist()]
+
+    best = None
+    for _ in range(repeat):
+        latencies = []
+        for features in rows:
+            start = time.perf_counter()
+            predict_interval(model, mean, std, features)
+            latencies.append(time.perf_counter() - start)
+        latencies = np.array(latencies)
+        if best is None or np.median(latencies) < np.median(best):
+            best = latencies
+
+    median = float(np.median(best))
+    return {'rows': n, 'seconds': median, 'rowsPerSecond': 1 / median if median else 0.0,
+            'p99Seconds': float(np.percentile(best, 99))}
+
+
+def bench_batch_inference(n, repeat, context):
+    from scripts.ml_simulation import predict_intervals
+
+    if context['model'] is None:
+        return {'skipped': context['model_error']}
+    model, mean, std = context['model']
+
+    seconds = 0.0
+    for chunk in iter_synthetic_chunks(n):
+        X = feature_matrix(chunk)
+        chunk_seconds, _ = best_of(lambda: predict_intervals(model, mean, std, X), repeat)
+        seconds += chunk_seconds
+    return _result(n, seconds)
+
+
+def bench_simulator(n, repeat, context):
+    from scripts.ml_simulation import _init_model, score_user_chunk
+
+    if context['model'] is None:
+        return {'skipped': context['model_error']}
+    _init_model(context['model_path'], 'numpy')
+
+    users = synthetic_users(n)
+    reviews = SIMULATOR_QUESTIONS * SIMULATOR_REVIEWS_PER_QUESTION
+    chunks = [users[i:i + 50] for i in range(0, len(users), 50)]
+
+    seconds, _ = best_of(lambda: [score_user_chunk(chunk, reviews, 4096) for chunk in chunks], repeat)
+    return _result(len(users) * reviews, seconds, users=len(users))
+
+
+BENCHMARK_FUNCTIONS = {
+    'features': bench_features,
+    'json_load': bench_json_load,
+    'columnar_load': bench_columnar_load,
+    'normalization': bench_normalization,
+    'training': bench_training,
+    'single_inference': bench_single_inference,
+    'batch_inference': bench_batch_inference,
+    'simulator': bench_simulator
+}
+
+
+def git_commit():
+    """(commit hash, dirty) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def environment():
+    info = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+    try:
+        import tensorflow as tf
+        info['tensorflow'] = tf.__version__
+    except ImportError:
+        info['tensorflow'] = None
+    return info
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, benchmarks=BENCHMARKS, repeat=DEFAULT_REPEAT,
+                   model_path='ml/saved-model', on_result=None):
+    """
+    Run every benchmark at every scale; returns the report dict
+
+    Results are keyed '<benchmark>@<scale>'. Benchmarks that cannot run here
+    (no TensorFlow, no saved model) get a 'skipped' reason instead of timings.
+    """
+    from scripts.ml_simulation import load_model_and_stats
+
+    context = {'model': None, 'model_error': None, 'model_path': model_path}
+    try:
+        context['model'] = load_model_and_stats(model_path, verbose=False)
+    except (OSError, ValueError) as error:
+        context['model_error'] = f'No model at {model_path} ({error})'
+
+    commit, dirty = git_commit()
+    report = {
+        'suite': 'python-pipeline',
+        'formatVersion': FORMAT_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'createdAt': datetime.now().isoformat(),
+        'featureSpecVersion': FEATURE_SPEC_VERSION,
+        'repeat': repeat,
+        'environment': environment(),
+        'results': {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix='pipeline-bench-') as workdir:
+        context['workdir'] = workdir
+
+        for scale in scales:
+            for name in benchmarks:
+                rows = min(SCALES[scale], MAX_ROWS.get(name, SCALES[scale]))
+                result = {'benchmark': name, 'scale': scale, **BENCHMARK_FUNCTIONS[name](rows, repeat, context)}
+                report['results'][f'{name}@{scale}'] = result
+                if on_result:
+                    on_result(result)
+
+    return report
+
+
+def compare_results(report, baseline):
+    """
+    Compare a report against a baseline report
+
+    Returns [(key, baseline seconds, current seconds, change)] for every
+    benchmark measured in both at the same row count, where change is the
+    relative slowdown (0.3 = 30% slower).
+    """
+    comparisons = []
+
+    for key, result in report['results'].items():
+        previous = baseline.get('results', {}).get(key)
+        if not previous or 'seconds' not in result or 'seconds' not in previous:
+            continue
+        if result['rows'] != previous['rows'] or not previous['seconds']:
+            continue
+
+        change = result['seconds'] / previous['seconds'] - 1
+        comparisons.append((key, previous['seconds'], result['seconds'], change))
+
+    return comparisons
+
+
+def regressions(comparisons, threshold=DEFAULT_THRESHOLD):
+    """compare_results() entries that got more than threshold slower"""
+    return [comparison for comparison in comparisons if comparison[3] > threshold]
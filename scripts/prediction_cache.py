@@ -0,0 +1,206 @@
+"""
+Memoizing cache in front of interval prediction
+
+Base features are quantized to a per-feature resolution (RESOLUTION) and
+the quantized vector, tagged with the model version, is the cache key. For
+a model that reads history inputs (scripts/card_history.py) they are
+quantized too (HISTORY_RESOLUTION) and appended to the key. On a miss the
+model scores the quantized (bucket) values, so every request that lands in
+a bucket gets the same interval, whatever order they arrive in.
+
+The version tag combines modelVersion and trainedDate from metadata.json, so
+entries from before a retrain can never be returned for the new model.
+
+Usage:
+    from scripts.prediction_cache import CachedIntervalPredictor
+
+    predictor = CachedIntervalPredictor.load('ml/saved-model', max_entries=100000, ttl_seconds=3600)
+    predictor.predict_interval(base_features)     # one card
+    predictor.predict_rows(rows)                  # (n, len(predictor.inputs)) matrix
+    predictor.cache.stats()                       # hits, misses, evictions, hitRate, ...
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from scripts.card_history import model_uses_history
+from scripts.feature_engine import build_feature_matrix
+from scripts.feature_spec import BASE_FEATURES, HISTORY_INPUTS
+
+DEFAULT_MAX_ENTRIES = 100000
+
+# Quantization step per base feature (same units as the exported features)
+RESOLUTION = {
+    'memoryStrength': 0.01,
+    'difficultyRating': 0.01,
+    'timeSinceLastReview': 0.01,  # days (~15 minutes)
+    'successRate': 0.01,
+    'averageResponseTime': 10,  # ms
+    'totalReviews': 1,
+    'consecutiveCorrect': 1,
+    'timeOfDay': 1 / 96  # 15 minutes
+}
+
+# Quantization step per history input, for models that read them. Coarser
+# than the base features: these are smoothed aggregates, and fine steps on
+# eight more dimensions would leave almost no two requests sharing a key
+HISTORY_RESOLUTION = {
+    'historyReviews': 1,
+    'emaRecall': 0.02,
+    'emaResponseTime': 100,  # ms
+    'emaDifficulty': 0.02,
+    'emaInterval': 0.1,  # days
+    'historySpan': 1,  # days
+    'recentSuccessRate': 0.01,  # Multiples of 1 / HISTORY_WINDOW, so exact
+    'recentDifficultySlope': 0.01
+}
+
+
+def version_tag(metadata):
+    """'<modelVersion>@<trainedDate>'; trainedDate changes on every retrain"""
+    return f"{metadata.get('modelVersion', 'unknown')}@{metadata.get('trainedDate', '')}"
+
+
+def model_version(model_path='ml/saved-model'):
+    """version_tag() of a model directory's metadata.json ('unknown' if missing)"""
+    metadata_path = os.path.join(model_path, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        return 'unknown'
+
+    with open(metadata_path, 'r') as f:
+        return version_tag(json.load(f))
+
+
+def parse_resolution(text):
+    """RESOLUTION / HISTORY_RESOLUTION overrides from 'name=step,name=step' (e.g. a CLI flag)"""
+    resolution = {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, step = item.partition('=')
+        if name not in RESOLUTION and name not in HISTORY_RESOLUTION:
+            raise ValueError(f"Unknown base feature or history input '{name}' in cache resolution")
+        resolution[name] = float(step)
+    return resolution
+
+
+class PredictionCache:
+    """LRU cache with an optional TTL and hit/miss/eviction counters"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped to stay within max_entries
+        self.expirations = 0  # Dropped because their TTL ran out
+
+    def get(self, key):
+        """Cached value or None; counts a hit or a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or self.clock() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxEntries': self.max_entries,
+            'ttlSeconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hitRate': self.hits / lookups if lookups else 0.0
+        }
+
+
+class CachedIntervalPredictor:
+    """
+    predict_interval / predict_intervals with a PredictionCache in front
+
+    Rows hold the base features, followed by the history inputs when history
+    is True (self.inputs is the column order).
+    """
+
+    def __init__(self, model, mean, std, version, cache=None, resolution=None, history=False):
+        self.model = model
+        self.mean = mean
+        self.std = std
+        self.version = version
+        self.cache = cache if cache is not None else PredictionCache()
+        self.inputs = BASE_FEATURES + HISTORY_INPUTS if history else BASE_FEATURES
+        steps = {**RESOLUTION, **HISTORY_RESOLUTION, **(resolution or {})}
+        self.steps = np.array([steps[name] for name in self.inputs], dtype=np.float64)
+
+    @classmethod
+    def load(cls, model_path='ml/saved-model', runtime='numpy', resolution=None, **cache_options):
+        from scripts.ml_simulation import load_model_and_stats
+
+        model, mean, std = load_model_and_stats(model_path, runtime, verbose=False)
+        return cls(model, mean, std, model_version(model_path), PredictionCache(**cache_options), resolution,
+                   model_uses_history(model_path))
+
+    def predict_rows(self, rows):
+        """Intervals for a (n, len(self.inputs)) matrix; only unseen buckets hit the model"""
+        from scripts.ml_simulation import predict_intervals
+
+        codes = np.round(np.asarray(rows, dtype=np.float64) / self.steps).astype(np.int64)
+        intervals = np.empty(len(codes), dtype=int)
+
+        missing = {}  # key -> row indices, deduplicated within the batch
+        for i, code in enumerate(map(tuple, codes.tolist())):
+            key = (self.version, code)
+            value = self.cache.get(key)
+            if value is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                intervals[i] = value
+
+        if missing:
+            keys = list(missing)
+            snapped = np.array([code for _, code in keys], dtype=np.float64) * self.steps
+            columns = {name: snapped[:, j] for j, name in enumerate(self.inputs)}
+            predicted = predict_intervals(self.model, self.mean, self.std,
+                                          build_feature_matrix(columns), batch_size=len(keys))
+
+            for key, value in zip(keys, predicted):
+                value = int(value)
+                self.cache.put(key, value)
+                intervals[missing[key]] = value
+
+        return intervals
+
+    def predict_interval(self, base_features, history=None):
+        """Interval for one base-feature dict (and history inputs), like ml_simulation.predict_interval"""
+        values = {**dict.fromkeys(HISTORY_INPUTS, 0.0), **(history or {}), **base_features}
+        row = np.array([[float(values[name]) for name in self.inputs]])
+        return int(self.predict_rows(row)[0])
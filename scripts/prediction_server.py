@@ -0,0 +1,393 @@
+"""
+Micro-batching asyncio prediction server for interval inference
+
+Loads ml/saved-model once and serves predictions over HTTP/1.1 on a TCP port
+or a Unix socket (stdlib asyncio only). Concurrent requests are queued and
+flushed as one vectorized feature build + forward pass when either
+max_batch_size rows are waiting or the oldest has waited max_wait_ms.
+
+Endpoints:
+    POST /predict   {"features": {...8 base features...}}   -> {"interval": 3}
+                    {"instances": [{...}, {...}]}            -> {"intervals": [3, 7]}
+                    A model trained with history inputs (feature spec 1.1.0+)
+                    also reads the card's history inputs from each instance
+                    (scripts/card_history.py; missing ones are 0, no history)
+    GET  /stats     request/batch counters, latency p50/p90/p99 (ms), a
+                    batch-size histogram and prediction-cache counters
+    GET  /health    {"status": "ok", "modelVersion": ...}
+
+Usage:
+    from scripts.prediction_cache import PredictionCache
+    from scripts.prediction_server import PredictionServer
+
+    server = PredictionServer.load('ml/saved-model', max_batch_size=256, max_wait_ms=2,
+                                   cache=PredictionCache(max_entries=100000))   # cache is optional
+    asyncio.run(server.serve(port=8765))          # or serve(unix_socket='/tmp/intervals.sock')
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from scripts.card_history import uses_history
+from scripts.feature_engine import build_feature_matrix
+from scripts.feature_spec import BASE_FEATURES, HISTORY_INPUTS
+from scripts.ml_simulation import load_model_and_stats, predict_intervals
+from scripts.prediction_cache import CachedIntervalPredictor, version_tag
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+LATENCY_WINDOW = 10000  # Most recent request latencies kept for percentiles
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024  # StreamReader limit; a longer request head gets a 431
+
+
+class LatencyStats:
+    """Request latencies (sliding window) and a power-of-two batch-size histogram"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.batch_histogram = {}
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def record_request(self, seconds):
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def record_batch(self, rows):
+        self.batches += 1
+        self.rows += rows
+        bucket = 1 << max(0, (rows - 1).bit_length())  # Smallest power of two >= rows
+        self.batch_histogram[bucket] = self.batch_histogram.get(bucket, 0) + 1
+
+    def snapshot(self):
+        latencies_ms = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+
+        return {
+            'uptimeSeconds': time.time() - self.started,
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'meanBatchSize': self.rows / self.batches if self.batches else 0.0,
+            'latencyMs': {
+                'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+                'max': float(latencies_ms.max()), 'window': len(self.latencies)
+            },
+            'batchSizeHistogram': {f'<={bucket}': count for bucket, count in sorted(self.batch_histogram.items())}
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submit() calls into batched calls of predict_fn
+
+    predict_fn takes a (n, 8) float64 base-feature matrix and returns n
+    intervals. It runs on the event loop thread, which is fine for a forward
+    pass that takes well under a millisecond per batch.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, stats=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or LatencyStats()
+        self._pending = []  # (rows, future)
+        self._pending_rows = 0
+        self._timer = None
+
+    async def submit(self, rows):
+        """Queue a (k, 8) matrix; resolves to its k intervals once its batch has run"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((rows, future))
+        self._pending_rows += len(rows)
+
+        if self._pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        batch = np.concatenate([rows for rows, _ in pending])
+
+        try:
+            intervals = self.predict_fn(batch)
+        except Exception as error:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.stats.record_batch(len(batch))
+
+        offset = 0
+        for rows, future in pending:
+            if not future.done():  # The client may have gone away
+                future.set_result(intervals[offset:offset + len(rows)])
+            offset += len(rows)
+
+
+def feature_rows(instances, history=False):
+    """
+    (k, 8) float64 matrix from base-feature dicts, (k, 16) with history=True
+    (missing history inputs are 0); missing base features and values that
+    are not finite ("nan", "inf", 1e999) raise ValueError
+    """
+    try:
+        rows = [[float(instance[name]) for name in BASE_FEATURES] for instance in instances]
+        if history:
+            for row, instance in zip(rows, instances):
+                row.extend(float(instance.get(name, 0)) for name in HISTORY_INPUTS)
+        rows = np.array(rows, dtype=np.float64)
+    except KeyError as error:
+        raise ValueError(f"Missing base feature {error}") from None
+    except (TypeError, ValueError):
+        raise ValueError(f"Each instance must be an object with numeric {BASE_FEATURES}") from None
+
+    if not np.isfinite(rows).all():
+        raise ValueError("Feature values must be finite numbers")
+    return rows
+
+
+class PredictionServer:
+    """HTTP front end over a MicroBatcher and a loaded interval model"""
+
+    def __init__(self, model, mean, std, metadata=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, cache=None, cache_resolution=None):
+        self.model = model
+        self.mean = mean
+        self.std = std
+        self.metadata = metadata or {}
+        self.history = uses_history(self.metadata)
+        self.inputs = BASE_FEATURES + HISTORY_INPUTS if self.history else BASE_FEATURES
+        self.stats = LatencyStats()
+        self.cached = None
+        if cache is not None:
+            self.cached = CachedIntervalPredictor(model, mean, std, version_tag(self.metadata),
+                                                  cache, cache_resolution, self.history)
+        self.batcher = MicroBatcher(self.predict_rows, max_batch_size, max_wait_ms, self.stats)
+
+    @classmethod
+    def load(cls, model_path='ml/saved-model', runtime='numpy', **options):
+        model, mean, std = load_model_and_stats(model_path, runtime)
+
+        metadata_path = os.path.join(model_path, 'metadata.json')
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+
+        return cls(model, mean, std, metadata, **options)
+
+    def predict_rows(self, rows):
+        """Intervals for a (n, 8) base-feature matrix (n, 16 with history inputs), in one vectorized pass"""
+        if self.cached is not None:
+            return self.cached.predict_rows(rows)
+
+        columns = {name: rows[:, i] for i, name in enumerate(self.inputs)}
+        features = build_feature_matrix(columns)
+        return predict_intervals(self.model, self.mean, self.std, features, batch_size=len(rows))
+
+    async def handle_predict(self, body):
+        payload = json.loads(body or b'{}')
+        if not isinstance(payload, dict):
+            raise ValueError("Body must be a JSON object")
+
+        if 'instances' in payload:
+            if not payload['instances']:
+                return {'intervals': []}
+            intervals = await self.batcher.submit(feature_rows(payload['instances'], self.history))
+            return {'intervals': [int(value) for value in intervals]}
+        if 'features' in payload:
+            intervals = await self.batcher.submit(feature_rows([payload['features']], self.history))
+            return {'interval': int(intervals[0])}
+
+        raise ValueError("Body must contain 'features' or 'instances'")
+
+    async def route(self, method, path, body):
+        """(status, response dict) for one request"""
+        if method == 'POST' and path == '/predict':
+            start = time.perf_counter()
+            try:
+                result = await self.handle_predict(body)
+            except ValueError as error:  # Includes JSON decode errors
+                self.stats.errors += 1
+                return 400, {'error': str(error)}
+            except Exception as error:
+                self.stats.errors += 1
+                return 500, {'error': repr(error)}
+            self.stats.record_request(time.perf_counter() - start)
+            return 200, result
+
+        if method == 'GET' and path == '/stats':
+            return 200, {
+                **self.stats.snapshot(),
+                'maxBatchSize': self.batcher.max_batch_size,
+                'maxWaitMs': self.batcher.max_wait * 1000,
+                'cache': self.cached.cache.stats() if self.cached is not None else None
+            }
+
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'modelVersion': self.metadata.get('modelVersion')}
+
+        return 404, {'error': f'No route for {method} {path}'}
+
+    async def handle_connection(self, reader, writer):
+        """Serve keep-alive HTTP/1.1 requests on one connection"""
+        try:
+            while True:
+                request = await read_http_message(reader)
+                if request is None:
+                    break
+                start_line, headers, body = request
+
+                try:
+                    method, path, _ = start_line.split(' ', 2)
+                except ValueError:
+                    await write_http_response(writer, 400, {'error': 'Malformed request line'}, close=True)
+                    break
+
+                status, response = await self.route(method, path.split('?', 1)[0], body)
+                close = headers.get('connection', '').lower() == 'close'
+                await write_http_response(writer, status, response, close=close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.LimitOverrunError:
+            await write_error(writer, 431, f'Request headers exceed {MAX_HEADER_BYTES} bytes')
+        except ValueError as error:
+            await write_error(writer, 400, str(error))
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, ready=None):
+        """Run until cancelled; ready(address) is called once the socket is listening"""
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket,
+                                                     limit=MAX_HEADER_BYTES)
+            address = unix_socket
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port,
+                                                limit=MAX_HEADER_BYTES)
+            address = f'http://{host}:{port}'
+
+        if ready:
+            ready(address)
+
+        async with server:
+            await server.serve_forever()
+
+
+async def read_http_message(reader):
+    """(start line, lowercased headers, body) of the next HTTP/1.1 message, or None at EOF
+
+    Raises asyncio.LimitOverrunError when the head is longer than the reader's
+    limit and ValueError when it is cut off or the body is too large.
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as error:
+        if not error.partial.strip():
+            return None
+        raise ValueError('Connection closed inside the request headers') from None
+
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise ValueError(f'Body of {length} bytes exceeds {MAX_BODY_BYTES}')
+    body = await reader.readexactly(length) if length else b''
+
+    return lines[0], headers, body
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+async def write_http_response(writer, status, payload, close=False):
+    body = json.dumps(payload).encode()
+    head = (f'HTTP/1.1 {status} {REASONS.get(status, "Error")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"close" if close else "keep-alive"}\r\n\r\n')
+    writer.write(head.encode() + body)
+    await writer.drain()
+
+
+async def write_error(writer, status, message):
+    """Send a closing error response unless the client has already gone away"""
+    try:
+        await write_http_response(writer, status, {'error': message}, close=True)
+    except ConnectionError:
+        pass
+
+
+class PredictionClient:
+    """Minimal keep-alive HTTP client for the prediction server (TCP or Unix socket)"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.reader = self.writer = None
+
+    async def connect(self):
+        if self.unix_socket:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.unix_socket)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        """(status, response dict)"""
+        if self.writer is None:
+            await self.connect()
+
+        body = json.dumps(payload).encode() if payload is not None else b''
+        head = (f'{method} {path} HTTP/1.1\r\n'
+                f'Host: {self.host}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n\r\n')
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        response = await read_http_message(self.reader)
+        if response is None:
+            raise ConnectionError('Server closed the connection')
+        status_line, _, response_body = response
+        return int(status_line.split(' ', 2)[1]), json.loads(response_body)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.reader = self.writer = None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Back-test the SM-2 and ML schedulers offline on review histories
+
+Replays both schedulers over every card of a user dump (or generated
+histories) without touching MongoDB and reports retention-weighted interval
+metrics per algorithm. See scripts/schedule_replay.py for how proposals are
+scored.
+
+Usage:
+    mongoexport --db=spaced-repetition --collection=users --jsonArray --out=users.json
+    python scripts/replay-schedules.py users.json
+    python scripts/replay-schedules.py --synthetic-users=50000 --workers=8
+    python scripts/replay-schedules.py users.json --no-ml --output=replay.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.schedule_replay import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_CARDS, ReviewHistories, load_users_json, replay
+from scripts.synthetic_reviews import DEFAULT_CARDS_PER_USER, DEFAULT_REVIEWS_PER_CARD, generate_reviews
+
+METRICS = (
+    ('meanInterval', 'Mean interval (days)', '{:.1f}'),
+    ('retention', 'Retention', '{:.1%}'),
+    ('retentionWeightedInterval', 'Retention-weighted interval', '{:.2f}'),
+    ('coverage', 'Coverage', '{:.1%}')
+)
+
+
+def print_comparison(results):
+    algorithms = results['algorithms']
+    print(f"{'':<30}" + ''.join(f"{name:>12}" for name in algorithms))
+    for key, label, fmt in METRICS:
+        values = [algorithms[name][key] for name in algorithms]
+        print(f"{label:<30}" + ''.join(f"{'-' if value is None else fmt.format(value):>12}" for value in values))
+
+    print("\nInterval histogram (days):")
+    for bucket in next(iter(algorithms.values()))['intervalHistogram']:
+        print(f"  {bucket:<28}" + ''.join(f"{algorithms[name]['intervalHistogram'][bucket]:>12,}"
+                                          for name in algorithms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay SM-2 and ML schedules over review histories')
+    parser.add_argument('users', nargs='?', help='User dump from mongoexport (--jsonArray or JSON lines)')
+    parser.add_argument('--synthetic-users', type=int, default=0,
+                        help=f'Replay generated histories of this many users ({DEFAULT_CARDS_PER_USER} cards each)')
+    parser.add_argument('--synthetic-reviews', type=int, default=DEFAULT_REVIEWS_PER_CARD,
+                        help='Max reviews per generated card')
+    parser.add_argument('--max-reviews', type=int, help='Only replay the first N reviews of each card')
+    parser.add_argument('--model', default='ml/saved-model', help='Model for the ML schedule')
+    parser.add_argument('--runtime', choices=['numpy', 'tfjs'], default='numpy')
+    parser.add_argument('--no-ml', action='store_true', help='Replay SM-2 only')
+    parser.add_argument('--chunk-cards', type=int, default=DEFAULT_CHUNK_CARDS, help='Cards per replay chunk')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per forward pass')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = replay in this process)')
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args()
+
+    if not args.users and not args.synthetic_users:
+        parser.error('pass a user dump or --synthetic-users')
+
+    print("\n" + "="*70)
+    print("Offline Schedule Replay: SM-2 vs ML")
+    print("="*70)
+
+    start = time.perf_counter()
+    if args.synthetic_users:
+        histories = generate_reviews(args.synthetic_users, reviews_per_card=args.synthetic_reviews).to_review_histories()
+        source = f'{args.synthetic_users:,} generated users'
+    else:
+        histories = ReviewHistories.from_users(load_users_json(args.users), args.max_reviews)
+        source = args.users
+    print(f"✓ Loaded {len(histories):,} cards, {histories.total_reviews:,} reviews from {source} "
+          f"in {time.perf_counter() - start:.1f}s\n")
+
+    start = time.perf_counter()
+    results = replay(histories, None if args.no_ml else args.model, args.runtime, args.chunk_cards,
+                     args.batch_size, args.workers)
+    seconds = time.perf_counter() - start
+    results['seconds'] = seconds
+
+    print_comparison(results)
+    print(f"\n✓ Replayed in {seconds:.1f}s ({histories.total_reviews / max(seconds, 1e-9):,.0f} reviews/s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Base features from a card's review history in a single pass
+
+Walks ``question['reviewHistory']`` once and keeps running aggregates, so the
+features for review i come in O(1) instead of rescanning reviews 0..i.
+Aggregates include the review being scored, the same way
+scripts/extract-training-data.js builds the training samples.
+"""
+
+
+class RunningAggregates:
+    """Per-card running totals, updated in O(1) per review"""
+
+    __slots__ = ('total', 'correct', 'response_time_sum', 'streak')
+
+    def __init__(self):
+        self.total = 0
+        self.correct = 0
+        self.response_time_sum = 0.0
+        self.streak = 0  # Current run of consecutive correct answers
+
+    def update(self, review):
+        """Fold one review into the aggregates"""
+        self.total += 1
+        self.response_time_sum += review.get('responseTime', 0) or 0
+
+        if review.get('recalled', False):
+            self.correct += 1
+            self.streak += 1
+        else:
+            self.streak = 0
+
+    @property
+    def success_rate(self):
+        return self.correct / self.total if self.total else 0
+
+    @property
+    def average_response_time(self):
+        return self.response_time_sum / self.total if self.total else 0
+
+
+def time_of_day(timestamp):
+    """Fraction of the day (0-1) for a review timestamp"""
+    return timestamp.hour / 24 if hasattr(timestamp, 'hour') else 0.5
+
+
+def simulator_base_features(review, aggregates):
+    """Base features for a review, given aggregates that already include it"""
+    success_rate = aggregates.success_rate
+
+    return {
+        'memoryStrength': review.get('intervalUsed', 1),
+        'difficultyRating': 1 - success_rate,
+        'timeSinceLastReview': 0,  # Simplified
+        'successRate': success_rate,
+        'averageResponseTime': aggregates.average_response_time or 2000,
+        'totalReviews': aggregates.total,
+        'consecutiveCorrect': aggregates.streak,
+        'timeOfDay': time_of_day(review.get('timestamp'))
+    }
+
+
+def iter_baseline_review_features(review_history, limit, history=None):
+    """
+    Yield (index, review, base_features) for the first ``limit`` baseline reviews
+
+    One pass over the history; stops as soon as the limit is reached.
+    history, a scripts.card_history.CardHistory, is folded forward with every
+    review as well, so at each yield it includes the yielded review.
+    """
+    if limit <= 0:
+        return
+
+    aggregates = RunningAggregates()
+    emitted = 0
+
+    for index, review in enumerate(review_history):
+        aggregates.update(review)
+        if history is not None:
+            history.update_review(review)
+
+        if review.get('algorithmUsed') != 'baseline':
+            continue
+
+        yield index, review, simulator_base_features(review, aggregates)
+
+        emitted += 1
+        if emitted >= limit:
+            return
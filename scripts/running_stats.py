@@ -0,0 +1,150 @@
+"""
+Streaming, mergeable normalization statistics
+
+RunningStats keeps per-feature count, mean and M2 (sum of squared deviations)
+in float64. Chunks are folded in with Chan et al.'s parallel update, so the
+stats are built from one chunk of features at a time (from_chunks merges a
+state per slice of a memory-mapped matrix, stream_training_data one per
+featurized chunk of a JSON export), and two partial states (from worker
+processes, or from the previous retrain and the new data) merge exactly.
+
+The state is saved as normalization-state.json next to
+normalization-stats.json, whose mean/std it reproduces:
+
+    std = sqrt(M2 / count) + 1e-8        # np.std (ddof=0), as the trainers use
+
+Usage:
+    from scripts.running_stats import RunningStats
+
+    stats = RunningStats(51)
+    for X_chunk in chunks:
+        stats.update(X_chunk)
+    mean, std = stats.normalization()
+
+    merged = RunningStats.load('ml/saved-model').merge(stats_of_new_samples)
+"""
+
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+STATE_FILE = 'normalization-state.json'
+STD_EPSILON = 1e-8
+DEFAULT_CHUNK_ROWS = 65536
+
+
+class RunningStats:
+    """Per-feature count/mean/M2 that can be updated chunk by chunk and merged"""
+
+    def __init__(self, num_features, count=0, mean=None, m2=None):
+        self.num_features = num_features
+        self.count = int(count)
+        self.mean = np.zeros(num_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.m2 = np.zeros(num_features) if m2 is None else np.asarray(m2, dtype=np.float64)
+
+    @classmethod
+    def from_chunks(cls, X, rows=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Stats of the given rows of a (possibly memory-mapped) matrix
+
+        X is read one chunk_rows slice at a time; each slice's selected rows
+        become a partial state that is merged into the total, so only one
+        chunk is ever copied. rows defaults to every row.
+        """
+        stats = cls(X.shape[1])
+        starts = range(0, len(X), chunk_rows)
+        if rows is None:
+            for start in starts:
+                stats.update(X[start:start + chunk_rows])
+            return stats
+
+        rows = np.sort(np.asarray(rows))
+        bounds = np.searchsorted(rows, [*starts, len(X)])
+        for start, low, high in zip(starts, bounds[:-1], bounds[1:]):
+            if high > low:
+                chunk = X[start:start + chunk_rows]
+                stats.update(chunk[rows[low:high] - start])
+        return stats
+
+    @classmethod
+    def from_normalization(cls, mean, std, count):
+        """
+        Approximate state from saved mean/std and the sample count
+
+        For models trained before the state was saved; exact up to the 1e-8
+        added to std.
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        variance = np.maximum(np.asarray(std, dtype=np.float64) - STD_EPSILON, 0) ** 2
+        return cls(len(mean), count, mean, variance * count)
+
+    def update(self, X):
+        """Fold a (rows, num_features) chunk into the state; returns self"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.num_features:
+            raise ValueError(f"Expected a (rows, {self.num_features}) chunk, got {X.shape}")
+        if not len(X):
+            return self
+
+        chunk_mean = X.mean(axis=0)
+        chunk_m2 = ((X - chunk_mean) ** 2).sum(axis=0)
+        return self.merge(RunningStats(self.num_features, len(X), chunk_mean, chunk_m2))
+
+    def merge(self, other):
+        """Combine another state into this one (Chan et al.); returns self"""
+        if other.num_features != self.num_features:
+            raise ValueError(f"Cannot merge stats of {other.num_features} features into {self.num_features}")
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean.copy(), other.m2.copy()
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / count)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.count = count
+        return self
+
+    def copy(self):
+        return RunningStats(self.num_features, self.count, self.mean.copy(), self.m2.copy())
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else np.zeros(self.num_features)
+
+    def normalization(self):
+        """(mean, std) as float32, the values written to normalization-stats.json"""
+        return self.mean.astype(np.float32), (np.sqrt(self.variance) + STD_EPSILON).astype(np.float32)
+
+    def to_dict(self):
+        return {
+            'formatVersion': FORMAT_VERSION,
+            'numFeatures': self.num_features,
+            'count': self.count,
+            'mean': self.mean.tolist(),
+            'm2': self.m2.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        if state.get('formatVersion') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported normalization state format {state.get('formatVersion')}")
+        return cls(state['numFeatures'], state['count'], state['mean'], state['m2'])
+
+    def save(self, model_path):
+        """Write normalization-state.json into a model directory"""
+        os.makedirs(model_path, exist_ok=True)
+        path = os.path.join(model_path, STATE_FILE)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        return path
+
+    @classmethod
+    def load(cls, model_path):
+        with open(os.path.join(model_path, STATE_FILE), 'r') as f:
+            return cls.from_dict(json.load(f))
+
@@ -0,0 +1,369 @@
+"""
+Offline replay of the SM-2 and ML schedulers over logged review histories
+
+Histories are padded (cards, reviews) arrays, so each scheduler runs as a
+loop over review index with NumPy operations across every card at that step:
+SM-2 keeps (repetitions, ease factor, interval) per card the way
+algorithms/sm2.js does, and the ML scheduler builds the 51 features for all
+cards at once and scores them in one batched forward pass. Nothing reads or
+writes MongoDB; histories come from a user dump (mongoexport --jsonArray) or
+scripts/synthetic_reviews.py.
+
+Every proposed interval I is scored against what happened next: the card
+was reviewed again after g days and was or was not recalled. Since recall
+only falls with time, a card recalled after g days would also have been
+recalled after I <= g days, and a card forgotten after g days would also
+have been forgotten after I >= g days. Other proposals are undetermined.
+Per algorithm:
+
+    retention                  recalled / determined proposals
+    retentionWeightedInterval  mean over determined proposals of I if recalled, else 0
+                               (days of retained spacing per review; higher is better)
+    coverage                   determined / evaluated proposals
+
+Usage:
+    from scripts.schedule_replay import ReviewHistories, replay
+
+    histories = ReviewHistories.from_users(load_users_json('users.json'))
+    results = replay(histories, model_path='ml/saved-model', workers=4)
+    results['algorithms']['sm2']['retentionWeightedInterval']
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scripts.card_history import CardHistoryArrays, model_uses_history
+from scripts.feature_engine import build_feature_matrix
+from scripts.ml_simulation import _bounded_map, load_model_and_stats
+from scripts.training_store import timestamp_ms
+
+DEFAULT_CHUNK_CARDS = 262144
+DEFAULT_BATCH_SIZE = 65536
+MS_PER_DAY = 86400000
+
+MAX_INTERVAL = 365  # Both schedules are capped at a year, as algorithms/sm2.js caps SM-2
+SM2_DEFAULT_RESPONSE_TIME = 3000  # ms, applySM2Algorithm's default average
+
+# Interval histogram buckets (days, inclusive upper bounds; the last one is open)
+INTERVAL_BUCKETS = (1, 7, 30, 90, 365)
+BUCKET_LABELS = ('1', '2-7', '8-30', '31-90', '91+')
+
+
+class ReviewHistories:
+    """
+    Logged review histories as padded (cards, reviews) arrays
+
+    gap_days[c, j] is the time since review j - 1 (0 for the first review) and
+    time_of_day[c, j] the UTC fraction of the day of review j. Entries at
+    j >= length[c] are padding.
+    """
+
+    def __init__(self, recalled, response_time, gap_days, time_of_day, length):
+        self.recalled = recalled
+        self.response_time = response_time
+        self.gap_days = gap_days
+        self.time_of_day = time_of_day
+        self.length = length
+
+    def __len__(self):
+        return len(self.length)
+
+    @property
+    def num_reviews(self):
+        return self.recalled.shape[1]
+
+    @property
+    def total_reviews(self):
+        return int(self.length.sum())
+
+    def subset(self, cards):
+        return ReviewHistories(self.recalled[cards], self.response_time[cards], self.gap_days[cards],
+                               self.time_of_day[cards], self.length[cards])
+
+    @classmethod
+    def empty(cls, num_cards, num_reviews):
+        return cls(
+            np.zeros((num_cards, num_reviews), dtype=bool),
+            np.zeros((num_cards, num_reviews), dtype=np.float32),
+            np.zeros((num_cards, num_reviews), dtype=np.float32),
+            np.zeros((num_cards, num_reviews), dtype=np.float32),
+            np.zeros(num_cards, dtype=np.int32)
+        )
+
+    @classmethod
+    def from_review_lists(cls, histories, max_reviews=None):
+        """From reviewHistory lists (dicts with recalled, responseTime, timestamp); cards without reviews are skipped"""
+        histories = [history for history in histories if history]
+        num_reviews = max((len(history) for history in histories), default=0)
+        if max_reviews:
+            num_reviews = min(num_reviews, max_reviews)
+        result = cls.empty(len(histories), num_reviews)
+
+        for card, history in enumerate(histories):
+            history = history[:num_reviews]
+            n = len(history)
+            timestamps = np.array([timestamp_ms(review.get('timestamp')) for review in history])
+            gaps = np.diff(timestamps, prepend=timestamps[0]) / MS_PER_DAY
+
+            result.recalled[card, :n] = [bool(review.get('recalled', False)) for review in history]
+            result.response_time[card, :n] = [review.get('responseTime', 0) or 0 for review in history]
+            result.gap_days[card, :n] = np.nan_to_num(np.maximum(gaps, 0))
+            result.time_of_day[card, :n] = np.nan_to_num((timestamps % MS_PER_DAY) / MS_PER_DAY, nan=0.5)
+            result.length[card] = n
+
+        return result
+
+    @classmethod
+    def from_users(cls, users, max_reviews=None):
+        """From user documents with questions[].reviewHistory"""
+        return cls.from_review_lists(
+            (question.get('reviewHistory') for user in users for question in user.get('questions', [])),
+            max_reviews
+        )
+
+
+def load_users_json(path):
+    """User documents from a mongoexport dump (--jsonArray or one document per line)"""
+    with open(path, 'r') as f:
+        if f.read(1) == '[':
+            f.seek(0)
+            return json.load(f)
+        f.seek(0)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _padding(intervals, length):
+    intervals[np.arange(intervals.shape[1]) >= length[:, None]] = np.nan
+    return intervals
+
+
+def sm2_quality(recalled, response_time, average_response_time):
+    """calculateQualityWithResponseTime from algorithms/sm2.js, across cards (int8)"""
+    ratio = response_time / average_response_time
+    correct_quality = 3 + (ratio < 1.0).view(np.int8) + (ratio < 0.5).view(np.int8)
+    incorrect_quality = 1 + (response_time > 5000).view(np.int8) - (response_time < 1000).view(np.int8)
+    return np.where(recalled, correct_quality, incorrect_quality)
+
+
+# EF' - EF for quality 0..5: 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)
+SM2_EASE_CHANGE = np.array([0.1 - (5 - q) * (0.08 + (5 - q) * 0.02) for q in range(6)])
+
+
+def sm2_step(repetitions, ease, interval, quality):
+    """
+    One calculateSM2Interval update across cards
+
+    Returns the (repetitions, ease, interval) arrays after a review of the
+    given quality: ease factor floor 1.3, intervals 1 -> 6 -> round(interval
+    * ease) capped at MAX_INTERVAL, back to 1 below quality 3.
+    """
+    passed = quality >= 3
+    new_ease = np.maximum(ease + SM2_EASE_CHANGE.take(quality), 1.3)
+    grown = np.floor(interval * new_ease + 0.5)
+    np.putmask(grown, repetitions == 0, 1)
+    np.putmask(grown, repetitions == 1, 6)
+    np.minimum(grown, MAX_INTERVAL, out=grown)
+
+    return (np.where(passed, repetitions + 1, 0),
+            np.where(passed, new_ease, ease),
+            np.where(passed, grown, 1))
+
+
+def replay_sm2(histories):
+    """
+    SM-2 interval proposed after every review, (cards, reviews) float32 (NaN = padding)
+
+    Follows applySM2Algorithm: quality from correctness and response time
+    against the card's average so far, then sm2_step().
+    """
+    n = len(histories)
+    intervals = np.empty((n, histories.num_reviews), dtype=np.float32)
+    repetitions = np.zeros(n, dtype=np.int32)
+    ease = np.full(n, 2.5)
+    interval = np.ones(n)
+    response_sum = np.zeros(n)
+
+    for step in range(histories.num_reviews):
+        active = step < histories.length
+        response_time = histories.response_time[:, step].astype(np.float64)
+        average = response_sum / max(step, 1)
+        quality = sm2_quality(histories.recalled[:, step], response_time,
+                              np.where(average > 0, average, SM2_DEFAULT_RESPONSE_TIME))
+
+        new_repetitions, new_ease, new_interval = sm2_step(repetitions, ease, interval, quality)
+
+        repetitions = np.where(active, new_repetitions, repetitions)
+        ease = np.where(active, new_ease, ease)
+        interval = np.where(active, new_interval, interval)
+        response_sum += np.where(active, response_time, 0)
+        intervals[:, step] = interval
+
+    return _padding(intervals, histories.length)
+
+
+def replay_ml(histories, model, mean, std, batch_size=DEFAULT_BATCH_SIZE, history=False):
+    """
+    ML interval proposed after every review, (cards, reviews) float32 (NaN = padding)
+
+    The base features at review j count reviews 0..j (as the training samples
+    do); memoryStrength is the interval the ML schedule itself set last, so
+    predictions are capped at MAX_INTERVAL to keep that feedback bounded.
+    With history, every card's CardHistoryArrays state is folded forward one
+    review per step and its history inputs are added to the features.
+    """
+    n = len(histories)
+    intervals = np.full((n, histories.num_reviews), np.nan, dtype=np.float32)
+    memory_strength = np.ones(n)
+    correct = np.zeros(n)
+    streak = np.zeros(n)
+    response_sum = np.zeros(n)
+    states = CardHistoryArrays(n) if history else None
+    elapsed_ms = np.zeros(n)
+
+    for step in range(histories.num_reviews):
+        recalled = histories.recalled[:, step]
+        correct += recalled
+        streak = np.where(recalled, streak + 1, 0)
+        response_sum += histories.response_time[:, step]
+
+        active = np.flatnonzero(step < histories.length)
+        if not len(active):
+            break
+
+        total = step + 1
+        success_rate = correct[active] / total
+        columns = {
+            'memoryStrength': memory_strength[active],
+            'difficultyRating': 1 - success_rate,
+            'timeSinceLastReview': histories.gap_days[active, step],
+            'successRate': success_rate,
+            'averageResponseTime': response_sum[active] / total,
+            'totalReviews': np.full(len(active), total),
+            'consecutiveCorrect': streak[active],
+            'timeOfDay': histories.time_of_day[active, step]
+        }
+        if states is not None:
+            elapsed_ms[active] += histories.gap_days[active, step].astype(np.float64) * MS_PER_DAY
+            states.update(active, histories.recalled[active, step], histories.response_time[active, step],
+                          elapsed_ms[active])
+            columns.update(states.inputs(active))
+        X = build_feature_matrix(columns)
+        predictions = model.predict((X - mean) / std, batch_size=batch_size, verbose=0).reshape(-1)
+        proposed = np.clip(np.round(predictions), 1, MAX_INTERVAL)
+
+        intervals[active, step] = proposed
+        memory_strength[active] = proposed
+
+    return intervals
+
+
+class IntervalTotals:
+    """Additive per-algorithm totals, so card chunks can be replayed separately"""
+
+    def __init__(self):
+        self.evaluated = 0
+        self.recalled = 0
+        self.forgotten = 0
+        self.interval_sum = 0.0
+        self.retained_interval_sum = 0.0
+        self.histogram = np.zeros(len(INTERVAL_BUCKETS), dtype=np.int64)
+
+    def add(self, histories, intervals):
+        """Score proposals that have a next review (intervals[:, j] vs review j + 1)"""
+        proposed = intervals[:, :-1]
+        has_next = np.arange(1, histories.num_reviews) < histories.length[:, None]
+        proposed = proposed[has_next]
+        gap = histories.gap_days[:, 1:][has_next]
+        next_recalled = histories.recalled[:, 1:][has_next]
+
+        recalled = next_recalled & (proposed <= gap)
+        forgotten = ~next_recalled & (proposed >= gap)
+
+        self.evaluated += len(proposed)
+        self.recalled += int(recalled.sum())
+        self.forgotten += int(forgotten.sum())
+        self.interval_sum += float(proposed.sum(dtype=np.float64))
+        self.retained_interval_sum += float(proposed[recalled].sum(dtype=np.float64))
+        self.histogram += np.bincount(np.searchsorted(INTERVAL_BUCKETS, proposed),
+                                      minlength=len(INTERVAL_BUCKETS))
+
+    def merge(self, other):
+        self.evaluated += other.evaluated
+        self.recalled += other.recalled
+        self.forgotten += other.forgotten
+        self.interval_sum += other.interval_sum
+        self.retained_interval_sum += other.retained_interval_sum
+        self.histogram += other.histogram
+
+    def metrics(self):
+        determined = self.recalled + self.forgotten
+        return {
+            'evaluated': self.evaluated,
+            'meanInterval': self.interval_sum / self.evaluated if self.evaluated else None,
+            'coverage': determined / self.evaluated if self.evaluated else None,
+            'retention': self.recalled / determined if determined else None,
+            'retentionWeightedInterval': self.retained_interval_sum / determined if determined else None,
+            'intervalHistogram': dict(zip(BUCKET_LABELS, self.histogram.tolist()))
+        }
+
+
+# Model loaded once per process (the main process or each pool worker)
+_MODEL_STATE = {}
+
+
+def _init_model(model_path, runtime):
+    """Pool initializer: load the model and normalization stats once per process"""
+    _MODEL_STATE.clear()
+    if model_path:
+        model, mean, std = load_model_and_stats(model_path, runtime, verbose=False)
+        _MODEL_STATE.update(model=model, mean=mean, std=std, history=model_uses_history(model_path))
+
+
+def replay_chunk(histories, batch_size=DEFAULT_BATCH_SIZE):
+    """{algorithm: IntervalTotals} for one chunk of cards, with this process's model"""
+    totals = {'sm2': IntervalTotals()}
+    totals['sm2'].add(histories, replay_sm2(histories))
+
+    if _MODEL_STATE:
+        totals['ml'] = IntervalTotals()
+        intervals = replay_ml(histories, _MODEL_STATE['model'], _MODEL_STATE['mean'], _MODEL_STATE['std'],
+                              batch_size, _MODEL_STATE['history'])
+        totals['ml'].add(histories, intervals)
+    return totals
+
+
+def replay(histories, model_path=None, runtime='numpy', chunk_cards=DEFAULT_CHUNK_CARDS,
+           batch_size=DEFAULT_BATCH_SIZE, workers=0):
+    """
+    Replay SM-2 (and the ML scheduler when model_path is given) over every card
+
+    Cards are replayed chunk_cards at a time; workers > 0 fans the chunks out
+    to a process pool. Returns {'cards', 'reviews', 'algorithms': {name: metrics}}.
+    """
+    chunks = (histories.subset(slice(start, start + chunk_cards)) for start in range(0, len(histories), chunk_cards))
+
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_model,
+                                       initargs=(model_path, runtime))
+        results = _bounded_map(executor, replay_chunk, chunks, workers * 2, batch_size)
+    else:
+        _init_model(model_path, runtime)
+        results = (replay_chunk(chunk, batch_size) for chunk in chunks)
+
+    totals = {}
+    try:
+        for chunk_totals in results:
+            for name, chunk_total in chunk_totals.items():
+                totals.setdefault(name, IntervalTotals()).merge(chunk_total)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        'cards': len(histories),
+        'reviews': histories.total_reviews,
+        'algorithms': {name: total.metrics() for name, total in totals.items()}
+    }
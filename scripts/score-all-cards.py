@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Nightly batch scoring: precompute mlPrecomputed.interval/dueDate for every card
+
+Streams all users, builds features in bulk, scores them in large batches and
+writes the results back with bulk updates, so the review request path only
+looks the interval up. Resumes from its checkpoint after an interruption.
+See scripts/batch_scoring.py.
+
+Usage:
+    python scripts/score-all-cards.py
+    python scripts/score-all-cards.py --max-users=100000       # resume on the next run
+    python scripts/score-all-cards.py --restart --chunk-users=2000 --batch-size=65536
+
+Stage timings (db_read, featurize, predict, db_write) are written to
+ml/saved-model/batch-scoring-report.json.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pymongo import MongoClient
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.batch_scoring import DEFAULT_CHECKPOINT_PATH, DEFAULT_CHUNK_USERS, score_all_cards
+from scripts.instrumentation import PROFILERS, RunReport
+from scripts.ml_simulation import DEFAULT_BATCH_SIZE, DEFAULT_CURSOR_BATCH
+
+MODEL_PATH = 'ml/saved-model'
+REPORT_FILE = 'batch-scoring-report.json'
+STAGES = ('load_model', 'db_read', 'featurize', 'predict', 'db_write')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the ML interval of every card')
+    parser.add_argument('--model', default=MODEL_PATH, help='Model directory')
+    parser.add_argument('--runtime', choices=['numpy', 'tfjs'], default='numpy')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH, help='Checkpoint JSON file')
+    parser.add_argument('--restart', action='store_true', help='Ignore an unfinished checkpoint')
+    parser.add_argument('--max-users', type=int, help='Stop after this many users (the next run resumes)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per forward pass')
+    parser.add_argument('--chunk-users', type=int, default=DEFAULT_CHUNK_USERS,
+                        help='Users scored and written per bulk update (and checkpoint)')
+    parser.add_argument('--cursor-batch', type=int, default=DEFAULT_CURSOR_BATCH,
+                        help='Users fetched per MongoDB cursor round trip')
+    parser.add_argument('--profile-stage', choices=STAGES,
+                        help='Profile one stage and add the top entries to the run report')
+    parser.add_argument('--profiler', choices=PROFILERS, default='cprofile',
+                        help='cprofile (CPU time per function) or tracemalloc (allocations)')
+    args = parser.parse_args()
+
+    # Load .env file from parent directory
+    from dotenv import load_dotenv
+    env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
+    load_dotenv(env_path)
+
+    mongodb_uri = os.getenv('MONGODB_URI')
+    if not mongodb_uri:
+        print("❌ MONGODB_URI environment variable not set")
+        print("   Checked .env file at:", env_path)
+        sys.exit(1)
+
+    print("\n" + "="*70)
+    print("Batch Scoring: precomputed ML intervals")
+    print("="*70)
+
+    client = MongoClient(mongodb_uri)
+    report = RunReport('batch_scoring', args.profile_stage, args.profiler)
+    start = time.perf_counter()
+    try:
+        totals = score_all_cards(client.get_default_database()['users'], args.checkpoint, args.model,
+                                 args.runtime, args.batch_size, args.chunk_users, args.cursor_batch,
+                                 args.max_users, args.restart, report)
+    finally:
+        client.close()
+    seconds = time.perf_counter() - start
+
+    if totals['resumed']:
+        print(f"✓ Resumed after user {totals['lastUserId']} (run started {totals['startedDate']})")
+    print(f"Model: {totals['modelVersion']}   Features as of: {totals['asOf']} UTC")
+    print(f"✓ Scored {totals['cards']:,} cards of {totals['users']:,} users "
+          f"({totals['writes']:,} user updates) in {seconds:.1f}s")
+    if totals.get('stale'):
+        print(f"⚠️  {totals['stale']:,} users changed their questions during the run and were not updated")
+    if totals['complete']:
+        print("✓ Run complete")
+    else:
+        print(f"⚠️  Stopped at --max-users; run again to resume from {args.checkpoint}")
+
+    report.record('totals', totals)
+    report_path = os.path.join(args.model, REPORT_FILE)
+    report.write(report_path)
+    print(f"\nStage timings ({report_path}):")
+    report.print_summary()
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
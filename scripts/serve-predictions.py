@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Local micro-batching prediction server for the interval model
+
+Loads ml/saved-model once and serves POST /predict, GET /stats and
+GET /health over HTTP on a TCP port or a Unix socket. Concurrent requests
+are scored together in one batched forward pass. See
+scripts/prediction_server.py.
+
+Usage:
+    python scripts/serve-predictions.py
+    python scripts/serve-predictions.py --port=8765 --max-batch-size=256 --max-wait-ms=2
+    python scripts/serve-predictions.py --unix-socket=/tmp/intervals.sock
+    python scripts/serve-predictions.py --cache-size=100000 --cache-ttl=3600
+
+    curl -s localhost:8765/predict -d '{"features": {"memoryStrength": 3, ...}}'
+    curl -s localhost:8765/stats
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.prediction_cache import PredictionCache, parse_resolution
+from scripts.prediction_server import (
+    DEFAULT_HOST, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, DEFAULT_PORT, PredictionServer
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-batching interval prediction server')
+    parser.add_argument('--model', default='ml/saved-model', help='TF.js model directory')
+    parser.add_argument('--runtime', choices=['numpy', 'tfjs'], default='numpy')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix-socket', help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help='Flush as soon as this many rows are queued')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help='Flush once the oldest queued request has waited this long')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='Memoize up to this many quantized feature vectors (0 = no cache)')
+    parser.add_argument('--cache-ttl', type=float, help='Seconds a cached prediction stays valid')
+    parser.add_argument('--cache-resolution', type=parse_resolution,
+                        help="Quantization step overrides, e.g. 'timeSinceLastReview=0.1,averageResponseTime=50'")
+    args = parser.parse_args()
+
+    cache = PredictionCache(args.cache_size, args.cache_ttl) if args.cache_size > 0 else None
+    server = PredictionServer.load(args.model, args.runtime, max_batch_size=args.max_batch_size,
+                                   max_wait_ms=args.max_wait_ms, cache=cache,
+                                   cache_resolution=args.cache_resolution)
+
+    def ready(address):
+        print(f"\n✓ Serving interval predictions on {address}")
+        print(f"  Micro-batching: up to {args.max_batch_size} rows or {args.max_wait_ms} ms")
+        if cache is not None:
+            print(f"  Prediction cache: {args.cache_size} entries, TTL {args.cache_ttl or 'none'}")
+        print("  POST /predict, GET /stats, GET /health  (Ctrl+C to stop)\n")
+
+    # Exit through the finally block on SIGTERM too, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix_socket, ready=ready))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == '__main__':
+    main()
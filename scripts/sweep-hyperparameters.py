@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Parallel hyperparameter sweep for the interval model
+
+Builds the feature matrix once, shares it read-only with a pool of trainer
+processes (each pinned to --threads CPU threads), and writes a leaderboard
+sorted by test MAE with per-config wall time. See scripts/sweep.py.
+
+Usage:
+    python scripts/sweep-hyperparameters.py --architectures=small,large \\
+        --learning-rates=0.001,0.0003 --batch-sizes=32,256 --dropouts=0.1,0.3
+    python scripts/sweep-hyperparameters.py export.columns --workers=16 --threads=2
+"""
+
+import argparse
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, FeatureCache
+from scripts.sweep import DEFAULT_LEADERBOARD_PATH, expand_grid, run_sweep, trainer_flags
+from scripts.trainer import (
+    ARCHITECTURES, DEFAULT_BATCH_SIZE, DEFAULT_EPOCHS, DEFAULT_LEARNING_RATE,
+    DEFAULT_PIPELINE, DEFAULT_SEED, FEATURE_SETS, PIPELINES
+)
+from scripts.training_store import default_training_data_path
+
+
+def comma_list(convert):
+    return lambda value: [convert(item) for item in value.split(',') if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel hyperparameter sweep')
+    parser.add_argument('data', nargs='?', help='Columnar store or JSON export (default: training-data-clean)')
+    parser.add_argument('--feature-set', choices=sorted(FEATURE_SETS), default='advanced')
+    parser.add_argument('--architectures', type=comma_list(str),
+                        help=f"Comma-separated, from {sorted(ARCHITECTURES)} (default: the feature set's own)")
+    parser.add_argument('--learning-rates', type=comma_list(float), default=[DEFAULT_LEARNING_RATE])
+    parser.add_argument('--batch-sizes', type=comma_list(int), default=[DEFAULT_BATCH_SIZE])
+    parser.add_argument('--dropouts', type=comma_list(float), default=[None],
+                        help="Dropout rates (default: the architecture's own)")
+    parser.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument('--pipeline', choices=PIPELINES, default=DEFAULT_PIPELINE)
+    parser.add_argument('--workers', type=int, help='Trainer processes (default: CPU count / threads)')
+    parser.add_argument('--threads', type=int, default=1, help='CPU threads per trainer')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', default=DEFAULT_LEADERBOARD_PATH, help='Leaderboard JSON file')
+    parser.add_argument('--feature-cache', default=DEFAULT_CACHE_DIR, help='Feature cache directory')
+    parser.add_argument('--feature-cache-size', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Feature cache size limit in MB')
+    parser.add_argument('--no-feature-cache', action='store_true', help='Always rebuild the feature matrix')
+    args = parser.parse_args()
+
+    architectures = args.architectures or [FEATURE_SETS[args.feature_set]['architecture']]
+    unknown = [name for name in architectures if name not in ARCHITECTURES]
+    if unknown:
+        parser.error(f"unknown architectures {unknown}, expected names from {sorted(ARCHITECTURES)}")
+
+    configs = expand_grid(architectures, args.learning_rates, args.batch_sizes, args.dropouts)
+    data_path = args.data or default_training_data_path()
+
+    print("\n" + "="*70)
+    print("Hyperparameter Sweep")
+    print("="*70)
+    print(f"Data: {data_path} ({args.feature_set} features)")
+    print(f"Configs: {len(configs)}")
+    print(f"Workers: {args.workers or 'auto'} x {args.threads} thread(s)")
+    print(f"Leaderboard: {args.output}\n")
+
+    def report(row):
+        if 'error' in row:
+            print(f"  ✗ #{row['id']} {row['architecture']} failed: {row['error']}")
+            return
+        print(f"  ✓ #{row['id']:<3} {row['architecture']:<6} lr={row['learningRate']:<8g} "
+              f"batch={row['batchSize']:<5} dropout={row['dropout']}  "
+              f"MAE {row['testMAE']:.3f}  ({row['wallSeconds']:.0f}s, {row['epochsRun']} epochs)")
+
+    cache = None if args.no_feature_cache else FeatureCache(args.feature_cache,
+                                                            int(args.feature_cache_size * 1024 * 1024))
+    leaderboard = run_sweep(data_path, configs, args.feature_set, args.workers, args.threads,
+                            args.epochs, args.pipeline, args.seed, args.output, on_result=report, cache=cache)
+
+    finished = [row for row in leaderboard['results'] if 'error' not in row]
+
+    print("\n" + "="*70)
+    print(f"✓ Sweep complete in {leaderboard['wallSeconds']:.0f}s "
+          f"({leaderboard['serialSeconds']:.0f}s of training, {leaderboard['speedup']:.1f}x parallel speedup)")
+    print("="*70)
+    for rank, row in enumerate(finished[:5], 1):
+        print(f"{rank}. MAE {row['testMAE']:.3f}  {trainer_flags(row, args.feature_set)}")
+    print(f"\nLeaderboard saved to {args.output}")
+    print("="*70 + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Parallel hyperparameter sweep over the interval model, and the shared-data
+trainer pool it runs on (also used by scripts/cross_validation.py)
+
+The parent process loads the training data, builds the feature matrix,
+splits and normalizes it once, and saves the arrays as .npy files in a
+scratch directory. A process pool of trainers memory-maps them read-only, so
+every config trains on the same data without re-parsing JSON or re-building
+features, and the page cache holds a single copy for all workers.
+
+Each worker is pinned to a thread budget (TensorFlow intra-op threads, and a
+disjoint CPU set where the platform allows it), so N workers x T threads
+fill the machine without oversubscribing it. Results stream into one
+leaderboard JSON file, sorted by test MAE.
+
+Usage:
+    from scripts.sweep import expand_grid, run_sweep
+
+    configs = expand_grid(['small', 'large'], [0.001, 0.0003], [32, 256], [None])
+    leaderboard = run_sweep('training-data-clean.columns', configs, workers=16, threads=2)
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from scripts.trainer import (
+    DEFAULT_EPOCHS, DEFAULT_PIPELINE, DEFAULT_SEED, DEFAULT_TEST_SIZE,
+    DEFAULT_VALIDATION_SPLIT, count_params, load_features,
+    normalization_stats, split_validation, train_test_indices
+)
+
+DEFAULT_LEADERBOARD_PATH = 'ml/sweep-leaderboard.json'
+
+_WORKER_STATE = {}
+
+
+def expand_grid(architectures, learning_rates, batch_sizes, dropouts):
+    """Every combination as a list of config dicts"""
+    return [
+        {'architecture': architecture, 'learningRate': learning_rate,
+         'batchSize': batch_size, 'dropout': dropout}
+        for architecture, learning_rate, batch_size, dropout
+        in itertools.product(architectures, learning_rates, batch_sizes, dropouts)
+    ]
+
+
+def prepare_shared_data(data_path, feature_set, directory, test_size=DEFAULT_TEST_SIZE,
+                        validation_split=DEFAULT_VALIDATION_SPLIT, seed=DEFAULT_SEED, cache=None):
+    """
+    Build, split and normalize the features once and save them for the workers
+
+    Uses the same split and normalization as scripts/trainer.py, so the best
+    config can be retrained there with identical data. With a FeatureCache the
+    feature matrix is read from it instead of rebuilt when unchanged.
+    """
+    X, y, _ = load_features(data_path, feature_set, cache)
+
+    train_idx, test_idx = train_test_indices(len(X), test_size, seed)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+    mean, std = normalization_stats(X, train_idx)
+    X_fit, y_fit, X_val, y_val = split_validation((X_train - mean) / std, y_train, validation_split, seed)
+
+    save_shared_data(directory, {
+        'X_fit': X_fit, 'y_fit': y_fit, 'X_val': X_val, 'y_val': y_val,
+        'X_test_norm': (X_test - mean) / std, 'y_test': y_test,
+        'baseline_test': X_test[:, 0:1]  # memoryStrength, for the baseline MAE
+    })
+
+    return {'trainingSize': len(X_train), 'testSize': len(X_test), 'numFeatures': X.shape[1]}
+
+
+def save_shared_data(directory, arrays):
+    """Save float32 arrays (ints kept as-is) as .npy files for trainer_pool workers"""
+    for name, values in arrays.items():
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            values = values.astype(np.float32, copy=False)
+        np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(values))
+
+
+def load_shared_data(directory):
+    """Memory-map every array in a shared data directory (read-only)"""
+    return {
+        name[:-len('.npy')]: np.load(os.path.join(directory, name), mmap_mode='r')
+        for name in os.listdir(directory) if name.endswith('.npy')
+    }
+
+
+def shared_data():
+    """The shared arrays, inside a trainer_pool worker"""
+    return _WORKER_STATE['data']
+
+
+def cpu_slices(workers, threads):
+    """Disjoint CPU sets of size threads, one per worker, or None if they don't fit"""
+    if not hasattr(os, 'sched_getaffinity'):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    if workers * threads > len(cpus):
+        return None
+    return [cpus[i * threads:(i + 1) * threads] for i in range(workers)]
+
+
+def trainer_pool(directory, workers, threads):
+    """
+    ProcessPoolExecutor of TensorFlow trainers over a shared data directory
+
+    Workers start with spawn (TensorFlow is not fork-safe), are pinned to a
+    thread budget, and memory-map the directory's arrays once at startup.
+    """
+    context = multiprocessing.get_context('spawn')
+
+    cpu_queue = None
+    slices = cpu_slices(workers, threads)
+    if slices is not None:
+        cpu_queue = context.Queue()
+        for cpus in slices:
+            cpu_queue.put(cpus)
+
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                               initargs=(directory, threads, cpu_queue))
+
+
+def _init_worker(directory, threads, cpu_queue):
+    """Pin the process to its thread budget, then import TensorFlow and map the data"""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    if cpu_queue is not None:
+        os.sched_setaffinity(0, cpu_queue.get())
+
+    from scripts.trainer import import_keras
+    tf, _ = import_keras()
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    _WORKER_STATE['data'] = load_shared_data(directory)
+
+
+def _train_config(index, config, num_features, epochs, pipeline, seed):
+    """Train and evaluate one config in a worker; returns a leaderboard row"""
+    from scripts.trainer import build_model, evaluate, import_keras, training_callbacks
+    from scripts.training_pipeline import StepsPerSecond, fit_inputs
+
+    _, keras = import_keras()
+    keras.utils.set_random_seed(seed)
+
+    data = shared_data()
+    start = time.perf_counter()
+
+    model = build_model(num_features, config['architecture'], config['learningRate'], config['dropout'])
+    throughput = StepsPerSecond(config['batchSize'])
+    history = model.fit(
+        **fit_inputs(pipeline, data['X_fit'], data['y_fit'], data['X_val'], data['y_val'], config['batchSize']),
+        epochs=epochs,
+        callbacks=[throughput] + training_callbacks(),
+        verbose=0
+    )
+    performance = evaluate(model, data['baseline_test'], data['X_test_norm'], data['y_test'])
+
+    return {
+        'id': index,
+        **config,
+        'params': count_params(num_features, config['architecture']),
+        **performance,
+        'epochsRun': len(history.history['loss']),
+        'stepsPerSecond': throughput.summary()['stepsPerSecond'],
+        'wallSeconds': time.perf_counter() - start,
+        'pid': os.getpid()
+    }
+
+
+def write_leaderboard(path, leaderboard):
+    """Atomically rewrite the leaderboard file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(leaderboard, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_sweep(data_path, configs, feature_set='advanced', workers=None, threads=1,
+              epochs=DEFAULT_EPOCHS, pipeline=DEFAULT_PIPELINE, seed=DEFAULT_SEED,
+              leaderboard_path=DEFAULT_LEADERBOARD_PATH, on_result=None, cache=None):
+    """
+    Train every config in a process pool and return the leaderboard dict
+
+    The leaderboard file is rewritten after each finished config, so a partial
+    sweep still leaves usable results.
+    """
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    workers = min(workers, len(configs))
+    sweep_start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix='interval-sweep-') as directory:
+        data_info = prepare_shared_data(data_path, feature_set, directory, seed=seed, cache=cache)
+        prepare_seconds = time.perf_counter() - sweep_start
+
+        leaderboard = {
+            'createdDate': datetime.now().isoformat(),
+            'dataPath': data_path,
+            'featureSet': feature_set,
+            **data_info,
+            'epochs': epochs,
+            'pipeline': pipeline,
+            'workers': workers,
+            'threadsPerWorker': threads,
+            'prepareSeconds': prepare_seconds,
+            'results': []
+        }
+
+        with trainer_pool(directory, workers, threads) as executor:
+            futures = {
+                executor.submit(_train_config, index, config, data_info['numFeatures'], epochs, pipeline, seed):
+                    (index, config)
+                for index, config in enumerate(configs)
+            }
+            for future in as_completed(futures):
+                try:
+                    row = future.result()
+                except Exception as error:
+                    # One bad config should not lose the rest of the sweep
+                    index, config = futures[future]
+                    row = {'id': index, **config, 'error': repr(error), 'wallSeconds': 0.0}
+                leaderboard['results'].append(row)
+                leaderboard['results'].sort(key=lambda r: r.get('testMAE', float('inf')))
+                write_leaderboard(leaderboard_path, leaderboard)
+                if on_result:
+                    on_result(row)
+
+    wall_seconds = time.perf_counter() - sweep_start
+    serial_seconds = sum(row['wallSeconds'] for row in leaderboard['results'])
+    leaderboard['wallSeconds'] = wall_seconds
+    leaderboard['serialSeconds'] = serial_seconds
+    leaderboard['speedup'] = serial_seconds / wall_seconds if wall_seconds else 0.0
+    write_leaderboard(leaderboard_path, leaderboard)
+
+    return leaderboard
+
+
+def trainer_flags(row, feature_set):
+    """train-interval-model.py flags that retrain a leaderboard row"""
+    flags = [f"--feature-set={feature_set}", f"--architecture={row['architecture']}",
+             f"--learning-rate={row['learningRate']}", f"--batch-size={row['batchSize']}"]
+    if row['dropout'] is not None:
+        flags.append(f"--dropout={row['dropout']}")
+    return ' '.join(flags)
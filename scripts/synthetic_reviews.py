@@ -0,0 +1,267 @@
+"""
+Vectorized synthetic review histories and training samples
+
+A NumPy counterpart of scripts/simulate-realistic-reviews.js for scale
+testing. Every card is reviewed on an SM-2 schedule, one review index at a
+time across all cards, so millions of reviews take seconds and nothing goes
+through MongoDB. Draws come from one seeded generator per chunk of users:
+
+    user ability     retention bonus ~ N(0, 0.08), response speed ~ lognormal
+    card difficulty  ~ Beta(2, 3)
+    recall           Bernoulli(exp(-gap / stability) + ability), where stability
+                     grows on every recall (less for hard cards) and drops on a lapse
+    response time    (2 s + 6 s x difficultyRating) x speed, 1.3x slower when wrong
+
+Training samples follow scripts/extract-training-data.js: one per review that
+has a next review, with the same feature formulas and labels. They are
+written to a columnar store (scripts/training_store.py) or a JSON export.
+
+Usage:
+    from scripts.synthetic_reviews import generate_reviews, training_columns, write_store
+
+    reviews = generate_reviews(num_users=1000, seed=7)
+    base, labels, timestamp, user, question = training_columns(reviews)
+    write_store('synthetic.columns', num_users=25000)     # ~5M samples
+"""
+
+import json
+
+import numpy as np
+
+from scripts.feature_spec import BASE_FEATURES
+from scripts.schedule_replay import MS_PER_DAY, SM2_DEFAULT_RESPONSE_TIME, ReviewHistories, sm2_quality, sm2_step
+from scripts.training_store import TrainingStoreWriter
+
+DEFAULT_CARDS_PER_USER = 20
+DEFAULT_REVIEWS_PER_CARD = 20
+DEFAULT_CHUNK_USERS = 5000
+DEFAULT_START_MS = 1.7e12  # Nov 2023
+MS_PER_HOUR = 3600000
+
+
+class SyntheticReviews:
+    """
+    Generated review histories as padded (cards, reviews) arrays
+
+    user is the global user index of every card and card its question index
+    within the user's deck; entries at j >= length[c] are padding.
+    """
+
+    def __init__(self, recalled, response_time, timestamp, interval_used, length, user, card):
+        self.recalled = recalled
+        self.response_time = response_time
+        self.timestamp = timestamp
+        self.interval_used = interval_used
+        self.length = length
+        self.user = user
+        self.card = card
+
+    def __len__(self):
+        return len(self.length)
+
+    @property
+    def total_reviews(self):
+        return int(self.length.sum())
+
+    def to_review_histories(self):
+        """ReviewHistories for scripts/schedule_replay.py"""
+        gap_days = np.diff(self.timestamp, axis=1, prepend=self.timestamp[:, :1]) / MS_PER_DAY
+        time_of_day = (self.timestamp % MS_PER_DAY) / MS_PER_DAY
+        return ReviewHistories(self.recalled, self.response_time, np.nan_to_num(gap_days).astype(np.float32),
+                               np.nan_to_num(time_of_day).astype(np.float32), self.length)
+
+
+def generate_reviews(num_users, cards_per_user=DEFAULT_CARDS_PER_USER, reviews_per_card=DEFAULT_REVIEWS_PER_CARD,
+                     seed=42, first_user=0, start_ms=DEFAULT_START_MS):
+    """
+    Review histories for num_users users with cards_per_user cards each
+
+    Each card gets between 2 and reviews_per_card reviews. Users are numbered
+    from first_user, so chunks generated with different seeds line up.
+    """
+    rng = np.random.default_rng(seed)
+    num_cards = num_users * cards_per_user
+    user = np.repeat(np.arange(first_user, first_user + num_users), cards_per_user)
+    card = np.tile(np.arange(cards_per_user, dtype=np.int32), num_users)
+
+    retention_bonus = np.repeat(rng.normal(0, 0.08, num_users), cards_per_user)
+    speed = np.repeat(rng.lognormal(0, 0.25, num_users), cards_per_user)
+    difficulty = rng.beta(2, 3, num_cards)
+    length = rng.integers(2, reviews_per_card + 1, num_cards).astype(np.int32)
+
+    # Cards are simulated longest history first, so the cards still being
+    # reviewed at a step are a prefix and every step works on a slice
+    order = np.argsort(-length, kind='stable')
+    active_cards = np.searchsorted(-length[order], -np.arange(reviews_per_card))  # length > step
+    retention_bonus, speed, difficulty = retention_bonus[order], speed[order], difficulty[order]
+
+    # Filled one review index at a time, so stored (reviews, cards) and transposed at the end
+    recalled = np.zeros((reviews_per_card, num_cards), dtype=bool)
+    response_time = np.zeros((reviews_per_card, num_cards), dtype=np.float32)
+    timestamp = np.full((reviews_per_card, num_cards), np.nan)
+    interval_used = np.zeros((reviews_per_card, num_cards), dtype=np.float32)
+
+    # Cards are first seen over the first 60 days, at a study hour between 8:00 and 22:00
+    day = np.floor(start_ms / MS_PER_DAY) + rng.integers(0, 60, num_cards)
+    stability = rng.lognormal(0.5, 0.5, num_cards) * (1.5 - difficulty)
+    repetitions = np.zeros(num_cards, dtype=np.int32)
+    ease = np.full(num_cards, 2.5)
+    interval = np.ones(num_cards)
+    correct = np.zeros(num_cards)
+    response_sum = np.zeros(num_cards)
+
+    for step, n in enumerate(active_cards):
+        day, stability, repetitions, ease, interval, correct, response_sum = (
+            day[:n], stability[:n], repetitions[:n], ease[:n], interval[:n], correct[:n], response_sum[:n]
+        )
+        bonus, difficulty = retention_bonus[:n], difficulty[:n]
+
+        if step:
+            # Reviews land near the scheduled day, not exactly on it
+            gap = np.maximum(1, np.round(interval * rng.lognormal(0, 0.25, n)))
+            day = day + gap
+            p_recall = np.exp(-gap / stability) + bonus
+        else:
+            p_recall = 0.7 + bonus - (difficulty - 0.4) * 0.5
+        timestamp[step, :n] = day * MS_PER_DAY + rng.uniform(8, 22, n) * MS_PER_HOUR
+
+        hit = rng.random(n) < np.clip(p_recall, 0.02, 0.99)
+        difficulty_rating = 1 - correct / step if step else 0.5
+        rt = np.floor((2000 + difficulty_rating * 6000) * speed[:n] * np.where(hit, 1.0, 1.3) * rng.uniform(0.8, 1.2, n))
+
+        quality = sm2_quality(hit, rt, response_sum / step if step else SM2_DEFAULT_RESPONSE_TIME)
+        repetitions, ease, interval = sm2_step(repetitions, ease, interval, quality)
+        stability = np.where(hit, stability * (1.5 + 2 * (1 - difficulty)), np.maximum(stability * 0.4, 0.5))
+
+        recalled[step, :n] = hit
+        response_time[step, :n] = rt
+        interval_used[step, :n] = interval
+        correct = correct + hit
+        response_sum = response_sum + rt
+
+    unsorted = np.empty_like(order)
+    unsorted[order] = np.arange(num_cards)
+    return SyntheticReviews(recalled[:, unsorted].T, response_time[:, unsorted].T, timestamp[:, unsorted].T,
+                            interval_used[:, unsorted].T, length, user, card)
+
+
+def sample_mask(reviews):
+    """(cards, reviews - 1) mask of the reviews that have a next review, i.e. the training samples"""
+    return np.arange(reviews.recalled.shape[1] - 1) < (reviews.length - 1)[:, None]
+
+
+def training_columns(reviews):
+    """
+    Training samples (base, labels, timestamp, user, card) as extract-training-data.js builds them
+
+    One row per review i that has a review i + 1, in (card, review) order.
+    user and card are the generator's indices; map them to store codes.
+    """
+    recalled = reviews.recalled
+    current = recalled[:, :-1]
+    mask = sample_mask(reviews)
+    base = np.empty((len(BASE_FEATURES), int(mask.sum())), dtype=np.float32)
+
+    count = np.arange(1, recalled.shape[1], dtype=np.float64)
+    success_rate = np.cumsum(current, axis=1) / count
+    intervals = np.maximum(reviews.interval_used[:, :-1], 1)
+    base[0] = np.clip(intervals * (1 + success_rate * 0.5) * np.minimum(2, 1 + np.log(count + 1) * 0.1), 1, 90)[mask]
+    base[1] = (1 - success_rate)[mask]
+    base[3] = success_rate[mask]
+
+    gap_days = np.diff(reviews.timestamp, axis=1) / MS_PER_DAY
+    since_last = np.zeros(current.shape)
+    since_last[:, 1:] = gap_days[:, :-1]
+    base[2] = since_last[mask]
+    base[4] = (np.cumsum(reviews.response_time[:, :-1], axis=1, dtype=np.float64) / count)[mask]
+    base[5] = np.broadcast_to(count, current.shape)[mask]
+
+    # consecutiveCorrect: 1 + the run of correct answers before review i, but
+    # 0 when every earlier answer was correct (findIndex() returns -1 there)
+    run_before = np.zeros(current.shape, dtype=np.int32)
+    failed_before = np.zeros(current.shape, dtype=bool)
+    for step in range(1, current.shape[1]):
+        run_before[:, step] = np.where(current[:, step - 1], run_before[:, step - 1] + 1, 0)
+        failed_before[:, step] = failed_before[:, step - 1] | ~current[:, step - 1]
+    base[6] = np.where(current & failed_before, run_before + 1, 0)[mask]
+
+    timestamp = reviews.timestamp[:, :-1][mask]
+    base[7] = np.floor((timestamp % MS_PER_DAY) / MS_PER_HOUR) / 24
+
+    next_recalled = recalled[:, 1:][mask]
+    actual = gap_days[mask]
+    optimal = np.where(next_recalled, np.ceil(actual * 1.2), np.maximum(1, np.floor(actual * 0.7)))
+    labels = np.stack([optimal, actual, next_recalled]).astype(np.float32)
+
+    samples_per_card = reviews.length - 1
+    return (base.T, labels.T, timestamp, np.repeat(reviews.user, samples_per_card),
+            np.repeat(reviews.card, samples_per_card))
+
+
+def iter_review_chunks(num_users, cards_per_user=DEFAULT_CARDS_PER_USER, reviews_per_card=DEFAULT_REVIEWS_PER_CARD,
+                       seed=42, chunk_users=DEFAULT_CHUNK_USERS):
+    """generate_reviews() for num_users users, chunk_users at a time (seed + chunk index)"""
+    for index, first_user in enumerate(range(0, num_users, chunk_users)):
+        yield generate_reviews(min(chunk_users, num_users - first_user), cards_per_user, reviews_per_card,
+                               seed + index, first_user)
+
+
+def user_id(user):
+    """ObjectId-style id of a generated user"""
+    return f'{user:024x}'
+
+
+def question_text(card):
+    return f'synthetic question {card}'
+
+
+def write_store(path, num_users, cards_per_user=DEFAULT_CARDS_PER_USER, reviews_per_card=DEFAULT_REVIEWS_PER_CARD,
+                seed=42, chunk_users=DEFAULT_CHUNK_USERS, append=False):
+    """Generate training samples straight into a columnar store; returns the number of rows written"""
+    with TrainingStoreWriter(path, append=append) as writer:
+        start_rows = writer.rows
+        question_codes = np.array([writer.question_code(question_text(card)) for card in range(cards_per_user)],
+                                  dtype=np.int32)
+
+        for reviews in iter_review_chunks(num_users, cards_per_user, reviews_per_card, seed, chunk_users):
+            base, labels, timestamp, user, card = training_columns(reviews)
+            first_user = int(reviews.user[0])
+            user_codes = np.array([writer.user_code(user_id(first_user + offset))
+                                   for offset in range(int(reviews.user[-1]) - first_user + 1)], dtype=np.int32)
+            writer.append_arrays(base, labels, timestamp, user_codes[user - first_user], question_codes[card])
+
+        return writer.rows - start_rows
+
+
+def iso_timestamps(timestamp):
+    """ISO 8601 strings (as JSON.stringify writes Dates) for ms timestamps"""
+    return np.char.add(timestamp.astype('datetime64[ms]').astype(str), 'Z')
+
+
+def write_json(path, num_users, cards_per_user=DEFAULT_CARDS_PER_USER, reviews_per_card=DEFAULT_REVIEWS_PER_CARD,
+               seed=42, chunk_users=DEFAULT_CHUNK_USERS):
+    """
+    Generate training samples as an extract-training-data.js JSON export
+
+    metadata.reviewHistory is left out (the Python loaders drop it anyway).
+    Returns the number of samples written.
+    """
+    rows = 0
+    with open(path, 'w') as f:
+        f.write('[')
+        for reviews in iter_review_chunks(num_users, cards_per_user, reviews_per_card, seed, chunk_users):
+            base, labels, timestamp, user, card = training_columns(reviews)
+            review_index = np.nonzero(sample_mask(reviews))[1]
+
+            for b, label, when, u, c, i in zip(base.tolist(), labels.tolist(), iso_timestamps(timestamp).tolist(),
+                                               user.tolist(), card.tolist(), review_index.tolist()):
+                sample = {
+                    'features': dict(zip(BASE_FEATURES, b)),
+                    'label': {'recalled': bool(label[2]), 'actualInterval': label[1], 'optimalInterval': label[0]},
+                    'metadata': {'userId': user_id(u), 'question': question_text(c), 'reviewIndex': i,
+                                 'timestamp': when}
+                }
+                f.write((',\n' if rows else '\n') + json.dumps(sample))
+                rows += 1
+        f.write('\n]\n')
+    return rows
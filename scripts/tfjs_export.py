@@ -0,0 +1,144 @@
+"""
+In-process TensorFlow.js layers-model export
+
+Writes model.json and sharded weight files straight from an in-memory Keras
+model, in the format tf.loadLayersModel reads, without an intermediate .h5
+or the tensorflowjs_converter CLI. The topology comes from tf_keras, so it is
+already Keras 2 format (no convert-keras3-to-keras2.js pass).
+
+Optional weight quantization, using TF.js' own manifest encoding:
+
+    float16  half-precision weights (2x smaller)
+    uint8    affine: value = q * scale + min, per weight tensor (4x smaller)
+
+Usage:
+    from scripts.tfjs_export import export_keras_model
+
+    info = export_keras_model(model, 'ml/saved-model', quantization='uint8')
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+QUANTIZATIONS = ('float16', 'uint8')
+DEFAULT_SHARD_BYTES = 4 * 1024 * 1024
+MODEL_FILE = 'model.json'
+
+
+def quantize(values, quantization):
+    """(encoded array, manifest quantization entry or None) for one float32 tensor"""
+    values = np.asarray(values, dtype=np.float32)
+
+    if quantization is None:
+        return values, None
+
+    if quantization == 'float16':
+        return values.astype(np.float16), {'dtype': 'float16'}
+
+    if quantization == 'uint8':
+        quant_max = np.iinfo(np.uint8).max
+        min_value, max_value = float(values.min()), float(values.max())
+        if max_value == min_value:
+            # Constant tensor: every value decodes to min exactly (nudging would round it away)
+            return np.zeros(values.shape, dtype=np.uint8), {'dtype': 'uint8', 'scale': 1.0, 'min': min_value}
+        scale = (max_value - min_value) / quant_max
+
+        # Nudge the range so 0.0 is exactly representable, as tensorflowjs does
+        nudged_min = round(min_value / scale) * scale
+        nudged_max = nudged_min + quant_max * scale
+
+        clipped = np.clip(values, nudged_min, nudged_max)
+        encoded = np.round((clipped - nudged_min) / scale).astype(np.uint8)
+        return encoded, {'dtype': 'uint8', 'scale': scale, 'min': nudged_min}
+
+    raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+
+
+def dequantize(encoded, quantization):
+    """float32 values from a quantize() result"""
+    if quantization is None or quantization['dtype'] == 'float16':
+        return np.asarray(encoded, dtype=np.float32)
+    return encoded.astype(np.float32) * np.float32(quantization['scale']) + np.float32(quantization['min'])
+
+
+def keras_topology(model):
+    """modelTopology for model.json: Keras 2 model_config plus version info"""
+    model_config = json.loads(model.to_json())
+    return {
+        'keras_version': model_config.pop('keras_version', None),
+        'backend': model_config.pop('backend', 'tensorflow'),
+        'model_config': model_config
+    }
+
+
+def keras_weights(model):
+    """[(name, array)] in layer order, named like the TF.js converter ('dense/kernel')"""
+    return [(weight.name.split(':')[0], weight.numpy()) for weight in model.weights]
+
+
+def write_layers_model(output_dir, topology, named_weights, quantization=None,
+                       shard_bytes=DEFAULT_SHARD_BYTES, generated_by=None):
+    """
+    Write model.json and group1-shard*of*.bin files; returns export info
+
+    Shard names carry a digest of the weight data, so a new export never
+    overwrites the shards the current model.json points at. The new shards
+    are written first, then model.json is swapped in with os.replace, and
+    only then are shards it no longer references removed: a reader never
+    sees a manifest pointing at missing or half-written shards.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    weights = []
+    buffers = []
+    for name, values in named_weights:
+        encoded, entry = quantize(values, quantization)
+        spec = {'name': name, 'shape': list(np.shape(values)), 'dtype': 'float32'}
+        if entry is not None:
+            spec['quantization'] = entry
+        weights.append(spec)
+        buffers.append(np.ascontiguousarray(encoded).tobytes())
+
+    data = b''.join(buffers)
+    num_shards = max(1, -(-len(data) // shard_bytes))
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    paths = [f'group1-shard{i + 1}of{num_shards}-{digest}.bin' for i in range(num_shards)]
+
+    for i, path in enumerate(paths):
+        tmp_path = os.path.join(output_dir, path + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data[i * shard_bytes:(i + 1) * shard_bytes])
+        os.replace(tmp_path, os.path.join(output_dir, path))
+
+    model_json = {
+        'format': 'layers-model',
+        'generatedBy': generated_by or f"keras v{topology.get('keras_version')}",
+        'convertedBy': 'scripts/tfjs_export.py',
+        'modelTopology': topology,
+        'weightsManifest': [{'paths': paths, 'weights': weights}]
+    }
+    tmp_path = os.path.join(output_dir, MODEL_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(model_json, f)
+    os.replace(tmp_path, os.path.join(output_dir, MODEL_FILE))
+
+    for stale in glob.glob(os.path.join(output_dir, 'group*-shard*of*.bin')):
+        if os.path.basename(stale) not in paths:
+            os.remove(stale)
+
+    return {
+        'quantization': quantization,
+        'weightBytes': len(data),
+        'shards': num_shards,
+        'shardBytes': shard_bytes
+    }
+
+
+def export_keras_model(model, output_dir, quantization=None, shard_bytes=DEFAULT_SHARD_BYTES):
+    """Export an in-memory tf_keras model to a TF.js layers-model directory"""
+    topology = keras_topology(model)
+    return write_layers_model(output_dir, topology, keras_weights(model), quantization, shard_bytes)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Train the interval prediction model using tf_keras (Keras 2.x)
+
+Feature set and architecture are flags; see scripts/trainer.py for the
+available FEATURE_SETS and ARCHITECTURES. Uses GPU acceleration if available.
+
+Usage:
+    python scripts/train-interval-model.py                          # 51 features
+    python scripts/train-interval-model.py --feature-set=base       # 8 features
+    python scripts/train-interval-model.py --architecture=small --dry-run
+    python scripts/train-interval-model.py export.columns --pipeline=tfdata --batch-size=256
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.trainer import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,780 @@
+"""
+Interval model trainer behind the Python training entry points
+
+One code path for load -> features -> split -> normalize -> fit -> evaluate
+-> export -> metadata, parameterized by:
+
+    FEATURE_SETS   which input matrix to build from the training data
+    ARCHITECTURES  hidden layer stacks; every model ends in Dense(1, softplus)
+
+TensorFlow and tf_keras are only imported once training actually starts, so
+``--help`` and ``--dry-run`` return without loading them. A new feature set
+or model size is one more dict entry here.
+
+Every stage is timed (scripts/instrumentation.py) and the run report is
+written to training-report.json next to metadata.json.
+
+Feature matrices are kept in a content-addressed cache (scripts/feature_cache.py,
+--feature-cache): when neither the data nor the feature builder has changed,
+the load and featurize stages are a memory-map of the cached arrays, and the
+split's normalization statistics are read back instead of recomputed.
+
+With ``--incremental`` the deployed model in --base-model is fine-tuned
+instead: its weights are loaded, the new samples are merged into its
+normalization statistics (normalization-state.json), and it trains for a few
+epochs on the samples newer than its dataWatermark (or trainedDate) plus a
+bounded random replay of older ones. The test set is drawn from the new
+samples only (the deployed model has seen the replayed ones); if the
+fine-tuned model's test MAE on it is more than --max-mae-regression worse
+than the deployed model's, the run falls back to full training.
+
+Usage:
+    python scripts/train-interval-model.py --feature-set=advanced
+    python scripts/train-interval-model.py --feature-set=base --architecture=large --dry-run
+"""
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from scripts.feature_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, FeatureCache, split_name
+from scripts.feature_engine import NUM_FEATURES, build_feature_matrix
+from scripts.feature_spec import BASE_FEATURES, FEATURE_SPEC_VERSION
+from scripts.instrumentation import PROFILERS, RunReport
+from scripts.numpy_runtime import NumpyIntervalModel, layer_configs, load_weights
+from scripts.running_stats import RunningStats
+from scripts.tfjs_export import DEFAULT_SHARD_BYTES, QUANTIZATIONS, export_keras_model
+from scripts.training_store import default_training_data_path, load_training_data, timestamp_ms
+
+DEFAULT_OUTPUT_DIR = 'ml/saved-model'
+DEFAULT_EPOCHS = 100
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_LEARNING_RATE = 0.001
+DEFAULT_TEST_SIZE = 0.2
+DEFAULT_VALIDATION_SPLIT = 0.2
+DEFAULT_SEED = 42
+
+PIPELINES = ('arrays', 'tfdata')
+DEFAULT_PIPELINE = 'arrays'
+
+DEFAULT_FINE_TUNE_EPOCHS = 5
+DEFAULT_FINE_TUNE_LEARNING_RATE = 0.0001
+DEFAULT_MAX_REPLAY = 50000  # Default replay: one old sample per new one, at most this many
+DEFAULT_MAX_MAE_REGRESSION = 0.05  # Fall back to full training if test MAE gets 5% worse
+FINE_TUNE_PATIENCE = 2
+LEGACY_FEATURE_SPEC_VERSION = '1.0.0'  # Models whose metadata.json predates featureSpecVersion
+
+REPORT_FILE = 'training-report.json'
+STAGES = ('load', 'select', 'featurize', 'cross_validation', 'normalize', 'build', 'fit', 'evaluate',
+          'export', 'save')
+
+
+def base_feature_matrix(training_data):
+    """The 8 base features in order, with averageResponseTime in seconds"""
+    X = np.array(training_data.base, dtype=np.float32)
+    X[:, BASE_FEATURES.index('averageResponseTime')] /= 1000
+    return X
+
+
+def advanced_feature_matrix(training_data):
+    """The 51 features from scripts/feature_spec.py, with each card's history inputs"""
+    return build_feature_matrix(training_data.feature_columns())
+
+
+FEATURE_SETS = {
+    'base': {
+        'build': base_feature_matrix,
+        'numFeatures': len(BASE_FEATURES),
+        'architecture': 'small',
+        'modelVersion': '3.0.0-local',
+        'modelFile': 'ml/interval_model_local.h5',
+        'description': '8 base features (averageResponseTime in seconds)'
+    },
+    'advanced': {
+        'build': advanced_feature_matrix,
+        'numFeatures': NUM_FEATURES,
+        'architecture': 'large',
+        'modelVersion': '4.0.0-advanced',
+        'modelFile': 'ml/interval_model_advanced.h5',
+        'history': True,
+        'description': '51 advanced features with forgetting curves, interactions, polynomial, cyclical time, moving averages, momentum, and retention prediction'
+    }
+}
+
+# Hidden layers as (units, batch_norm, dropout)
+ARCHITECTURES = {
+    'small': [(64, True, 0.3), (32, True, 0.25), (16, False, 0.2)],
+    'large': [(128, True, 0.3), (64, True, 0.25), (32, False, 0.2), (16, False, 0.0)]
+}
+
+
+def architecture_string(num_features, architecture):
+    """e.g. '51→128→64→32→16→1'"""
+    units = [num_features] + [layer[0] for layer in ARCHITECTURES[architecture]] + [1]
+    return '→'.join(str(u) for u in units)
+
+
+def count_params(num_features, architecture):
+    """Parameter count of the model build_model would create, without TensorFlow"""
+    total = 0
+    inputs = num_features
+    for units, batch_norm, _ in ARCHITECTURES[architecture]:
+        total += inputs * units + units
+        if batch_norm:
+            total += 4 * units  # gamma, beta, moving mean, moving variance
+        inputs = units
+    return total + inputs + 1
+
+
+def load_features(data_path, feature_set, cache=None):
+    """
+    (X, y, groups) for a feature set
+
+    X is the float32 feature matrix, y the optimalInterval labels, groups the
+    integer user code of every sample. With a FeatureCache they are
+    memory-mapped from it when cached, and added to it when not.
+    """
+    if cache is not None:
+        key = cache.key(data_path, feature_set, FEATURE_SETS[feature_set]['build'])
+        entry = cache.get(key)
+        if entry:
+            return entry.X, entry.y, entry.groups
+
+    training_data = load_training_data(data_path)
+    X, y, groups = training_features(training_data, feature_set)
+    if cache is not None:
+        cache.put(key, X, y, groups, cache_info(data_path, feature_set, training_data))
+    return X, y, groups
+
+
+def training_features(training_data, feature_set):
+    """(X, y, groups) from already loaded TrainingData"""
+    X = FEATURE_SETS[feature_set]['build'](training_data)
+    y = np.array(training_data.label('optimalInterval'), dtype=np.float32).reshape(-1, 1)
+    return X, y, np.asarray(training_data.user)
+
+
+def cache_info(data_path, feature_set, training_data):
+    """What a feature cache entry records about the data it was built from"""
+    return {'dataPath': data_path, 'featureSet': feature_set, 'latestSample': latest_sample_date(training_data)}
+
+
+def feature_cache(args):
+    """The FeatureCache a run reads and fills, or None (--no-feature-cache)"""
+    if args.no_feature_cache:
+        return None
+    return FeatureCache(args.feature_cache, int(args.feature_cache_size * 1024 * 1024))
+
+
+def train_test_indices(n, test_size=DEFAULT_TEST_SIZE, seed=DEFAULT_SEED):
+    """Shuffled (train, test) indices; the same split as sklearn's train_test_split"""
+    n_test = math.ceil(n * test_size)
+    order = np.random.RandomState(seed).permutation(n)
+    return order[n_test:], order[:n_test]
+
+
+def warm_start_indices(num_new, n, test_size=DEFAULT_TEST_SIZE, seed=DEFAULT_SEED):
+    """
+    (train, test) indices for a warm start whose first num_new rows are new
+
+    The test rows come from the new samples only, since the deployed model
+    was trained on the replayed ones; every replayed row is trained on.
+    """
+    new_train, test = train_test_indices(num_new, test_size, seed)
+    return np.concatenate([new_train, np.arange(num_new, n)]), test
+
+
+def split_validation(X, y, validation_split=DEFAULT_VALIDATION_SPLIT, seed=DEFAULT_SEED):
+    """Shuffled (X_fit, y_fit, X_val, y_val) hold-out split of the training set"""
+    order = np.random.default_rng(seed).permutation(len(X))
+    n_val = int(round(len(X) * validation_split))
+    val, fit = order[:n_val], order[n_val:]
+    return X[fit], y[fit], X[val], y[val]
+
+
+def normalization_state(X, rows=None):
+    """Mergeable RunningStats of the given rows of X (default all), merged from per-chunk states"""
+    return RunningStats.from_chunks(X, rows)
+
+
+def normalization_stats(X, rows=None):
+    """Per-feature (mean, std) as saved to normalization-stats.json"""
+    return normalization_state(X, rows).normalization()
+
+
+def import_keras():
+    """TensorFlow with tf_keras (Keras 2.x), as TensorFlow.js expects"""
+    os.environ['TF_USE_LEGACY_KERAS'] = '1'
+    import tensorflow as tf
+    import tf_keras as keras
+    return tf, keras
+
+
+def build_model(num_features, architecture, learning_rate=DEFAULT_LEARNING_RATE, dropout=None):
+    """
+    Compiled Sequential model for an ARCHITECTURES entry
+
+    dropout, if given, replaces the rate of every layer that has dropout.
+    """
+    _, keras = import_keras()
+
+    layers = []
+    for i, (units, batch_norm, layer_dropout) in enumerate(ARCHITECTURES[architecture]):
+        if dropout is not None and layer_dropout:
+            layer_dropout = dropout
+        extra = {'input_shape': (num_features,)} if i == 0 else {}
+        layers.append(keras.layers.Dense(units, activation='relu', kernel_initializer='he_normal', **extra))
+        if batch_norm:
+            layers.append(keras.layers.BatchNormalization())
+        if layer_dropout:
+            layers.append(keras.layers.Dropout(layer_dropout))
+    layers.append(keras.layers.Dense(1, activation='softplus'))
+
+    model = keras.Sequential(layers)
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='mse',
+        metrics=['mae']
+    )
+    return model
+
+
+def training_callbacks(patience=15, lr_patience=7):
+    """Early stopping and LR schedule shared by every run"""
+    _, keras = import_keras()
+    return [
+        keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=patience,
+            restore_best_weights=True
+        ),
+        keras.callbacks.ReduceLROnPlateau(
+            monitor='val_loss',
+            factor=0.5,
+            patience=lr_patience,
+            min_lr=0.00001
+        )
+    ]
+
+
+def load_deployed(model_path):
+    """(metadata, mean, std) of an exported model directory"""
+    with open(os.path.join(model_path, 'metadata.json'), 'r') as f:
+        metadata = json.load(f)
+    with open(os.path.join(model_path, 'normalization-stats.json'), 'r') as f:
+        stats = json.load(f)
+    return metadata, np.array(stats['mean'], dtype=np.float32), np.array(stats['std'], dtype=np.float32)
+
+
+def load_deployed_state(model_path, metadata, mean, std):
+    """
+    The deployed model's normalization RunningStats
+
+    Models saved before normalization-state.json existed get a state rebuilt
+    from their mean/std and trainingSize.
+    """
+    try:
+        return RunningStats.load(model_path)
+    except FileNotFoundError:
+        return RunningStats.from_normalization(mean, std, metadata.get('trainingSize', 0))
+
+
+def rescale_input_layer(model, old_mean, old_std, new_mean, new_std):
+    """
+    Re-express the first Dense layer for a new normalization
+
+    Folds the change of mean/std into its kernel and bias, so the model gives
+    the same predictions on inputs normalized with (new_mean, new_std) as it
+    did with (old_mean, old_std).
+    """
+    layer = next(layer for layer in model.layers if layer.weights)
+    kernel, bias = layer.get_weights()
+    old_std = np.asarray(old_std, dtype=np.float64)
+    shift = ((np.asarray(new_mean, dtype=np.float64) - old_mean) / old_std) @ kernel
+    scale = (np.asarray(new_std, dtype=np.float64) / old_std)[:, None]
+    layer.set_weights([(kernel * scale).astype(np.float32), (bias + shift).astype(np.float32)])
+
+
+def data_watermark(metadata):
+    """ms timestamp of the newest sample the model was trained on (trainedDate for older models)"""
+    return timestamp_ms(metadata.get('dataWatermark') or metadata['trainedDate'])
+
+
+def incremental_indices(timestamps, watermark, replay_size=None, seed=DEFAULT_SEED):
+    """
+    (new, replay) sample indices for a warm-start run
+
+    new is every sample after the watermark; replay is a random sample of the
+    older ones, replay_size of them (default: as many as there are new
+    samples, at most DEFAULT_MAX_REPLAY).
+    """
+    timestamps = np.asarray(timestamps)
+    is_new = timestamps > watermark  # Missing (NaN) timestamps count as old
+    new, old = np.flatnonzero(is_new), np.flatnonzero(~is_new)
+
+    if replay_size is None:
+        replay_size = min(len(new), DEFAULT_MAX_REPLAY)
+    replay = np.random.default_rng(seed).choice(old, min(replay_size, len(old)), replace=False)
+    return new, np.sort(replay)
+
+
+def load_deployed_weights(model, model_path):
+    """
+    Copy an exported model's weights into a Keras model of the same architecture
+
+    Layers are matched by position among the weighted layers and weights by
+    their short name (kernel, gamma, ...), since the manifest is not in layer
+    order. Raises ValueError if the architectures differ.
+    """
+    with open(os.path.join(model_path, 'model.json'), 'r') as f:
+        model_data = json.load(f)
+    weights = load_weights(model_path, model_data['weightsManifest'])
+
+    saved_layers = [layer for layer in layer_configs(model_data['modelTopology'])
+                    if layer['class_name'] in ('Dense', 'BatchNormalization')]
+    keras_layers = [layer for layer in model.layers if layer.weights]
+
+    saved_classes = [layer['class_name'] for layer in saved_layers]
+    keras_classes = [type(layer).__name__ for layer in keras_layers]
+    if saved_classes != keras_classes:
+        raise ValueError(f"Deployed model layers {saved_classes} do not match {keras_classes}")
+
+    for saved, layer in zip(saved_layers, keras_layers):
+        values = []
+        for weight in layer.weights:
+            key = f"{saved['config']['name']}/{weight.name.split('/')[-1].split(':')[0]}"
+            if key not in weights or tuple(weights[key].shape) != tuple(weight.shape):
+                raise ValueError(f"Deployed model has no weight {key} of shape {tuple(weight.shape)}")
+            values.append(np.asarray(weights[key], dtype=np.float32))
+        layer.set_weights(values)
+
+
+def evaluate(model, X_test, X_test_norm, y_test):
+    """Test metrics against the memoryStrength baseline"""
+    test_loss, test_mae = model.evaluate(X_test_norm, y_test, verbose=0)
+    baseline_mae = np.mean(np.abs(X_test[:, 0:1] - y_test))  # memoryStrength baseline
+    improvement = ((baseline_mae - test_mae) / baseline_mae) * 100
+
+    return {
+        'testMAE': float(test_mae),
+        'testLoss': float(test_loss),
+        'baselineMAE': float(baseline_mae),
+        'improvement': float(improvement)
+    }
+
+
+def export_model(model, model_file, output_dir, quantization=None, shard_bytes=DEFAULT_SHARD_BYTES):
+    """Save the .h5 model and write the TensorFlow.js layers model in-process"""
+    model.save(model_file)
+    print(f"✓ Saved: {model_file}")
+
+    info = export_keras_model(model, output_dir, quantization, shard_bytes)
+    print(f"✓ Exported TensorFlow.js model to {output_dir}/ "
+          f"({info['weightBytes'] / 1024:.1f} KB weights, {info['quantization'] or 'float32'}, "
+          f"{info['shards']} shard(s))")
+    return info
+
+
+def export_accuracy(model, output_dir, X_test_norm, y_test):
+    """
+    How much the exported model differs from the in-memory one on the test set
+
+    Reloads the export with the NumPy runtime, so quantization error (and
+    anything else lost in export) shows up as maeDelta.
+    """
+    expected = model.predict(X_test_norm, verbose=0)
+    exported = NumpyIntervalModel.load(output_dir).predict(X_test_norm)
+
+    keras_mae = float(np.mean(np.abs(expected - y_test)))
+    exported_mae = float(np.mean(np.abs(exported - y_test)))
+
+    return {
+        'exportedTestMAE': exported_mae,
+        'maeDelta': exported_mae - keras_mae,
+        'maxPredictionDelta': float(np.max(np.abs(exported - expected)))
+    }
+
+
+def save_outputs(output_dir, mean, std, metadata, state=None):
+    """Write normalization-stats.json, normalization-state.json (if given) and metadata.json"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, 'normalization-stats.json'), 'w') as f:
+        json.dump({'mean': mean.tolist(), 'std': std.tolist()}, f, indent=2)
+
+    with open(os.path.join(output_dir, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"✓ Saved: {os.path.join(output_dir, 'normalization-stats.json')}")
+    if state is not None:
+        print(f"✓ Saved: {state.save(output_dir)}")
+    print(f"✓ Saved: {os.path.join(output_dir, 'metadata.json')}")
+
+
+def select_incremental(args, training_data, architecture):
+    """
+    Warm-start plan: (new + replay TrainingData, deployed) where deployed has
+    the base model's metadata, mean, std, normalization state and a summary
+    for metadata.json. The new samples come first in the returned data.
+
+    Returns (training_data, None) when there is no compatible deployed model
+    (train from scratch) and (None, deployed) when nothing is newer than it.
+    """
+    base_model = args.base_model or args.output_dir
+    try:
+        metadata, mean, std = load_deployed(base_model)
+    except (OSError, KeyError, ValueError) as error:
+        print(f"⚠️  No deployed model to warm-start from in {base_model} ({error}); training from scratch\n")
+        return training_data, None
+
+    num_features = FEATURE_SETS[args.feature_set]['numFeatures']
+    expected = architecture_string(num_features, architecture)
+    spec_version = metadata.get('featureSpecVersion', LEGACY_FEATURE_SPEC_VERSION)
+    if metadata.get('architecture') != expected or spec_version != FEATURE_SPEC_VERSION:
+        print(f"⚠️  Deployed model ({metadata.get('architecture')}, feature spec {spec_version}) does not match "
+              f"{expected} (feature spec {FEATURE_SPEC_VERSION}); training from scratch\n")
+        return training_data, None
+
+    watermark = data_watermark(metadata)
+    new, replay = incremental_indices(training_data.timestamp, watermark, args.replay_size, args.seed)
+    deployed = {
+        'metadata': metadata,
+        'mean': mean,
+        'std': std,
+        'state': load_deployed_state(base_model, metadata, mean, std),
+        'summary': {
+            'baseModel': base_model,
+            'baseModelVersion': metadata.get('modelVersion'),
+            'baseTrainedDate': metadata.get('trainedDate'),
+            'watermark': datetime.fromtimestamp(watermark / 1000, timezone.utc).isoformat(),
+            'newSamples': int(len(new)),
+            'replaySamples': int(len(replay)),
+            'totalSamples': len(training_data)
+        }
+    }
+
+    print(f"Warm start from {base_model} ({metadata.get('modelVersion')}, trained {metadata.get('trainedDate')})")
+    print(f"  New samples since {deployed['summary']['watermark']}: {len(new)}")
+    print(f"  Replay samples: {len(replay)} of {len(training_data) - len(new)} older\n")
+
+    if len(new) == 0:
+        return None, deployed
+    if FEATURE_SETS[args.feature_set].get('history'):
+        training_data.history_columns()  # From every sample, before the subset drops older reviews
+    return training_data.subset(np.concatenate([new, replay])), deployed
+
+
+def latest_sample_date(training_data):
+    """ISO timestamp of the newest sample (the next run's dataWatermark), or None"""
+    timestamps = np.asarray(training_data.timestamp)
+    if not len(timestamps) or np.isnan(timestamps).all():
+        return None
+    return datetime.fromtimestamp(float(np.nanmax(timestamps)) / 1000, timezone.utc).isoformat()
+
+
+def full_training_args(args, reason):
+    """args for falling back from --incremental to a full run"""
+    print(f"\n⚠️  {reason}; falling back to full training\n")
+    return argparse.Namespace(**{**vars(args), 'incremental': False, 'fallback_reason': reason})
+
+
+def train(args):
+    """Run one training job; returns metadata (None for a dry run)"""
+    feature_set = FEATURE_SETS[args.feature_set]
+    architecture = args.architecture or feature_set['architecture']
+    num_features = feature_set['numFeatures']
+
+    report = RunReport('training', args.profile_stage, args.profiler)
+
+    data_path = args.data or default_training_data_path()
+    # Warm starts featurize only the new and replayed samples, so they skip the cache
+    cache = None if args.incremental else feature_cache(args)
+    entry = None
+    print(f"Loading training data from {data_path}...")
+    with report.stage('load'):
+        if cache:
+            key = cache.key(data_path, args.feature_set, feature_set['build'])
+            entry = cache.get(key)
+        training_data = None if entry else load_training_data(data_path)
+
+    deployed = None
+    if entry:
+        print(f"✓ Features from cache ({entry.path})\n")
+        X, y, groups = entry.X, entry.y, entry.groups
+        latest_sample = entry.info['latestSample']
+    else:
+        latest_sample = latest_sample_date(training_data)
+
+        if args.incremental:
+            with report.stage('select'):
+                training_data, deployed = select_incremental(args, training_data, architecture)
+            if training_data is None:
+                print("Nothing to train on: the deployed model is up to date.")
+                return None
+
+        with report.stage('featurize'):
+            X, y, groups = training_features(training_data, args.feature_set)
+            if cache:
+                entry = cache.put(key, X, y, groups, cache_info(data_path, args.feature_set, training_data))
+
+    print(f"Feature matrix: {X.shape}")
+    print(f"Label vector: {y.shape}")
+    print(f"Label range: [{y.min():.1f}, {y.max():.1f}] days\n")
+
+    if deployed:
+        train_idx, test_idx = warm_start_indices(deployed['summary']['newSamples'], len(X),
+                                                 args.test_size, args.seed)
+    else:
+        train_idx, test_idx = train_test_indices(len(X), args.test_size, args.seed)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+    print(f"Feature set: {args.feature_set} ({num_features} features)")
+    print(f"Architecture: {architecture} ({architecture_string(num_features, architecture)}, "
+          f"{count_params(num_features, architecture):,} params)")
+    print(f"Training set: {len(X_train)} samples ({args.validation_split:.0%} held out for validation)")
+    print(f"Test set: {len(X_test)} samples\n")
+
+    fold_of = None
+    if args.folds > 1:
+        from scripts.cross_validation import fold_sizes, group_kfold
+
+        fold_of = group_kfold(groups, args.folds)
+        print(f"Cross-validation: {args.folds} folds grouped by userId")
+        for fold, (samples, users) in enumerate(fold_sizes(fold_of, groups, args.folds)):
+            print(f"  Fold {fold + 1}: {samples} samples, {users} users")
+        print()
+
+    if args.dry_run:
+        report.print_summary()
+        print("\nDry run: not training.")
+        return None
+
+    cross_validation = None
+    if fold_of is not None:
+        from scripts.cross_validation import run_cross_validation
+
+        def report_fold(result):
+            print(f"  ✓ Fold {result['fold'] + 1}: MAE {result['testMAE']:.3f} "
+                  f"(baseline {result['baselineMAE']:.3f}), {result['wallSeconds']:.0f}s")
+
+        print(f"Running {args.folds}-fold cross-validation...")
+        with report.stage('cross_validation'):
+            cross_validation = run_cross_validation(
+                X, y, fold_of, architecture, args.learning_rate, args.dropout, args.batch_size,
+                args.epochs, args.pipeline, args.validation_split, args.seed,
+                workers=args.fold_workers, threads=args.threads, on_result=report_fold
+            )
+        print(f"✓ CV MAE: {cross_validation['meanMAE']:.3f} ± {cross_validation['stdMAE']:.3f} days "
+              f"in {cross_validation['wallSeconds']:.0f}s ({cross_validation['speedup']:.1f}x parallel)\n")
+
+    tf, keras = import_keras()
+    from scripts.training_pipeline import StepsPerSecond, fit_inputs
+
+    print("TensorFlow version:", tf.__version__)
+    print("Keras version:", keras.__version__)
+    trained_on_gpu = len(tf.config.list_physical_devices('GPU')) > 0
+    print("GPU available:", trained_on_gpu)
+    print()
+
+    # Normalize features. A warm start merges the new training samples into the
+    # deployed model's statistics (replayed samples are already counted there).
+    with report.stage('normalize'):
+        if deployed:
+            new_train = train_idx[train_idx < deployed['summary']['newSamples']]
+            state = deployed['state'].copy().merge(normalization_state(X, new_train))
+        else:
+            state = entry.load_state(split_name(args.test_size, args.seed)) if entry else None
+            if state is None:
+                state = normalization_state(X, train_idx)
+                if entry:
+                    entry.save_state(split_name(args.test_size, args.seed), state)
+        mean, std = state.normalization()
+        X_train_norm = (X_train - mean) / std
+        X_test_norm = (X_test - mean) / std
+
+        X_fit, y_fit, X_val, y_val = split_validation(X_train_norm, y_train, args.validation_split, args.seed)
+
+    epochs = args.fine_tune_epochs if deployed else args.epochs
+    learning_rate = args.fine_tune_learning_rate if deployed else args.learning_rate
+
+    print("Building model...")
+    with report.stage('build'):
+        model = build_model(num_features, architecture, learning_rate, args.dropout)
+        deployed_performance = None
+        if deployed:
+            try:
+                load_deployed_weights(model, deployed['summary']['baseModel'])
+            except (OSError, KeyError, ValueError) as error:
+                return train(full_training_args(args, f"Could not load the deployed weights ({error})"))
+            rescale_input_layer(model, deployed['mean'], deployed['std'], mean, std)
+            deployed_performance = evaluate(model, X_test, X_test_norm, y_test)
+    model.summary()
+    print()
+
+    if deployed_performance:
+        print(f"Deployed model on this test set: MAE {deployed_performance['testMAE']:.3f} days\n")
+        print(f"Fine-tuning for up to {epochs} epochs (learning rate {learning_rate})...\n")
+
+    print(f"Training model ({args.pipeline} pipeline, batch size {args.batch_size})...\n")
+    throughput = StepsPerSecond(args.batch_size)
+    with report.stage('fit'):
+        history = model.fit(
+            **fit_inputs(args.pipeline, X_fit, y_fit, X_val, y_val, args.batch_size),
+            epochs=epochs,
+            callbacks=[throughput] + (training_callbacks(FINE_TUNE_PATIENCE, 1) if deployed else training_callbacks()),
+            verbose=1
+        )
+
+    print("\n✓ Training complete!")
+    throughput_summary = throughput.summary()
+    print(f"Throughput: {throughput_summary['stepsPerSecond']:.1f} steps/sec "
+          f"({throughput_summary['samplesPerSecond']:.0f} samples/sec)\n")
+
+    with report.stage('evaluate'):
+        performance = evaluate(model, X_test, X_test_norm, y_test)
+    print(f"Test MAE: {performance['testMAE']:.2f} days")
+    print(f"Baseline MAE: {performance['baselineMAE']:.2f} days")
+    print(f"Improvement: {performance['improvement']:.1f}%\n")
+
+    if deployed_performance:
+        limit = deployed_performance['testMAE'] * (1 + args.max_mae_regression)
+        if performance['testMAE'] > limit:
+            return train(full_training_args(
+                args, f"Fine-tuned test MAE {performance['testMAE']:.3f} is worse than the deployed "
+                      f"model's {deployed_performance['testMAE']:.3f} (limit {limit:.3f})"
+            ))
+        deployed['summary']['deployedTestMAE'] = deployed_performance['testMAE']
+
+    print("Saving model...")
+    model_file = args.model_file or feature_set['modelFile']
+    with report.stage('export'):
+        export_info = export_model(model, model_file, args.output_dir, args.quantize,
+                                   int(args.shard_size * 1024 * 1024))
+        export_info.update(export_accuracy(model, args.output_dir, X_test_norm, y_test))
+    print(f"Export accuracy: test MAE {export_info['exportedTestMAE']:.3f} days "
+          f"({export_info['maeDelta']:+.4f} vs in-memory model)\n")
+
+    metadata = {
+        'modelVersion': feature_set['modelVersion'],
+        'trainedDate': datetime.now().isoformat(),
+        'featureSet': args.feature_set,
+        'numFeatures': num_features,
+        'featureSpecVersion': FEATURE_SPEC_VERSION,
+        'architecture': architecture_string(num_features, architecture),
+        'architectureName': architecture,
+        'trainingSize': len(X_train),
+        'normalizationSamples': state.count,
+        'testSize': len(X_test),
+        'dataWatermark': latest_sample,
+        'performance': performance,
+        'training': {
+            'mode': 'incremental' if deployed else 'full',
+            'incremental': deployed['summary'] if deployed else None,
+            'fallbackReason': getattr(args, 'fallback_reason', None),
+            'epochs': epochs,
+            'epochsRun': len(history.history['loss']),
+            'batchSize': args.batch_size,
+            'learningRate': learning_rate,
+            'dropout': args.dropout,
+            'validationSplit': args.validation_split,
+            'pipeline': args.pipeline,
+            'throughput': throughput_summary
+        },
+        'crossValidation': cross_validation,
+        'features': feature_set['description'],
+        'exportMethod': 'tfjs_export_in_process',
+        'export': export_info,
+        'kerasVersion': keras.__version__,
+        'trainedOnGPU': trained_on_gpu
+    }
+    with report.stage('save'):
+        save_outputs(args.output_dir, mean, std, metadata, state)
+
+    report.record('data', {'path': data_path, 'samples': len(X), 'features': num_features,
+                           'featureCache': None if cache is None else ('hit' if cache.hits else 'miss')})
+    report.record('throughput', throughput_summary)
+    report.record('epochs', throughput.per_epoch())
+    report_path = os.path.join(args.output_dir, REPORT_FILE)
+    report.write(report_path)
+    print(f"\nStage timings ({report_path}):")
+    report.print_summary()
+
+    return metadata
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Train the interval prediction model')
+    parser.add_argument('data', nargs='?', help='Columnar store or JSON export (default: training-data-clean)')
+    parser.add_argument('--feature-set', choices=sorted(FEATURE_SETS), default='advanced')
+    parser.add_argument('--architecture', choices=sorted(ARCHITECTURES),
+                        help="Hidden layer stack (default: the feature set's own)")
+    parser.add_argument('--epochs', type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--learning-rate', type=float, default=DEFAULT_LEARNING_RATE)
+    parser.add_argument('--dropout', type=float,
+                        help="Dropout rate for every dropout layer (default: the architecture's own)")
+    parser.add_argument('--pipeline', choices=PIPELINES, default=DEFAULT_PIPELINE,
+                        help='Feed model.fit NumPy arrays or a prefetching tf.data pipeline')
+    parser.add_argument('--test-size', type=float, default=DEFAULT_TEST_SIZE)
+    parser.add_argument('--validation-split', type=float, default=DEFAULT_VALIDATION_SPLIT,
+                        help='Fraction of the training set held out for validation')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--folds', type=int, default=0,
+                        help='Also run k-fold cross-validation grouped by userId (0 = off)')
+    parser.add_argument('--fold-workers', type=int, help='Processes for the folds (default: one per fold)')
+    parser.add_argument('--threads', type=int, help='CPU threads per fold worker (default: CPUs / workers)')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help='TensorFlow.js model directory')
+    parser.add_argument('--model-file', help="Keras .h5 path (default: the feature set's own)")
+    parser.add_argument('--quantize', choices=QUANTIZATIONS,
+                        help='Quantize exported TensorFlow.js weights (default: float32)')
+    parser.add_argument('--shard-size', type=float, default=DEFAULT_SHARD_BYTES / (1024 * 1024),
+                        help='Maximum weight shard size in MB')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Fine-tune the deployed model on samples newer than its training data')
+    parser.add_argument('--base-model', help='Model directory to warm-start from (default: --output-dir)')
+    parser.add_argument('--replay-size', type=int,
+                        help=f'Older samples replayed with the new ones (default: one per new sample, '
+                             f'at most {DEFAULT_MAX_REPLAY})')
+    parser.add_argument('--fine-tune-epochs', type=int, default=DEFAULT_FINE_TUNE_EPOCHS)
+    parser.add_argument('--fine-tune-learning-rate', type=float, default=DEFAULT_FINE_TUNE_LEARNING_RATE)
+    parser.add_argument('--max-mae-regression', type=float, default=DEFAULT_MAX_MAE_REGRESSION,
+                        help='Fall back to full training if fine-tuned test MAE is this much worse (0.05 = 5%%)')
+    parser.add_argument('--feature-cache', default=DEFAULT_CACHE_DIR,
+                        help='Feature cache directory, reused while the data and feature spec are unchanged')
+    parser.add_argument('--feature-cache-size', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help='Feature cache size limit in MB (least recently used entries are evicted)')
+    parser.add_argument('--no-feature-cache', action='store_true', help='Always rebuild the feature matrix')
+    parser.add_argument('--profile-stage', choices=STAGES,
+                        help='Profile one stage and add the top entries to the run report')
+    parser.add_argument('--profiler', choices=PROFILERS, default='cprofile',
+                        help='cprofile (CPU time per function) or tracemalloc (allocations)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Load data and print the plan without importing TensorFlow')
+    return parser
+
+
+def main(argv=None, **defaults):
+    """CLI entry point; defaults override the parser defaults (e.g. feature_set='base')"""
+    parser = build_parser()
+    parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+    if args.incremental and args.folds > 1:
+        parser.error('--folds cannot be combined with --incremental')
+
+    metadata = train(args)
+    if metadata is None:
+        return
+
+    print("\n" + "="*70)
+    print(f"✓ TRAINING COMPLETE ({args.feature_set} features, {metadata['architecture']}, "
+          f"{metadata['training']['mode']})")
+    print("="*70)
+    print(f"\nModel files saved to {args.output_dir}/")
+    print("\nNext steps:")
+    print("1. Test: node scripts/debug-ml-predictions.js")
+    print("2. Copy to client: public/models/")
+    print("="*70)
@@ -0,0 +1,102 @@
+"""
+Input pipelines and throughput measurement for model.fit
+
+Two modes feed the trainers:
+
+    arrays   NumPy arrays straight into model.fit (Keras slices them per batch)
+    tfdata   tf.data: cache -> shuffle -> batch -> prefetch(AUTOTUNE), so the
+             next batches are prepared on background threads while the
+             current step runs
+
+Both train against an explicit held-out validation set
+(scripts.trainer.split_validation) rather than Keras' validation_split, which always takes the tail of the
+arrays. StepsPerSecond reports per-epoch throughput so batch sizes and modes
+can be compared on a given machine.
+
+Imports TensorFlow at module level; scripts/trainer.py imports it only once
+training starts, after setting TF_USE_LEGACY_KERAS.
+"""
+
+import time
+
+import numpy as np
+import tensorflow as tf
+import tf_keras as keras
+
+
+def make_dataset(X, y, batch_size, shuffle=False, seed=42):
+    """tf.data pipeline over in-memory arrays"""
+    dataset = tf.data.Dataset.from_tensor_slices((X, y)).cache()
+    if shuffle:
+        dataset = dataset.shuffle(len(X), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def fit_inputs(pipeline, X_fit, y_fit, X_val, y_val, batch_size):
+    """
+    Keyword arguments for model.fit in the given pipeline mode
+
+    Includes the training data, validation data and batch size (arrays mode
+    only; datasets are already batched).
+    """
+    if pipeline == 'tfdata':
+        return {
+            'x': make_dataset(X_fit, y_fit, batch_size, shuffle=True),
+            'validation_data': make_dataset(X_val, y_val, batch_size)
+        }
+    if pipeline == 'arrays':
+        return {
+            'x': X_fit,
+            'y': y_fit,
+            'batch_size': batch_size,
+            'shuffle': True,
+            'validation_data': (X_val, y_val)
+        }
+    raise ValueError(f"Unknown pipeline '{pipeline}', expected 'arrays' or 'tfdata'")
+
+
+class StepsPerSecond(keras.callbacks.Callback):
+    """Measures training steps/sec and samples/sec for every epoch (also added to the epoch logs)"""
+
+    def __init__(self, batch_size):
+        super().__init__()
+        self.batch_size = batch_size
+        self.epochs = []  # (steps, seconds) per epoch
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._steps = 0
+        self._start = self._last_step = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._steps += 1
+        self._last_step = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Up to the last training step, so validation time is not counted
+        seconds = self._last_step - self._start
+        self.epochs.append((self._steps, seconds))
+        if logs is not None:
+            logs['steps_per_sec'] = self._steps / seconds if seconds else 0.0
+            logs['samples_per_sec'] = logs['steps_per_sec'] * self.batch_size
+
+    def summary(self):
+        """Median throughput over all epochs, for metadata.json"""
+        if not self.epochs:
+            return {'stepsPerSecond': 0.0, 'samplesPerSecond': 0.0, 'epochs': 0}
+
+        rates = [steps / seconds for steps, seconds in self.epochs if seconds > 0]
+        steps_per_second = float(np.median(rates)) if rates else 0.0
+        return {
+            'stepsPerSecond': steps_per_second,
+            'samplesPerSecond': steps_per_second * self.batch_size,
+            'epochs': len(self.epochs)
+        }
+
+    def per_epoch(self):
+        """[{epoch, steps, seconds, samplesPerSecond}] for the run report"""
+        return [{
+            'epoch': epoch + 1,
+            'steps': steps,
+            'seconds': seconds,
+            'samplesPerSecond': steps * self.batch_size / seconds if seconds else 0.0
+        } for epoch, (steps, seconds) in enumerate(self.epochs)]
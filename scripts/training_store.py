@@ -0,0 +1,299 @@
+"""
+Columnar binary store for training samples
+
+A store is a directory (``training-data-clean.columns/`` by convention) of raw
+little-endian column files plus a small ``index.json``:
+
+    base.f32        (rows, 8)  base features in BASE_FEATURES order, as exported
+    labels.f32      (rows, 3)  optimalInterval, actualInterval, recalled
+    timestamp.f64   (rows,)    review timestamp, ms since epoch
+    user.i32        (rows,)    index into index.json "users"
+    question.i32    (rows,)    index into index.json "questions"
+
+Columns are memory-mapped on load, so trainers read features without parsing
+JSON, and new samples can be appended without rewriting existing files.
+The per-sample ``metadata.reviewHistory`` from extract-training-data.js is
+not stored.
+
+Usage:
+    from scripts.training_store import load_training_data
+
+    data = load_training_data('training-data-clean.columns')   # or a .json export
+    X = build_feature_matrix(data.feature_columns())
+    y = data.label('optimalInterval')
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from scripts.feature_spec import BASE_FEATURES
+
+FORMAT_VERSION = 1
+INDEX_FILE = 'index.json'
+
+DEFAULT_JSON_PATH = 'training-data-clean.json'
+DEFAULT_STORE_PATH = 'training-data-clean.columns'
+
+LABELS = ['optimalInterval', 'actualInterval', 'recalled']
+
+# name -> (file, dtype, width); width None means a 1-D column
+COLUMNS = {
+    'base': ('base.f32', '<f4', len(BASE_FEATURES)),
+    'labels': ('labels.f32', '<f4', len(LABELS)),
+    'timestamp': ('timestamp.f64', '<f8', None),
+    'user': ('user.i32', '<i4', None),
+    'question': ('question.i32', '<i4', None)
+}
+
+
+def is_store(path):
+    """True if path is a columnar store directory"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, INDEX_FILE))
+
+
+def timestamp_ms(value):
+    """Milliseconds since epoch from an ISO string, datetime or number"""
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict) and '$date' in value:
+        return timestamp_ms(value['$date'])
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value.timestamp() * 1000
+
+
+def review_ms(value):
+    """Milliseconds since epoch of a review timestamp (naive datetimes from pymongo are UTC)"""
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return timestamp_ms(value)
+
+
+class TrainingData:
+    """Columnar training samples, either memory-mapped from a store or built in memory"""
+
+    def __init__(self, base, labels, timestamp, user, question, users, questions, history=None):
+        self.base = base
+        self.labels = labels
+        self.timestamp = timestamp
+        self.user = user
+        self.question = question
+        self.users = users
+        self.questions = questions
+        self.history = history  # History input columns, computed on first use
+
+    def __len__(self):
+        return len(self.base)
+
+    def base_columns(self):
+        """dict of base feature name -> column view, as build_feature_matrix expects"""
+        return {name: self.base[:, i] for i, name in enumerate(BASE_FEATURES)}
+
+    def history_columns(self):
+        """dict of history input name -> column (scripts/card_history.py), computed once"""
+        if self.history is None:
+            from scripts.card_history import history_columns  # card_history imports this module
+            self.history = history_columns(self.base, self.user, self.question)
+        return self.history
+
+    def feature_columns(self):
+        """Base and history input columns, everything build_feature_matrix reads"""
+        return {**self.base_columns(), **self.history_columns()}
+
+    def label(self, name):
+        return self.labels[:, LABELS.index(name)]
+
+    def subset(self, indices):
+        """
+        TrainingData with only the given rows (copied out of the memory map);
+        history columns already computed on all rows are kept, since a subset
+        may no longer hold each card's earlier samples
+        """
+        history = None if self.history is None else {name: column[indices] for name, column in self.history.items()}
+        return TrainingData(self.base[indices], self.labels[indices], self.timestamp[indices],
+                            self.user[indices], self.question[indices], self.users, self.questions, history)
+
+
+def samples_to_arrays(samples, user_codes, question_codes):
+    """
+    Convert exported JSON samples to column arrays
+
+    user_codes / question_codes are dicts mapping ids to integer codes; new ids
+    are added to them.
+    """
+    n = len(samples)
+    base = np.empty((n, len(BASE_FEATURES)), dtype=np.float32)
+    labels = np.empty((n, len(LABELS)), dtype=np.float32)
+    timestamp = np.empty(n, dtype=np.float64)
+    user = np.empty(n, dtype=np.int32)
+    question = np.empty(n, dtype=np.int32)
+
+    for i, sample in enumerate(samples):
+        features = sample['features']
+        label = sample['label']
+        metadata = sample.get('metadata') or {}
+
+        base[i] = [features[name] for name in BASE_FEATURES]
+        labels[i] = [
+            label['optimalInterval'],
+            label.get('actualInterval', np.nan),
+            float(label.get('recalled', False))
+        ]
+        timestamp[i] = timestamp_ms(metadata.get('timestamp'))
+        user[i] = user_codes.setdefault(str(metadata.get('userId')), len(user_codes))
+        question[i] = question_codes.setdefault(str(metadata.get('question')), len(question_codes))
+
+    return base, labels, timestamp, user, question
+
+
+class TrainingStoreWriter:
+    """
+    Appends samples to a columnar store; index.json is rewritten on close()
+
+    Rows only become visible when close() commits the index. abort() (or
+    leaving the with block on an exception) drops the rows appended since
+    opening and keeps the previous index; a rewrite (append=False) removes
+    the old index up front, so a failed one leaves no store that looks valid.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if not append and os.path.exists(os.path.join(path, INDEX_FILE)):
+            os.remove(os.path.join(path, INDEX_FILE))
+
+        self.rows = 0
+        self.user_codes = {}
+        self.question_codes = {}
+
+        if append and is_store(path):
+            with open(os.path.join(path, INDEX_FILE), 'r') as f:
+                index = json.load(f)
+            self.rows = index['rows']
+            self.user_codes = {value: code for code, value in enumerate(index['users'])}
+            self.question_codes = {value: code for code, value in enumerate(index['questions'])}
+        self.committed_rows = self.rows
+
+        self._files = {}
+        for name, (filename, dtype, width) in COLUMNS.items():
+            file_path = os.path.join(path, filename)
+            if self.rows:
+                # Drop anything past the last committed row (e.g. an interrupted append)
+                f = open(file_path, 'r+b')
+                f.truncate(self.rows * np.dtype(dtype).itemsize * (width or 1))
+                f.seek(0, os.SEEK_END)
+            else:
+                f = open(file_path, 'wb')
+            self._files[name] = f
+
+    def append_samples(self, samples):
+        """Append exported JSON samples (extract-training-data.js schema)"""
+        self.append_arrays(*samples_to_arrays(samples, self.user_codes, self.question_codes))
+
+    def append_arrays(self, base, labels, timestamp, user, question):
+        """Append already-encoded column arrays (user/question are integer codes)"""
+        arrays = {'base': base, 'labels': labels, 'timestamp': timestamp, 'user': user, 'question': question}
+
+        rows = len(base)
+        for name, (_, dtype, width) in COLUMNS.items():
+            values = np.ascontiguousarray(arrays[name], dtype=dtype)
+            expected = (rows, width) if width else (rows,)
+            if values.shape != expected:
+                raise ValueError(f"Column '{name}' must have shape {expected}, got {values.shape}")
+            self._files[name].write(values.tobytes())
+
+        self.rows += rows
+
+    def user_code(self, user_id):
+        return self.user_codes.setdefault(str(user_id), len(self.user_codes))
+
+    def question_code(self, question):
+        return self.question_codes.setdefault(str(question), len(self.question_codes))
+
+    def abort(self):
+        """Close without committing: drop the rows appended since opening"""
+        for name, (_, dtype, width) in COLUMNS.items():
+            f = self._files[name]
+            f.truncate(self.committed_rows * np.dtype(dtype).itemsize * (width or 1))
+            f.close()
+        self.rows = self.committed_rows
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+        index = {
+            'formatVersion': FORMAT_VERSION,
+            'rows': self.rows,
+            'baseFeatures': BASE_FEATURES,
+            'labels': LABELS,
+            'columns': {
+                name: {'file': filename, 'dtype': dtype, 'width': width}
+                for name, (filename, dtype, width) in COLUMNS.items()
+            },
+            'users': list(self.user_codes),
+            'questions': list(self.question_codes)
+        }
+
+        tmp_path = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def load_store(path):
+    """Memory-map a columnar store"""
+    with open(os.path.join(path, INDEX_FILE), 'r') as f:
+        index = json.load(f)
+
+    if index['formatVersion'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported store format {index['formatVersion']} in {path}")
+    if index['baseFeatures'] != BASE_FEATURES:
+        raise ValueError(f"Store {path} has base features {index['baseFeatures']}, expected {BASE_FEATURES}")
+
+    rows = index['rows']
+    columns = {}
+
+    for name, spec in index['columns'].items():
+        shape = (rows, spec['width']) if spec['width'] else (rows,)
+        if rows == 0:
+            columns[name] = np.empty(shape, dtype=spec['dtype'])
+        else:
+            columns[name] = np.memmap(os.path.join(path, spec['file']), dtype=spec['dtype'],
+                                      mode='r', shape=shape)
+
+    return TrainingData(columns['base'], columns['labels'], columns['timestamp'],
+                        columns['user'], columns['question'], index['users'], index['questions'])
+
+
+def load_json(path):
+    """Load an extract-training-data.js JSON export into columns, streaming it in chunks"""
+    from scripts.json_stream import stream_training_data  # json_stream imports this module
+
+    data, _ = stream_training_data(path, featurize=False)
+    return data
+
+
+def default_training_data_path():
+    """The converted store if it exists, otherwise the JSON export"""
+    return DEFAULT_STORE_PATH if is_store(DEFAULT_STORE_PATH) else DEFAULT_JSON_PATH
+
+
+def load_training_data(path=None):
+    """Load training samples from a columnar store directory or a JSON export"""
+    path = path or default_training_data_path()
+    return load_store(path) if is_store(path) else load_json(path)
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import json
 import numpy as np
-import tf_keras as keras
 
-# Load model
+from scripts.numpy_runtime import NumpyIntervalModel
+
+# Load model (pure NumPy runtime, no TensorFlow needed)
 print("Loading model...")
-model = keras.models.load_model('ml/interval_model_advanced.h5')
+model = NumpyIntervalModel.load('ml/saved-model')
 
 # Load normalization stats
 with open('ml/saved-model/normalization-stats.json', 'r') as f:
@@ -15,7 +16,7 @@ with open('ml/saved-model/normalization-stats.json', 'r') as f:
 
 # Test case: Card with memoryStrength=1, successRate=0.75, totalReviews=24
 # (the example from your browser console)
-from scripts.train_model_advanced import create_advanced_features
+from scripts.feature_engine import create_advanced_features
 
 test_sample = {
     'features': {
@@ -0,0 +1,68 @@
+'use strict';
+
+const chai = require('chai');
+const expect = chai.expect;
+
+const featureSpec = require('../ml/feature-spec.json');
+const {
+  createAdvancedFeatureVector,
+  getFeatureArray,
+  getFeatureNames
+} = require('../ml/advanced-features');
+const { historyInputs, historyStateFromReviews } = require('../ml/card-history');
+
+// ml/feature-spec.json is exported by scripts/feature_spec.py, the layout the
+// Python trainers and simulator use. These tests fail fast if the Node
+// feature code drifts from it.
+describe('Feature Spec Parity', function() {
+
+  it('should declare the same number of features as the Node layout', function() {
+    expect(featureSpec.features).to.have.lengthOf(featureSpec.numFeatures);
+    expect(getFeatureNames()).to.have.lengthOf(featureSpec.numFeatures);
+  });
+
+  it('should list features in the same order as getFeatureNames()', function() {
+    const specNames = featureSpec.features.map(feature => feature.name);
+
+    expect(getFeatureNames()).to.deep.equal(specNames);
+  });
+
+  it('should keep spec indices contiguous', function() {
+    featureSpec.features.forEach((feature, idx) => {
+      expect(feature.index).to.equal(idx);
+    });
+  });
+
+  it('should compute the reference row like the Python feature engine', function() {
+    const { input, expected } = featureSpec.reference;
+    const featureArray = getFeatureArray(createAdvancedFeatureVector(input));
+    const names = getFeatureNames();
+
+    featureArray.forEach((value, idx) => {
+      const tolerance = 1e-4 * Math.max(1, Math.abs(expected[idx]));
+      expect(value).to.be.approximately(expected[idx], tolerance, `Feature ${names[idx]} (index ${idx})`);
+    });
+  });
+
+  it('should fold the reference reviews into the same history inputs as scripts/card_history.py', function() {
+    const { reviews, expected } = featureSpec.history.reference;
+    const inputs = historyInputs(historyStateFromReviews(reviews));
+
+    expect(Object.keys(inputs)).to.deep.equal(featureSpec.historyInputs);
+    featureSpec.historyInputs.forEach(name => {
+      const tolerance = 1e-6 * Math.max(1, Math.abs(expected[name]));
+      expect(inputs[name]).to.be.approximately(expected[name], tolerance, `History input ${name}`);
+    });
+  });
+
+  it('should compute the history reference row like the Python feature engine', function() {
+    const { input, expected } = featureSpec.historyReference;
+    const featureArray = getFeatureArray(createAdvancedFeatureVector(input));
+    const names = getFeatureNames();
+
+    featureArray.forEach((value, idx) => {
+      const tolerance = 1e-4 * Math.max(1, Math.abs(expected[idx]));
+      expect(value).to.be.approximately(expected[idx], tolerance, `Feature ${names[idx]} (index ${idx})`);
+    });
+  });
+});
@@ -0,0 +1,93 @@
+"""
+Shared fixtures for the Python pipeline tests (scripts/*.py)
+
+Run from the repository root with ``npm run test:python`` or
+``python -m pytest test/python``. MongoDB is stood in for by mongomock.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import mongomock
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+MODEL_PATH = os.path.join(ROOT, 'ml', 'saved-model')
+START = datetime(2025, 1, 6, 8, 0)
+
+
+def make_reviews(rng, count, start=START, algorithm='baseline'):
+    """count reviews of one card, in timestamp order, as the server records them"""
+    reviews = []
+    timestamp = start
+    interval = 1
+    for _ in range(count):
+        recalled = bool(rng.random() < 0.75)
+        reviews.append({
+            'timestamp': timestamp,
+            'recalled': recalled,
+            'responseTime': int(rng.integers(1500, 9000)),
+            'intervalUsed': interval,
+            'algorithmUsed': algorithm
+        })
+        interval = min(interval * 2, 60) if recalled else 1
+        timestamp += timedelta(days=interval, hours=int(rng.integers(0, 12)))
+    return reviews
+
+
+def make_user(rng, username, num_questions=4, reviews_per_question=6, algorithm='baseline'):
+    """A user document with num_questions cards and their review histories"""
+    return {
+        'username': username,
+        'questions': [
+            {
+                'question': f'{username} question {index}',
+                'answer': f'answer {index}',
+                'memoryStrength': 1,
+                'reviewHistory': make_reviews(rng, reviews_per_question, algorithm=algorithm)
+            }
+            for index in range(num_questions)
+        ]
+    }
+
+
+def make_export_samples(rng, count, num_users=7, num_questions=13):
+    """Samples in the extract-training-data.js JSON export schema, each with a reviewHistory"""
+    samples = []
+    for index in range(count):
+        total = int(rng.integers(1, 30))
+        samples.append({
+            'features': {
+                'memoryStrength': float(rng.uniform(1, 60)),
+                'difficultyRating': float(rng.uniform()),
+                'timeSinceLastReview': float(rng.exponential(4)),
+                'successRate': float(rng.uniform()),
+                'averageResponseTime': float(rng.uniform(1000, 9000)),
+                'totalReviews': total,
+                'consecutiveCorrect': int(rng.integers(0, total + 1)),
+                'timeOfDay': int(rng.integers(0, 24)) / 24
+            },
+            'label': {'optimalInterval': int(rng.integers(1, 30)), 'actualInterval': float(rng.uniform(0, 20)),
+                      'recalled': bool(rng.random() < 0.7)},
+            'metadata': {
+                'userId': f'user{index % num_users}',
+                'question': f'question {index % num_questions}',
+                'timestamp': (START + timedelta(hours=index)).isoformat() + 'Z',
+                'reviewHistory': [{'recalled': True, 'responseTime': 3000}] * int(rng.integers(0, 4))
+            }
+        })
+    return samples
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+@pytest.fixture
+def users_collection():
+    return mongomock.MongoClient().db.users
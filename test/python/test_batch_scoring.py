@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+from conftest import MODEL_PATH, make_user
+from scripts.batch_scoring import PRECOMPUTED_FIELD, score_all_cards
+
+
+def seed_users(collection, rng, count=5):
+    collection.insert_many([make_user(rng, f'user{index}', num_questions=3) for index in range(count)])
+    for user in collection.find():
+        updates = {}
+        for index, question in enumerate(user['questions']):
+            reviews = question['reviewHistory']
+            updates[f'questions.{index}.lastReviewed'] = reviews[-1]['timestamp']
+            updates[f'questions.{index}.consecutiveCorrect'] = 1
+        collection.update_one({'_id': user['_id']}, {'$set': updates})
+
+
+def precomputed(collection):
+    return [question.get(PRECOMPUTED_FIELD) for user in collection.find(sort=[('_id', 1)])
+            for question in user['questions']]
+
+
+def test_resumes_from_checkpoint(users_collection, rng, tmp_path):
+    seed_users(users_collection, rng)
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+
+    first = score_all_cards(users_collection, checkpoint_path, MODEL_PATH, chunk_users=2, max_users=2)
+
+    assert (first['users'], first['cards'], first['complete'], first['resumed']) == (2, 6, False, False)
+    assert sum(value is not None for value in precomputed(users_collection)) == 6
+    with open(checkpoint_path, 'r') as f:
+        assert json.load(f)['lastUserId'] == first['lastUserId']
+
+    second = score_all_cards(users_collection, checkpoint_path, MODEL_PATH, chunk_users=2)
+
+    assert (second['users'], second['cards'], second['writes'], second['stale']) == (5, 15, 5, 0)
+    assert second['complete'] and second['resumed']
+    assert second['asOf'] == first['asOf']
+    values = precomputed(users_collection)
+    assert all(value is not None for value in values)
+    as_of = datetime.fromisoformat(first['asOf'])
+    assert {value['scoredAt'] for value in values} == {as_of.replace(microsecond=as_of.microsecond // 1000 * 1000)}
+    assert all(value['interval'] >= 1 for value in values)
+
+    # A finished run starts over with a new reference time
+    third = score_all_cards(users_collection, checkpoint_path, MODEL_PATH, max_users=1)
+    assert not third['resumed'] and third['users'] == 1
+
+
+def test_empty_budget_leaves_cards_alone(users_collection, rng, tmp_path):
+    seed_users(users_collection, rng)
+
+    totals = score_all_cards(users_collection, str(tmp_path / 'checkpoint.json'), MODEL_PATH, max_users=0)
+
+    assert (totals['users'], totals['complete']) == (0, False)
+    assert precomputed(users_collection) == [None] * 15
@@ -0,0 +1,60 @@
+import numpy as np
+
+from conftest import make_user
+from scripts.card_history import CardHistory, CardHistoryArrays, history_columns
+from scripts.feature_spec import HISTORY_INPUTS
+from scripts.incremental_extract import extract_new_samples
+from scripts.training_store import load_training_data, review_ms
+
+
+def folded_inputs(users):
+    """(user id, question, review ms) -> CardHistory.inputs() after folding the card's reviews up to that one"""
+    inputs = {}
+    for user in users:
+        for question in user['questions']:
+            history = CardHistory()
+            for review in question['reviewHistory']:
+                history.update_review(review)
+                inputs[str(user['_id']), question['question'], review_ms(review['timestamp'])] = history.inputs()
+    return inputs
+
+
+def test_columns_match_folding_each_card(rng, tmp_path, users_collection):
+    users_collection.insert_many([make_user(rng, f'user{index}', num_questions=5, reviews_per_question=int(count))
+                                  for index, count in enumerate(rng.integers(2, 16, size=12))])
+    extract_new_samples(users_collection, str(tmp_path / 'training.columns'), full=True)
+    data = load_training_data(str(tmp_path / 'training.columns'))
+    expected = folded_inputs(users_collection.find())
+
+    # The vectorized pass must not depend on the order samples are stored in
+    shuffled = rng.permutation(len(data))
+    columns = history_columns(data.base[shuffled], data.user[shuffled], data.question[shuffled])
+
+    rows = [expected[data.users[user], data.questions[question], timestamp] for user, question, timestamp
+            in zip(data.user[shuffled], data.question[shuffled], data.timestamp[shuffled])]
+    assert len(rows) == len(data) > 300
+    for name in HISTORY_INPUTS:
+        # Reviews are recovered from float32 cumulative base features, hence the tolerance
+        np.testing.assert_allclose(columns[name], [inputs[name] for inputs in rows], rtol=1e-6, atol=1e-6,
+                                   err_msg=name)
+
+
+def test_arrays_match_card_history(rng):
+    cards = [CardHistory() for _ in range(6)]
+    states = CardHistoryArrays(len(cards))
+    ms = np.full(len(cards), 1.7e12)
+
+    for _ in range(12):
+        active = np.flatnonzero(rng.random(len(cards)) < 0.7)
+        recalled = rng.random(len(active)) < 0.7
+        response_time = rng.uniform(1000, 9000, size=len(active))
+        ms[active] += rng.uniform(0.1, 20, size=len(active)) * 86400000
+        for card, *review in zip(active, recalled, response_time, ms[active]):
+            cards[card].update(*review)
+        states.update(active, recalled, response_time, ms[active])
+
+        reviewed = np.flatnonzero([card.count for card in cards])
+        columns = states.inputs(reviewed)
+        for name in HISTORY_INPUTS:
+            np.testing.assert_allclose(columns[name], [cards[card].inputs()[name] for card in reviewed],
+                                       rtol=1e-12, err_msg=name)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from scripts.cross_validation import fold_sizes, group_kfold
+
+
+def skewed_groups(rng, num_users):
+    """User ids with very uneven review counts, shuffled as an export would interleave them"""
+    counts = np.maximum(rng.pareto(1.5, size=num_users) * 40, 1).astype(int)
+    groups = np.repeat(np.array([f'user{index}' for index in range(num_users)]), counts)
+    return groups[rng.permutation(len(groups))], counts
+
+
+@pytest.mark.parametrize('folds', [2, 5, 7])
+def test_every_user_lands_in_exactly_one_fold(rng, folds):
+    groups, _ = skewed_groups(rng, 60)
+
+    fold_of = group_kfold(groups, folds)
+
+    assert fold_of.shape == groups.shape
+    assert set(np.unique(fold_of).tolist()) == set(range(folds))
+    for user in np.unique(groups):
+        assert len(np.unique(fold_of[groups == user])) == 1
+    per_fold = fold_sizes(fold_of, groups, folds)
+    assert sum(samples for samples, _ in per_fold) == len(groups)
+    assert sum(users for _, users in per_fold) == 60
+
+
+@pytest.mark.parametrize('folds', [2, 5, 7])
+def test_folds_are_balanced(rng, folds):
+    groups, counts = skewed_groups(rng, 200)
+
+    samples = [size for size, _ in fold_sizes(group_kfold(groups, folds), groups, folds)]
+
+    # Largest-first placement into the smallest fold leaves folds at most one user apart
+    assert max(samples) - min(samples) <= counts.max()
+    assert max(samples) <= len(groups) / folds + counts.max()
+
+
+def test_equal_users_split_evenly():
+    groups = np.repeat(np.arange(20), 10)
+
+    assert [size for size, _ in fold_sizes(group_kfold(groups, 5), groups, 5)] == [40] * 5
+
+
+def test_too_few_users_raise():
+    with pytest.raises(ValueError, match='3 grouped folds from 2 users'):
+        group_kfold(np.array(['a', 'b', 'a']), 3)
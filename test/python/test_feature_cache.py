@@ -0,0 +1,99 @@
+import itertools
+import types
+
+import numpy as np
+
+from conftest import make_export_samples
+from scripts import feature_cache
+from scripts.feature_cache import FeatureCache
+from scripts.trainer import advanced_feature_matrix, base_feature_matrix
+from scripts.training_store import TrainingStoreWriter
+
+
+def write_samples(path, samples, append=False):
+    with TrainingStoreWriter(str(path), append=append) as writer:
+        writer.append_samples(samples)
+
+
+def fake_clock(monkeypatch):
+    """Replace the cache's clock with one that advances a second per call"""
+    ticks = itertools.count()
+    monkeypatch.setattr(feature_cache, 'time', types.SimpleNamespace(time=lambda: 1e9 + next(ticks)))
+
+
+def arrays(rows, value):
+    return np.full((rows, 4), value, dtype=np.float32), np.zeros(rows, dtype=np.float32), np.arange(rows)
+
+
+def test_key_changes_with_data_and_builder(rng, tmp_path):
+    store = tmp_path / 'training.columns'
+    write_samples(store, make_export_samples(rng, 40))
+    cache = FeatureCache(str(tmp_path / 'cache'))
+
+    key = cache.key(str(store), 'advanced', advanced_feature_matrix)
+
+    assert cache.key(str(store), 'advanced', advanced_feature_matrix) == key
+    assert cache.key(str(store), 'advanced', base_feature_matrix) != key
+    assert cache.key(str(store), 'base', advanced_feature_matrix) != key
+
+    write_samples(store, make_export_samples(rng, 5), append=True)
+    appended = cache.key(str(store), 'advanced', advanced_feature_matrix)
+
+    assert appended != key
+    assert FeatureCache(str(tmp_path / 'cache')).key(str(store), 'advanced', advanced_feature_matrix) == appended
+
+
+def test_unchanged_input_hits(rng, tmp_path):
+    store = tmp_path / 'training.columns'
+    write_samples(store, make_export_samples(rng, 40))
+    cache = FeatureCache(str(tmp_path / 'cache'))
+    key = cache.key(str(store), 'base', base_feature_matrix)
+
+    assert cache.get(key) is None
+    X, y, groups = arrays(40, 2.5)
+    cache.put(key, X, y, groups, {'dataPath': str(store)})
+
+    entry = FeatureCache(str(tmp_path / 'cache')).get(cache.key(str(store), 'base', base_feature_matrix))
+    assert entry is not None
+    assert isinstance(entry.X, np.memmap) and not entry.X.flags.writeable
+    np.testing.assert_array_equal(entry.X, X)
+    np.testing.assert_array_equal(entry.groups, groups)
+    assert entry.info['dataPath'] == str(store)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_eviction_is_least_recently_used(tmp_path, monkeypatch):
+    fake_clock(monkeypatch)
+    entry_bytes = sum(values.nbytes for values in arrays(100, 0))
+    cache = FeatureCache(str(tmp_path / 'cache'), max_bytes=3 * entry_bytes)
+
+    for key in ('a', 'b', 'c'):
+        cache.put(key, *arrays(100, 0))
+    cache.get('a')  # b is now the least recently used
+    cache.put('d', *arrays(100, 0))
+
+    assert sorted(info['key'] for info in cache.entries()) == ['a', 'c', 'd']
+    assert cache.size() <= cache.max_bytes
+
+
+def test_eviction_keeps_the_entry_just_written(tmp_path, monkeypatch):
+    # A clock that never moves leaves every entry equally old, so only keep protects the new one
+    monkeypatch.setattr(feature_cache, 'time', types.SimpleNamespace(time=lambda: 1e9))
+    entry_bytes = sum(values.nbytes for values in arrays(100, 0))
+    cache = FeatureCache(str(tmp_path / 'cache'), max_bytes=2 * entry_bytes)
+
+    for index in range(6):
+        key = f'entry{index}'
+        assert cache.put(key, *arrays(100, index)) is not None
+        assert cache.size() <= cache.max_bytes
+        assert key in {info['key'] for info in cache.entries()}
+        np.testing.assert_array_equal(cache.get(key).X, index)
+
+    # A matrix that fits only alone evicts everything else
+    big = arrays(180, 9)
+    assert cache.put('big', *big) is not None
+    assert [info['key'] for info in cache.entries()] == ['big']
+
+    # One larger than the whole cache is not written and evicts nothing
+    assert cache.put('huge', *arrays(300, 0)) is None
+    assert [info['key'] for info in cache.entries()] == ['big']
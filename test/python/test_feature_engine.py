@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+
+from conftest import ROOT
+from scripts.card_history import CardHistory
+from scripts.feature_engine import (
+    NUM_FEATURES, build_feature_matrix, columns_from_samples, create_advanced_features
+)
+from scripts.feature_spec import BASE_FEATURES, HISTORY_INPUTS, REFERENCE_INPUT, REFERENCE_REVIEWS
+
+
+def random_samples(rng, n, with_history):
+    samples = []
+    for _ in range(n):
+        total = int(rng.integers(0, 40))
+        sample = {'features': {
+            'memoryStrength': float(rng.uniform(0, 90)),
+            'difficultyRating': float(rng.uniform(0, 1)),
+            'timeSinceLastReview': float(rng.exponential(5)),
+            'successRate': float(rng.uniform(0, 1)),
+            'averageResponseTime': float(rng.uniform(0, 10000)),
+            'totalReviews': total,
+            'consecutiveCorrect': int(rng.integers(0, total + 1)),
+            'timeOfDay': float(rng.integers(0, 24) / 24)
+        }}
+        if with_history:
+            history = CardHistory()
+            timestamp = 1.7e12
+            for _ in range(int(rng.integers(0, 10))):
+                timestamp += rng.uniform(0.5, 20) * 86400000
+                history.update(bool(rng.random() < 0.7), float(rng.uniform(1000, 9000)), timestamp)
+            sample['history'] = history.inputs()
+        samples.append(sample)
+    return samples
+
+
+def test_matrix_matches_per_sample_features(rng):
+    for with_history in (False, True):
+        samples = random_samples(rng, 200, with_history)
+        X = build_feature_matrix(columns_from_samples(samples))
+
+        assert X.shape == (200, NUM_FEATURES)
+        assert np.isfinite(X).all()
+        expected = np.array([create_advanced_features(sample) for sample in samples], dtype=np.float32)
+        np.testing.assert_allclose(X, expected, rtol=1e-6, atol=1e-6)
+
+
+def test_missing_history_inputs_mean_no_history(rng):
+    samples = random_samples(rng, 20, False)
+    columns = columns_from_samples(samples)
+    zeros = {**columns, **{name: np.zeros(len(samples)) for name in HISTORY_INPUTS}}
+
+    np.testing.assert_array_equal(build_feature_matrix(columns), build_feature_matrix(zeros))
+
+
+def test_fills_preallocated_output(rng):
+    columns = columns_from_samples(random_samples(rng, 50, True))
+    out = np.full((50, NUM_FEATURES), np.nan, dtype=np.float32)
+
+    assert build_feature_matrix(columns, out=out) is out
+    np.testing.assert_array_equal(out, build_feature_matrix(columns))
+
+
+def test_reference_rows_match_exported_spec():
+    with open(os.path.join(ROOT, 'ml', 'feature-spec.json'), 'r') as f:
+        spec = json.load(f)
+
+    history = CardHistory()
+    for review in REFERENCE_REVIEWS:
+        history.update(review['recalled'], review['responseTime'], review['timestamp'])
+
+    assert spec['baseFeatures'] == BASE_FEATURES
+    np.testing.assert_allclose(create_advanced_features({'features': REFERENCE_INPUT}),
+                               spec['reference']['expected'], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(create_advanced_features({'features': REFERENCE_INPUT, 'history': history.inputs()}),
+                               spec['historyReference']['expected'], rtol=1e-5, atol=1e-6)
@@ -0,0 +1,124 @@
+import copy
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import mongomock
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from conftest import START, make_reviews, make_user
+from scripts.incremental_extract import extract_new_samples, load_watermark
+from scripts.feature_spec import BASE_FEATURES
+from scripts.training_store import load_training_data
+
+
+@pytest.fixture
+def new_york_time():
+    """Run a test with the process in America/New_York, as a server outside UTC would be"""
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = 'America/New_York'
+    time.tzset()
+    yield ZoneInfo('America/New_York')
+    if previous is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = previous
+    time.tzset()
+
+
+def store_samples(path):
+    """Every sample of a store as a sorted list of (user, question, timestamp, base..., labels...)"""
+    data = load_training_data(path)
+    return sorted(
+        (data.users[user], data.questions[question], float(timestamp),
+         *np.round(base, 5).tolist(), *np.round(labels, 5).tolist())
+        for user, question, timestamp, base, labels in zip(data.user, data.question, data.timestamp,
+                                                           data.base, data.labels)
+    )
+
+
+def split_histories(users, cut):
+    """Copies of users with only the reviews before cut, and the later ones per (user, question index)"""
+    head = copy.deepcopy(users)
+    tails = {}
+    for user_index, user in enumerate(head):
+        for question_index, question in enumerate(user['questions']):
+            reviews = question['reviewHistory']
+            question['reviewHistory'] = [review for review in reviews if review['timestamp'] < cut]
+            tails[user_index, question_index] = [review for review in reviews if review['timestamp'] >= cut]
+    return head, tails
+
+
+def test_two_incremental_runs_equal_a_full_rebuild(rng, tmp_path):
+    cut = START + timedelta(days=20)
+    users = [make_user(rng, f'user{index}', reviews_per_question=8) for index in range(6)]
+    users[0]['questions'][0]['reviewHistory'] = []  # Never reviewed
+    users[1]['questions'].append({'question': 'late card', 'reviewHistory': make_reviews(rng, 4, start=cut)})
+    for user in users:
+        user['_id'] = ObjectId()  # The same users in both collections
+
+    full_collection = mongomock.MongoClient().db.users
+    full_collection.insert_many(copy.deepcopy(users))
+    full = extract_new_samples(full_collection, str(tmp_path / 'full.columns'), full=True, chunk_users=4)
+
+    head, tails = split_histories(users, cut)
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many(head)
+    first = extract_new_samples(collection, str(tmp_path / 'incremental.columns'), chunk_users=4)
+
+    for (user_index, question_index), reviews in tails.items():
+        if reviews:
+            collection.update_one({'username': f'user{user_index}'},
+                                  {'$push': {f'questions.{question_index}.reviewHistory': {'$each': reviews}}})
+    second = extract_new_samples(collection, str(tmp_path / 'incremental.columns'), chunk_users=4)
+
+    assert first['samples'] > 0 and second['samples'] > 0
+    assert first['samples'] + second['samples'] == full['samples'] == second['rows']
+    assert first['newReviews'] + second['newReviews'] == full['newReviews']
+    assert (second['skippedReviews'], second['newCards']) == (0, 1)
+    assert second['watermark'] == full['watermark']
+    assert second['cards'] == full['cards']
+    assert store_samples(tmp_path / 'incremental.columns') == store_samples(tmp_path / 'full.columns')
+
+    # Nothing new: the store and its watermark stay as they are
+    third = extract_new_samples(collection, str(tmp_path / 'incremental.columns'))
+    assert (third['users'], third['samples'], third['rows']) == (0, 0, second['rows'])
+    assert load_watermark(str(tmp_path / 'incremental.columns'))['rows'] == second['rows']
+
+
+def test_out_of_order_review_is_skipped(rng, tmp_path, users_collection):
+    user = {'_id': ObjectId(), **make_user(rng, 'user0', num_questions=2, reviews_per_question=6)}
+    in_order = copy.deepcopy(user)
+    reviews = user['questions'][1]['reviewHistory']
+    late = copy.deepcopy(reviews[2])
+    late['timestamp'] = reviews[3]['timestamp'] - timedelta(hours=1)
+    reviews.insert(4, late)  # Recorded after review 3, but timestamped before it
+    users_collection.insert_one(user)
+
+    totals = extract_new_samples(users_collection, str(tmp_path / 'skipped.columns'))
+
+    reference = mongomock.MongoClient().db.users
+    reference.insert_one(in_order)
+    expected = extract_new_samples(reference, str(tmp_path / 'reference.columns'))
+
+    assert totals['skippedReviews'] == 1
+    assert totals['newReviews'] == expected['newReviews'] == 12
+    assert store_samples(tmp_path / 'skipped.columns') == store_samples(tmp_path / 'reference.columns')
+
+
+def test_time_of_day_is_the_local_hour(rng, tmp_path, users_collection, new_york_time):
+    users_collection.insert_many([make_user(rng, f'user{index}', reviews_per_question=10) for index in range(4)])
+
+    extract_new_samples(users_collection, str(tmp_path / 'training.columns'))
+    data = load_training_data(str(tmp_path / 'training.columns'))
+
+    # extract-training-data.js: new Date(review.timestamp).getHours() / 24, in the process time zone
+    local_hours = [datetime.fromtimestamp(ms / 1000, new_york_time).hour for ms in data.timestamp]
+    utc_hours = [datetime.fromtimestamp(ms / 1000, timezone.utc).hour for ms in data.timestamp]
+    time_of_day = data.base[:, BASE_FEATURES.index('timeOfDay')]
+
+    np.testing.assert_allclose(time_of_day, np.array(local_hours) / 24, rtol=1e-6)
+    assert local_hours != utc_hours
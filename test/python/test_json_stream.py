@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from conftest import make_export_samples
+from scripts.json_stream import iter_json_array, iter_sample_chunks
+
+TRICKY_TEXT = [
+    'plain',
+    'brackets ] } [ { inside a string',
+    '"reviewHistory": [1, 2] only looks like a key',
+    'escaped \\"quotes\\" and a trailing backslash \\',
+    '\\\\"reviewHistory\\\\": {"a": ['
+]
+
+
+def tricky_samples(rng):
+    """Export samples whose strings and reviewHistory values stress the raw-text skipping"""
+    samples = make_export_samples(rng, 12)
+    for index, sample in enumerate(samples):
+        metadata = sample['metadata']
+        metadata['question'] = TRICKY_TEXT[index % len(TRICKY_TEXT)] + ' ünïcode ✓'
+        metadata['notes'] = {'text': TRICKY_TEXT[(index + 1) % len(TRICKY_TEXT)], 'tags': ['[', '{', '\\']}
+        metadata['reviewHistory'] = [
+            {'recalled': True, 'responseTime': 3000, 'answer': TRICKY_TEXT[(index + 2) % len(TRICKY_TEXT)]},
+            {'recalled': False, 'nested': [[{'deep': ['}', ']']}]], 'reviewHistory': [{'x': '"'}]}
+        ][:index % 3]
+    samples[3]['metadata']['reviewHistory'] = {'kind': 'object', 'items': [[[1]]]}
+    samples[4]['metadata']['reviewHistory'] = None
+    samples[5]['metadata']['reviewHistory'] = 'a scalar is kept'
+    samples[6]['reviewHistory'] = [{'outside': 'metadata'}]
+    return samples
+
+
+def without_drop_keys(value, drop_keys=('reviewHistory',)):
+    """What the reader returns: array/object values of drop_keys, at any depth, replaced by None"""
+    if isinstance(value, list):
+        return [without_drop_keys(item, drop_keys) for item in value]
+    if isinstance(value, dict):
+        return {key: None if key in drop_keys and isinstance(item, (list, dict)) else without_drop_keys(item, drop_keys)
+                for key, item in value.items()}
+    return value
+
+
+@pytest.fixture(params=[{}, {'indent': 2}, {'separators': (',', ':')}, {'ensure_ascii': False}],
+                ids=['default', 'indented', 'compact', 'utf-8'])
+def export_path(request, rng, tmp_path):
+    path = tmp_path / 'training-data.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(tricky_samples(rng), f, **request.param)
+    return str(path)
+
+
+@pytest.mark.parametrize('read_size', [1, 2, 3, 7, 64, 1 << 20])
+def test_drop_keys_match_json_load(export_path, read_size):
+    with open(export_path, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+
+    assert list(iter_json_array(export_path, read_size=read_size)) == expected
+    assert list(iter_json_array(export_path, read_size=read_size, drop_keys=('reviewHistory',))) == \
+        without_drop_keys(expected)
+
+
+def test_sample_chunks_pop_review_history(export_path):
+    with open(export_path, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    for sample in expected:
+        sample['metadata'].pop('reviewHistory')
+    expected = without_drop_keys(expected)
+
+    chunks = list(iter_sample_chunks(export_path, chunk_size=5))
+
+    assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+    assert [sample for chunk in chunks for sample in chunk] == expected
+
+
+@pytest.mark.parametrize('text', ['[{"a": 1}, {"metadata": {"reviewHistory": [1, 2', '[{"a": "]}'])
+def test_truncated_export_raises(tmp_path, text):
+    path = tmp_path / 'truncated.json'
+    path.write_text(text)
+
+    for drop_keys in ((), ('reviewHistory',)):
+        with pytest.raises(ValueError):
+            list(iter_json_array(str(path), read_size=3, drop_keys=drop_keys))
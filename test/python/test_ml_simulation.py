@@ -0,0 +1,68 @@
+import copy
+
+import mongomock
+import pytest
+
+from conftest import MODEL_PATH, make_user
+from scripts.ml_simulation import run_simulation
+
+ML_FIELDS = {'algorithmUsed', 'mlInterval', 'baselineInterval', 'intervalUsed'}
+
+
+def seed_users(collection, rng):
+    users = [make_user(rng, f'sim_user{index}') for index in range(5)]
+    users.append(make_user(rng, 'demo'))  # Not a simulated user: never touched
+    collection.insert_many(users)
+    return {user['_id']: copy.deepcopy(user) for user in collection.find()}
+
+
+def changed_reviews(before, after):
+    """(user _id, question index, review index, before review, after review) of every changed review"""
+    changed = []
+    for user_id, user in before.items():
+        assert after[user_id].keys() == user.keys()
+        for question_index, question in enumerate(user['questions']):
+            new_question = after[user_id]['questions'][question_index]
+            assert {key: value for key, value in new_question.items() if key != 'reviewHistory'} == \
+                {key: value for key, value in question.items() if key != 'reviewHistory'}
+            for review_index, (old, new) in enumerate(zip(question['reviewHistory'], new_question['reviewHistory'])):
+                if old != new:
+                    changed.append((user_id, question_index, review_index, old, new))
+            assert len(new_question['reviewHistory']) == len(question['reviewHistory'])
+    return changed
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_only_ml_fields_change(users_collection, rng, workers):
+    before = seed_users(users_collection, rng)
+
+    totals = run_simulation(users_collection, num_users=0, reviews_per_user=8, chunk_users=2,
+                            workers=workers, write_batch=2, model_path=MODEL_PATH)
+
+    after = {user['_id']: user for user in users_collection.find()}
+    changed = changed_reviews(before, after)
+
+    assert totals['users'] == 5
+    assert totals['predictions'] == len(changed) == 5 * 8
+    for user_id, _, _, old, new in changed:
+        assert before[user_id]['username'].startswith('sim_')
+        assert {key for key in new if new.get(key) != old.get(key)} <= ML_FIELDS
+        assert new['algorithmUsed'] == 'ml'
+        assert new['baselineInterval'] == old['intervalUsed']
+        assert new['intervalUsed'] == new['mlInterval'] >= 1
+
+
+def test_workers_match_in_process(rng):
+    collections = [mongomock.MongoClient().db.users for _ in range(2)]
+    seed = [make_user(rng, f'sim_user{index}') for index in range(4)]
+    for collection in collections:
+        collection.insert_many(copy.deepcopy(seed))
+
+    for collection, workers in zip(collections, [0, 2]):
+        run_simulation(collection, num_users=0, reviews_per_user=12, chunk_users=1,
+                       workers=workers, model_path=MODEL_PATH)
+
+    in_process, pooled = ([user['questions'] for user in collection.find(sort=[('username', 1)])]
+                          for collection in collections)
+    assert in_process == pooled
+
@@ -0,0 +1,46 @@
+import json
+import os
+
+import numpy as np
+
+from conftest import MODEL_PATH
+from scripts.numpy_runtime import ACTIVATIONS, NumpyIntervalModel, layer_configs, load_weights
+
+
+def unfolded_forward(model_path, x):
+    """Layer-by-layer inference straight from model.json, with BatchNormalization kept as its own step"""
+    with open(os.path.join(model_path, 'model.json'), 'r') as f:
+        model_data = json.load(f)
+    weights = load_weights(model_path, model_data['weightsManifest'])
+
+    x = x.astype(np.float64)
+    for layer in layer_configs(model_data['modelTopology']):
+        config = layer['config']
+        name = config['name']
+        if layer['class_name'] == 'Dense':
+            x = x @ weights[f'{name}/kernel'] + weights.get(f'{name}/bias', 0)
+            x = ACTIVATIONS[config.get('activation', 'linear')](x)
+        elif layer['class_name'] == 'BatchNormalization':
+            normalized = (x - weights[f'{name}/moving_mean']) / np.sqrt(
+                weights[f'{name}/moving_variance'] + config.get('epsilon', 1e-3))
+            x = normalized * weights.get(f'{name}/gamma', 1) + weights.get(f'{name}/beta', 0)
+    return x
+
+
+def test_folded_model_matches_unfolded_forward_pass(rng):
+    model = NumpyIntervalModel.load(MODEL_PATH)
+    x = rng.normal(size=(500, model.input_dim)).astype(np.float32)
+
+    predictions = model.predict(x)
+
+    assert predictions.shape == (500, 1)
+    assert predictions.dtype == np.float32
+    np.testing.assert_allclose(predictions, unfolded_forward(MODEL_PATH, x), rtol=1e-4, atol=1e-3)
+
+
+def test_batched_predict_matches_one_pass(rng):
+    model = NumpyIntervalModel.load(MODEL_PATH)
+    x = rng.normal(size=(300, model.input_dim)).astype(np.float32)
+
+    np.testing.assert_allclose(model.predict(x, batch_size=64), model.predict(x), rtol=1e-6)
+    np.testing.assert_allclose(model.predict(x[0]), model.predict(x[:1]), rtol=1e-6)
@@ -0,0 +1,73 @@
+import numpy as np
+
+from conftest import MODEL_PATH
+from scripts.card_history import CardHistory
+from scripts.ml_simulation import load_model_and_stats
+from scripts.prediction_cache import CachedIntervalPredictor, PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert len(cache) == 2
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (3, 1, 1, 0)
+    assert stats['hitRate'] == 0.75
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.put('a', 1)
+
+    clock.now = 59.9
+    assert cache.get('a') == 1
+    clock.now = 60.0
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses, cache.expirations, len(cache)) == (1, 1, 1, 0)
+
+    cache.put('a', 2)  # A fresh put restarts the TTL
+    clock.now = 119.0
+    assert cache.get('a') == 2
+
+
+def history_rows(rng, count):
+    rows = []
+    for _ in range(count):
+        history = CardHistory()
+        timestamp = 1.7e12
+        for _ in range(int(rng.integers(3, 8))):
+            timestamp += rng.uniform(1, 10) * 86400000
+            history.update(bool(rng.random() < 0.7), float(rng.uniform(2000, 6000)), timestamp)
+        base = [5.0, 0.3, 2.0, 0.7, 4000.0, 6.0, 2.0, 0.5]
+        rows.append(base + list(history.inputs().values()))
+    return np.array(rows)
+
+
+def test_history_rows_share_buckets(rng):
+    model, mean, std = load_model_and_stats(MODEL_PATH, verbose=False)
+    predictor = CachedIntervalPredictor(model, mean, std, 'test', PredictionCache(), history=True)
+    rows = history_rows(rng, 200)
+
+    centers = np.round(rows / predictor.steps) * predictor.steps
+    offsets = rng.uniform(-0.4, 0.4, size=(2,) + rows.shape) * predictor.steps
+
+    first = predictor.predict_rows(centers + offsets[0])
+    second = predictor.predict_rows(centers + offsets[1])  # Different values, same buckets
+
+    np.testing.assert_array_equal(first, second)
+    assert (predictor.cache.misses, predictor.cache.hits) == (200, 200)
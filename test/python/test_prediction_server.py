@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from conftest import MODEL_PATH
+from scripts.prediction_server import MAX_HEADER_BYTES, PredictionClient, PredictionServer, feature_rows
+from scripts.feature_spec import BASE_FEATURES
+
+FEATURES = {
+    'memoryStrength': 4, 'difficultyRating': 0.3, 'timeSinceLastReview': 2, 'successRate': 0.8,
+    'averageResponseTime': 3500, 'totalReviews': 6, 'consecutiveCorrect': 3, 'timeOfDay': 0.5
+}
+
+
+async def with_server(tmp_path, exercise):
+    """Run exercise(socket_path) against a PredictionServer on a Unix socket"""
+    server = PredictionServer.load(MODEL_PATH)
+    socket_path = str(tmp_path / 'intervals.sock')
+    ready = asyncio.Event()
+    task = asyncio.create_task(server.serve(unix_socket=socket_path, ready=lambda _: ready.set()))
+    await ready.wait()
+    try:
+        return await exercise(socket_path)
+    finally:
+        task.cancel()
+
+
+async def raw_exchange(socket_path, data):
+    """Send raw bytes, close the write side, and return the status line of the reply"""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(data)
+    writer.write_eof()
+    await writer.drain()
+    reply = await reader.read()
+    writer.close()
+    return reply.split(b'\r\n', 1)[0].decode()
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-Infinity', 1e999, float('nan')])
+def test_feature_rows_reject_values_that_are_not_finite(value):
+    with pytest.raises(ValueError, match='finite'):
+        feature_rows([{**FEATURES, 'successRate': value}])
+
+    with pytest.raises(ValueError, match='finite'):
+        feature_rows([{**FEATURES, 'emaInterval': value}], history=True)
+
+
+def test_feature_rows_accept_numeric_strings():
+    rows = feature_rows([{**FEATURES, 'successRate': '0.5'}])
+
+    assert rows.shape == (1, len(BASE_FEATURES))
+    assert rows[0, BASE_FEATURES.index('successRate')] == 0.5
+
+
+def test_predict_status_codes(tmp_path):
+    async def exercise(socket_path):
+        client = PredictionClient(unix_socket=socket_path)
+        try:
+            results = [
+                await client.request('POST', '/predict', {'features': FEATURES}),
+                await client.request('POST', '/predict', {'features': {**FEATURES, 'successRate': 'nan'}}),
+                await client.request('POST', '/predict', {'instances': [FEATURES, {**FEATURES, 'timeOfDay': 1e999}]}),
+                await client.request('POST', '/predict', {'features': {'successRate': 0.5}}),
+            ]
+        finally:
+            await client.close()
+        return results
+
+    ok, not_a_number, overflow, missing = asyncio.run(with_server(tmp_path, exercise))
+
+    assert ok[0] == 200 and ok[1]['interval'] >= 1
+    assert not_a_number == (400, {'error': 'Feature values must be finite numbers'})
+    assert overflow == (400, {'error': 'Feature values must be finite numbers'})
+    assert missing[0] == 400 and 'Missing base feature' in missing[1]['error']
+
+
+def test_oversized_and_truncated_heads(tmp_path):
+    async def exercise(socket_path):
+        oversized = b'GET /health HTTP/1.1\r\nX-Padding: ' + b'a' * (MAX_HEADER_BYTES + 1) + b'\r\n\r\n'
+        return [
+            await raw_exchange(socket_path, oversized),
+            await raw_exchange(socket_path, b'GET /health HTTP/1.1\r\nHost: a'),
+            await raw_exchange(socket_path, b'GET /health HTTP/1.1\r\nContent-Length: ten\r\n\r\n'),
+            await raw_exchange(socket_path, b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n'),
+        ]
+
+    oversized, truncated, bad_length, health = asyncio.run(with_server(tmp_path, exercise))
+
+    assert oversized == 'HTTP/1.1 431 Request Header Fields Too Large'
+    assert truncated == 'HTTP/1.1 400 Bad Request'
+    assert bad_length == 'HTTP/1.1 400 Bad Request'
+    assert health == 'HTTP/1.1 200 OK'
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+
+from conftest import make_export_samples
+from scripts.feature_engine import NUM_FEATURES
+from scripts.json_stream import stream_training_data
+from scripts.running_stats import RunningStats
+from scripts.trainer import normalization_stats, train_test_indices
+
+
+def assert_matches_numpy(stats, X):
+    X = np.asarray(X, dtype=np.float64)
+    assert stats.count == len(X)
+    np.testing.assert_allclose(stats.mean, X.mean(axis=0), rtol=1e-10, atol=1e-9)
+    np.testing.assert_allclose(np.sqrt(stats.variance), X.std(axis=0), rtol=1e-9, atol=1e-9)
+
+
+def test_merged_chunk_stats_equal_full_matrix(rng):
+    X = (rng.normal(size=(1000, 6)) * [1, 10, 1e3, 1e-3, 5, 1] + [0, -3, 1e4, 2, 0, 7]).astype(np.float32)
+
+    assert_matches_numpy(RunningStats.from_chunks(X, chunk_rows=64), X)
+
+    parts = [RunningStats.from_chunks(X[start:start + 300], chunk_rows=77) for start in range(0, 1000, 300)]
+    merged = RunningStats(6)
+    for part in parts:
+        merged.merge(part)
+    assert_matches_numpy(merged, X)
+
+
+def test_chunk_stats_of_selected_rows(rng, tmp_path):
+    X = rng.normal(size=(1000, 4)).astype(np.float32)
+    path = tmp_path / 'X.npy'
+    np.save(path, X)
+    X_mapped = np.load(path, mmap_mode='r')
+    train_idx, _ = train_test_indices(len(X))
+
+    assert_matches_numpy(RunningStats.from_chunks(X_mapped, train_idx, chunk_rows=50), X[train_idx])
+    assert RunningStats.from_chunks(X_mapped, [], chunk_rows=50).count == 0
+
+    mean, std = normalization_stats(X_mapped, train_idx)
+    np.testing.assert_allclose(mean, X[train_idx].mean(axis=0), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(std, X[train_idx].std(axis=0) + 1e-8, rtol=1e-5)
+
+
+def test_stream_stats_equal_full_feature_matrix(rng, tmp_path):
+    samples = make_export_samples(rng, 300)
+    path = tmp_path / 'export.json'
+    path.write_text(json.dumps(samples))
+
+    stats = RunningStats(NUM_FEATURES)
+    _, X = stream_training_data(str(path), chunk_size=64, stats=stats)
+
+    assert_matches_numpy(stats, X)
@@ -0,0 +1,86 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import MODEL_PATH
+from scripts.numpy_runtime import NumpyIntervalModel, load_weights
+from scripts.tfjs_export import MODEL_FILE, dequantize, quantize, write_layers_model
+
+
+def deployed_model():
+    """(topology, [(name, weights)]) of the deployed model"""
+    with open(os.path.join(MODEL_PATH, MODEL_FILE), 'r') as f:
+        model_json = json.load(f)
+    weights = load_weights(MODEL_PATH, model_json['weightsManifest'])
+    names = [spec['name'] for group in model_json['weightsManifest'] for spec in group['weights']]
+    return model_json['modelTopology'], [(name, np.array(weights[name])) for name in names]
+
+
+def shard_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.bin'))
+
+
+def test_float16_round_trip_error(rng):
+    values = (rng.normal(size=5000) * 10.0 ** rng.integers(-3, 3, size=5000)).astype(np.float32)
+
+    encoded, entry = quantize(values, 'float16')
+    restored = dequantize(encoded, entry)
+
+    assert encoded.dtype == np.float16 and entry == {'dtype': 'float16'}
+    # 10 mantissa bits: relative error at most 2^-11 for normal half-precision values
+    np.testing.assert_array_less(np.abs(restored - values), np.abs(values) * 2.0 ** -11 + 1e-7)
+
+
+@pytest.mark.parametrize('low, high', [(-0.5, 2.0), (0.1, 0.3), (-3.0, -1.0)])
+def test_uint8_round_trip_error(rng, low, high):
+    values = rng.uniform(low, high, size=5000).astype(np.float32)
+    values = np.append(values, np.float32(0.0)) if low < 0 < high else values
+
+    encoded, entry = quantize(values, 'uint8')
+    restored = dequantize(encoded, entry)
+
+    assert encoded.dtype == np.uint8
+    assert entry['scale'] == pytest.approx((values.max() - values.min()) / 255)
+    # Affine steps of `scale`; nudging the range to hit 0.0 can clip by up to one more step
+    assert np.abs(restored - values).max() <= entry['scale'] * 1.0001
+    if low < 0 < high:
+        assert abs(restored[-1]) <= entry['scale'] * 1e-4  # The range is nudged onto 0.0
+
+
+@pytest.mark.parametrize('value', [0.25, -3.0, 0.0, 1.0])
+def test_constant_tensor_round_trips(value):
+    values = np.full(10, value, dtype=np.float32)
+
+    encoded, entry = quantize(values, 'uint8')
+
+    np.testing.assert_array_equal(dequantize(encoded, entry), values)
+
+
+def test_reexport_swaps_model_json_and_removes_stale_shards(rng, tmp_path):
+    topology, named_weights = deployed_model()
+    model = NumpyIntervalModel.load(MODEL_PATH)
+    x = rng.normal(size=(100, model.input_dim)).astype(np.float32)
+    expected = model.predict(x)
+    output_dir = str(tmp_path / 'model')
+
+    first = write_layers_model(output_dir, topology, named_weights, shard_bytes=16 * 1024)
+    first_shards = shard_files(output_dir)
+    assert first['shards'] == len(first_shards) > 1
+    np.testing.assert_array_equal(NumpyIntervalModel.load(output_dir).predict(x), expected)
+
+    second = write_layers_model(output_dir, topology, named_weights, quantization='uint8', shard_bytes=16 * 1024)
+
+    with open(os.path.join(output_dir, MODEL_FILE), 'r') as f:
+        manifest = json.load(f)['weightsManifest']
+    paths = [path for group in manifest for path in group['paths']]
+    assert shard_files(output_dir) == sorted(paths)
+    assert not set(paths) & set(first_shards)
+    assert second['weightBytes'] * 4 == first['weightBytes']
+    assert not [name for name in os.listdir(output_dir) if name.endswith('.tmp')]
+    np.testing.assert_allclose(NumpyIntervalModel.load(output_dir).predict(x), expected, rtol=0.1, atol=1.0)
+
+    # The same weights again: same digest, so the live shards are kept
+    write_layers_model(output_dir, topology, named_weights, quantization='uint8', shard_bytes=16 * 1024)
+    assert shard_files(output_dir) == sorted(paths)
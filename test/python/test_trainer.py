@@ -0,0 +1,25 @@
+import numpy as np
+
+from scripts.trainer import incremental_indices, train_test_indices, warm_start_indices
+
+
+def test_warm_start_test_split_holds_only_new_samples():
+    num_new, n = 400, 1000
+
+    train_idx, test_idx = warm_start_indices(num_new, n, test_size=0.2, seed=3)
+
+    assert len(test_idx) == 80
+    assert (test_idx < num_new).all()
+    assert np.isin(np.arange(num_new, n), train_idx).all()  # Every replayed row is trained on
+    assert not np.intersect1d(train_idx, test_idx).size
+    np.testing.assert_array_equal(np.sort(np.concatenate([train_idx, test_idx])), np.arange(n))
+    np.testing.assert_array_equal(test_idx, train_test_indices(num_new, 0.2, 3)[1])
+
+
+def test_incremental_indices_split_on_the_watermark():
+    timestamps = np.array([5.0, 1.0, 7.0, np.nan, 2.0, 9.0, 3.0])
+
+    new, replay = incremental_indices(timestamps, watermark=4.0, replay_size=2, seed=0)
+
+    np.testing.assert_array_equal(new, [0, 2, 5])
+    assert len(replay) == 2 and set(replay) <= {1, 3, 4, 6}
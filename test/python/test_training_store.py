@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from conftest import make_export_samples
+from scripts.training_store import COLUMNS, INDEX_FILE, TrainingStoreWriter, load_training_data
+
+
+def store_files(path):
+    """Bytes of index.json and every column file"""
+    files = {}
+    for name in [INDEX_FILE] + [filename for filename, _, _ in COLUMNS.values()]:
+        with open(os.path.join(path, name), 'rb') as f:
+            files[name] = f.read()
+    return files
+
+
+def write_store(path, *batches, append=False):
+    """Write each batch of samples with its own writer, appending after the first (or all with append)"""
+    for index, samples in enumerate(batches):
+        with TrainingStoreWriter(path, append=append or index > 0) as writer:
+            writer.append_samples(samples)
+
+
+def test_failed_append_leaves_the_store_unchanged(rng, tmp_path):
+    path = str(tmp_path / 'training.columns')
+    committed, rejected, later = (make_export_samples(rng, count) for count in (30, 25, 10))
+    write_store(path, committed)
+    before = store_files(path)
+
+    with pytest.raises(RuntimeError, match='interrupted'):
+        with TrainingStoreWriter(path, append=True) as writer:
+            writer.append_samples(rejected)
+            writer.user_code('only seen by the failed append')
+            raise RuntimeError('interrupted')
+
+    assert store_files(path) == before
+    assert len(load_training_data(path)) == 30
+
+    write_store(path, later, append=True)
+    write_store(str(tmp_path / 'expected.columns'), committed, later)
+    assert store_files(path) == store_files(str(tmp_path / 'expected.columns'))
+
+
+def test_append_truncates_rows_that_were_never_committed(rng, tmp_path):
+    path = str(tmp_path / 'training.columns')
+    committed, orphaned, later = (make_export_samples(rng, count) for count in (30, 25, 10))
+    write_store(path, committed)
+    before = store_files(path)
+
+    # A writer that dies without close() or abort(): its rows reach the column files, not the index
+    writer = TrainingStoreWriter(path, append=True)
+    writer.append_samples(orphaned)
+    for f in writer._files.values():
+        f.close()
+
+    assert store_files(path)['base.f32'] != before['base.f32']
+    assert store_files(path)[INDEX_FILE] == before[INDEX_FILE]
+    assert len(load_training_data(path)) == 30
+
+    with TrainingStoreWriter(path, append=True) as writer:
+        assert writer.rows == writer.committed_rows == 30
+    assert store_files(path) == before
+
+    write_store(path, later, append=True)
+    write_store(str(tmp_path / 'expected.columns'), committed, later)
+    assert store_files(path) == store_files(str(tmp_path / 'expected.columns'))
+    assert len(load_training_data(path)) == 40
@@ -1,5 +1,11 @@
 'use strict';
 
+const {
+  historyInputs,
+  historyStateFromReviews,
+  updateHistoryState
+} = require('../ml/card-history');
+
 /**
  * Helper utilities for working with the enhanced question model
  */
@@ -36,8 +42,21 @@ function calculateQuestionStats(question) {
   };
 }
 
+/**
+ * Rolling history state of a question (ml/card-history.js); built once from
+ * reviewHistory for questions saved before historyState existed
+ */
+function currentHistoryState(question) {
+  const state = question.historyState;
+  if (state && state.count) {
+    return state;
+  }
+  return historyStateFromReviews(question.reviewHistory);
+}
+
 /**
  * Create feature vector for ML model from question data
+ * (8 base features plus the history inputs)
  */
 function createFeatureVector(question) {
   const stats = calculateQuestionStats(question);
@@ -50,7 +69,8 @@ function createFeatureVector(question) {
     averageResponseTime: stats.averageResponseTime || 0,
     totalReviews: stats.totalReviews || 0,
     consecutiveCorrect: question.consecutiveCorrect || 0,
-    timeOfDay: new Date().getHours() / 24
+    timeOfDay: new Date().getHours() / 24,
+    ...historyInputs(currentHistoryState(question))
   };
 }
 
@@ -58,6 +78,9 @@ function createFeatureVector(question) {
  * Update question statistics after a review
  */
 function updateQuestionStats(question, isCorrect, responseTime) {
+  // History state before this review (reviewHistory does not have it yet)
+  const historyState = currentHistoryState(question);
+
   // Update counts
   if (isCorrect) {
     question.timesCorrect = (question.timesCorrect || 0) + 1;
@@ -69,6 +92,7 @@ function updateQuestionStats(question, isCorrect, responseTime) {
 
   // Update last reviewed
   question.lastReviewed = new Date();
+  question.historyState = updateHistoryState(historyState, isCorrect, responseTime, question.lastReviewed);
 
   // Update average response time (rolling average)
   const currentAvg = question.averageResponseTime || 0;